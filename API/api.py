@@ -1,21 +1,256 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import time
 from datetime import datetime
-import pandas as pd
-import csv
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from API.cache import ResponseCache, endpoint_of
+from API.checkpoint import CheckpointStore
+from API.commit_stats import commit_stats
+from API.gitmirror import GitError, GitMirror, author_of
+from API.metrics import MetricsExporter, RequestMetrics
+from API.progress import Progress
+from API.graphql import (
+    PULL_REQUEST_COUNT_FIELDS,
+    REPOSITORY_FIELDS,
+    chunks,
+    pull_request_commits_query,
+    repository_batch_query,
+    stargazers_query,
+)
+from API.ratelimit import RateLimitScheduler
+from API.tokens import TokenPool
+from API.storage import get_storage
+from API.writer import OutputSink
+
+# Columns of the fork table (choice 2)
+FORK_COLUMNS = [
+    "repo_id",
+    "repo_owner",
+    "repo_name",
+    "fork_id",
+    "fork_owner",
+    "fork_owner_id",
+    "fork_name",
+    "fork_default_branch",
+    "fork_created_at",
+    "fork_url",
+    "fork_pushed_at",
+    "fork_updated_at",
+    "fork_size",
+]
+
+# The REST stargazer listing ends at this page (100 stars per page)
+STARGAZER_PAGE_LIMIT = 400
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that counts requests and the new connections (handshakes) they needed."""
+
+    def __init__(self, *args, **kwargs):
+        self.counter_lock = threading.Lock()
+        self.requests_sent = 0
+        self.handshakes = 0
+        self.handshake_seconds = 0.0
+        self.request_seconds = 0.0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": self.counting_pool(HTTPConnectionPool),
+            "https": self.counting_pool(HTTPSConnectionPool),
+        }
+
+    def counting_pool(self, pool_cls):
+        """Returns a connection pool class whose connections report their handshakes."""
+        adapter = self
+
+        class CountingConnection(pool_cls.ConnectionCls):
+            def connect(self):
+                start = time.time()
+                super().connect()
+                adapter.record_handshake(time.time() - start)
+
+        return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": CountingConnection})
+
+    def record_handshake(self, seconds):
+        with self.counter_lock:
+            self.handshakes += 1
+            self.handshake_seconds += seconds
+
+    def send(self, request, **kwargs):
+        start = time.time()
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            with self.counter_lock:
+                self.requests_sent += 1
+                self.request_seconds += time.time() - start
+
+    def stats(self):
+        with self.counter_lock:
+            return {
+                "requests": self.requests_sent,
+                "new_connections": self.handshakes,
+                "reused_connections": max(0, self.requests_sent - self.handshakes),
+                "handshake_seconds": self.handshake_seconds,
+                "request_seconds": self.request_seconds,
+            }
 
 
 class API:
     def __init__(self, args, token):
         self.args = args
         self.token = os.getenv("GITHUB_TOKEN")
-        self.url = "https://api.github.com/repos/"
+        # REST and GraphQL endpoints (another base URL points at e.g. benchmark/mock_server.py)
+        api_url = getattr(args, "api_url", None) or "https://api.github.com/"
+        api_url = api_url if api_url.endswith("/") else api_url + "/"
+        self.url = api_url + "repos/"
+        self.graphql_url = api_url + "graphql"
         self.headers = {"Authorization": f"token {self.token}"} if self.token else {}
+        # Requests are routed to the token with the most remaining budget
+        self.tokens = TokenPool.from_env(token, getattr(args, "token_file", None))
+        # Items (repositories, PRs, forks) resolved per GraphQL query
+        self.graphql_batch_size = getattr(args, "graphql_batch_size", None) or 50
+        # Pages of one paginated endpoint fetched at the same time
+        self.page_workers = getattr(args, "page_workers", None) or 4
+        # Requests in flight over all concurrent jobs and their page prefetches
+        self.max_in_flight = max(getattr(args, "concurrency", 1) or 1, self.page_workers)
+        self.in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        # Requests are paced so each token's budget lasts until its reset
+        self.scheduler = RateLimitScheduler(
+            burst=getattr(args, "burst", None) or 100
+        )
+        self.output_lock = threading.Lock()  # Serialize state writes from concurrent jobs
+        # Buffered output, flushed by row count/time and at every checkpoint
+        self.storage = get_storage(
+            getattr(args, "storage", None) or "csv",
+            getattr(args, "database_path", None),
+            self.output_writer(args),
+        )
+        # Per-item resume state, recorded together with the flushed output
+        self.checkpoints = CheckpointStore(
+            getattr(args, "checkpoint_path", None) or ":memory:"
+        )
+        self.sink = OutputSink(
+            self.storage,
+            flush_rows=getattr(args, "flush_rows", None) or 1000,
+            flush_seconds=getattr(args, "flush_seconds", None) or 10.0,
+            replace_parts=self.checkpoints.replace_parts,
+        )
+        self.closed = False
+        # Bare mirrors of the upstream repos (git engine of choice 4, choice 9)
+        if getattr(args, "mirror_dir", None):
+            self.git_mirror = GitMirror(args.mirror_dir, args.git_base_url)
+        else:
+            self.git_mirror = None
+        self.session = self.create_session()
+        # Items, rows and pages done, reported at most every --progress_seconds
+        self.progress = Progress(
+            interval=getattr(args, "progress_seconds", None) or 5.0,
+            quiet=getattr(args, "quiet", False),
+            quotas=lambda: self.tokens.summary(),
+        )
+        # Per-endpoint request metrics, exported periodically as Prometheus text
+        self.metrics = RequestMetrics()
+        metrics_path = getattr(args, "metrics_path", None)
+        if metrics_path:
+            self.metrics_exporter = MetricsExporter(
+                self.metrics,
+                metrics_path,
+                getattr(args, "metrics_seconds", None) or 60,
+                lambda: self.tokens.summary(),
+            )
+        else:
+            self.metrics_exporter = None
+
+        # Response cache: fresh entries are replayed, stale ones revalidated with 304s
+        cache_path = getattr(args, "cache_path", None)
+        if cache_path and not getattr(args, "no_cache", False):
+            self.cache = ResponseCache(
+                cache_path,
+                ttls=getattr(args, "cache_ttls", None),
+                max_bytes=getattr(args, "cache_max_mb", 0) * 1024 * 1024,
+                replay=getattr(args, "replay", False),
+            )
+        else:
+            self.cache = None
+
+    @staticmethod
+    def output_writer(args):
+        """Names this process's part of the output tables: one per worker slot or shard (None: the tables themselves)."""
+        if getattr(args, "output_writer", None):
+            return args.output_writer
+        if getattr(args, "num_shards", None):
+            return f"shard{args.shard}"
+        return None
+
+    def create_session(self):
+        """Creates a pooled keep-alive session shared by every API request."""
+        # Keep at least one connection per in-flight request to the API
+        pool_size = max(10, self.max_in_flight)
+        self.adapter = CountingHTTPAdapter(
+            pool_connections=4, pool_maxsize=pool_size, pool_block=True
+        )
+        session = requests.Session()
+        session.mount("https://", self.adapter)
+        session.mount("http://", self.adapter)
+        session.headers.update(
+            {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+        )
+        return session
+
+    def connection_stats(self):
+        """Returns the number of requests sent over new and reused connections."""
+        return self.adapter.stats()
+
+    def print_connection_stats(self):
+        """Prints connection reuse counters of the session."""
+        stats = self.connection_stats()
+        print(
+            f"📊 Requests: {stats['requests']}, new connections (handshakes): {stats['new_connections']}, reused connections: {stats['reused_connections']}"
+        )
+        print(
+            f"📊 Time in handshakes: {stats['handshake_seconds']:.1f}s of {stats['request_seconds']:.1f}s total request time"
+        )
+
+    def print_cache_stats(self):
+        """Prints how many responses were served from the response cache."""
+        if self.cache:
+            print(
+                f"📊 Cache: {self.cache.fresh_hits} responses replayed, {self.cache.hits} not modified (304), {self.cache.misses} fetched in full, {self.cache.evictions} evicted"
+            )
+
+    def print_token_stats(self):
+        """Prints the remaining rate-limit budget of every token in the pool."""
+        for token_suffix, resource, remaining, limit in self.tokens.summary():
+            print(
+                f"📊 Token ...{token_suffix} ({resource}): {remaining}/{limit} requests remaining"
+            )
+
+    def print_metrics_stats(self):
+        """Prints the requests, latency and payload per endpoint, and the time spent waiting."""
+        for endpoint, requests_sent, errors, mean_seconds, size, retries in self.metrics.summary():
+            p95 = self.metrics.quantile(endpoint, 0.95)
+            p95 = f"<= {p95}s" if p95 else "> 30s"
+            print(
+                f"📊 {endpoint}: {requests_sent} requests ({errors} failed, {retries} retried), mean {mean_seconds:.2f}s, p95 {p95}, {size / 1e6:.1f} MB"
+            )
+        waits = self.metrics.waits
+        print(
+            f"📊 Waiting: {waits.get('pacing', 0):.1f}s paced (incl. secondary limits), {waits.get('primary_limit', 0):.1f}s on rate limit resets, {waits.get('retry', 0):.1f}s before retries"
+        )
 
     def pull_repo(self, owner, repo):
         repo_url = self.url + owner + "/" + repo
-        repo_response = requests.get(repo_url, headers=self.headers)
+        repo_response = self.session.get(repo_url, headers=self.headers)
 
         try:
             repo_response.raise_for_status()
@@ -35,34 +270,54 @@ class API:
         """Handles API requests, including rate limits."""
         retries = 0
 
+        request_headers = dict(self.headers if not headers else headers)
+        request_headers.pop("Authorization", None)  # Set per attempt from the token pool
+        accept = request_headers.get("Accept", "")
+        cached = self.cache.get(url, accept) if self.cache else None
+        if cached and self.cache.is_fresh(cached):  # Replay without any request
+            return self.cache.build_response(cached)
+        if cached:
+            request_headers.update(self.cache.conditional_headers(cached))
+
+        endpoint = endpoint_of(url)
         while retries < max_retries:
-            response = requests.get(
-                url, headers=self.headers if not headers else headers
+            token = self.tokens.acquire("core")
+            if token:
+                request_headers["Authorization"] = f"token {token}"
+            response = self.send_request(
+                endpoint, token, "core", self.session.get, url, headers=request_headers
             )
+            self.tokens.update(token, response.headers)
+            self.scheduler.update(token, response)
+
+            if response.status_code == 304 and cached:  # Unchanged since last run
+                self.cache.touch(cached, accept)
+                return self.cache.build_response(cached, response)
 
             if response.status_code == 200 or response.status_code == 404:
+                if response.status_code == 200 and self.cache:
+                    self.cache.store(url, accept, response)
                 return response
 
-            elif response.status_code == 403:  # Rate limit hit
-                reset_time = int(response.headers["X-RateLimit-Reset"])
-                reset_time_str = datetime.fromtimestamp(reset_time).strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                )  # Convert Unix timestamps to human-readable format
-                current_time = time.time()
-                current_time_str = datetime.fromtimestamp(current_time).strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                )  # Convert Unix timestamps to human-readable format
-                wait_time = reset_time - current_time
-                print(
-                    f"🚨 Rate limit exceeded! Waiting {int(wait_time)} seconds before retrying...(Current time: {current_time_str}, Reset time: {reset_time_str})"
-                )
-                time.sleep(wait_time + 1)
+            elif self.scheduler.is_primary_limit(response):  # Rate limit hit
+                self.metrics.retry(endpoint, "primary_limit")
+                self.handle_rate_limit(token, "core", response)
+
+            elif self.scheduler.is_secondary_limit(response):  # Abuse limit hit
+                self.metrics.retry(endpoint, "secondary_limit")
+                self.scheduler.pause_for_secondary_limit(response)
+
+            elif response.status_code in (403, 451):  # Blocked (e.g. DMCA takedown)
+                # Retrying cannot help, so callers skip the item as for a 404
+                return response
 
             else:
                 print(f"❌ API error ({response.status_code}): {response.text}")
                 retries += 1
                 if retries < max_retries:
                     print(f"🔄 Retrying ({retries}/{max_retries}) in 5 seconds...")
+                    self.metrics.retry(endpoint, "error")
+                    self.metrics.waited("retry", 5)
                     time.sleep(5)  # Short delay before retrying
                 else:
                     print(
@@ -72,43 +327,256 @@ class API:
 
         return None
 
+    def send_request(self, endpoint, token, resource, send, url, **kwargs):
+        """Sends one request once the scheduler and the in-flight limit allow it and records its metrics."""
+        paced_at = time.time()
+        self.scheduler.wait(token, resource)
+        self.metrics.waited("pacing", time.time() - paced_at)
+        with self.in_flight:
+            start = time.time()
+            response = send(url, **kwargs)
+        # Body bytes read from the wire, before decompression (also without Content-Length)
+        size = response.raw.tell() if hasattr(response.raw, "tell") else len(response.content)
+        self.metrics.observe(endpoint, response.status_code, time.time() - start, size)
+        return response
+
+    def handle_rate_limit(self, token, resource, response):
+        """Switches to another token, or sleeps until the earliest token budget resets (primary limits only)."""
+        reset_time = response.headers.get("X-RateLimit-Reset")
+        self.tokens.mark_exhausted(token, resource, reset_time)
+        if self.tokens.has_budget(resource):
+            print(
+                f"🔀 Rate limit of token ...{token[-4:]} exceeded! Switching to another token..."
+            )
+            return
+        if self.tokens.tokens:
+            reset_time = self.tokens.next_reset(resource)
+        self.wait_for_rate_limit_reset(int(float(reset_time or time.time() + 60)))
+
+    def wait_for_rate_limit_reset(self, reset_time):
+        """Sleeps until the rate limit window resets at `reset_time` (Unix timestamp)."""
+        reset_time_str = datetime.fromtimestamp(reset_time).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )  # Convert Unix timestamps to human-readable format
+        current_time = time.time()
+        current_time_str = datetime.fromtimestamp(current_time).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )  # Convert Unix timestamps to human-readable format
+        wait_time = reset_time - current_time
+        print(
+            f"🚨 Rate limit exceeded! Waiting {int(wait_time)} seconds before retrying...(Current time: {current_time_str}, Reset time: {reset_time_str})"
+        )
+        self.metrics.waited("primary_limit", max(0, wait_time) + 1)
+        time.sleep(max(0, wait_time) + 1)
+
+    def github_graphql_request(self, query, max_retries=3):
+        """Handles GraphQL API requests, including rate limits. Returns the `data` object."""
+        retries = 0
+
+        while retries < max_retries:
+            token = self.tokens.acquire("graphql")
+            headers = {"Authorization": f"token {token}"} if token else {}
+            response = self.send_request(
+                "graphql",
+                token,
+                "graphql",
+                self.session.post,
+                self.graphql_url,
+                json={"query": query},
+                headers=headers,
+            )
+            self.tokens.update(token, response.headers)
+            self.scheduler.update(token, response)
+            body = response.json() if response.status_code == 200 else {}
+            errors = body.get("errors") or []
+
+            if any(
+                error.get("type") == "RATE_LIMITED" for error in errors
+            ) or self.scheduler.is_primary_limit(response):  # Rate limit hit
+                self.metrics.retry("graphql", "primary_limit")
+                self.handle_rate_limit(token, "graphql", response)
+
+            elif self.scheduler.is_secondary_limit(response):  # Abuse limit hit
+                self.metrics.retry("graphql", "secondary_limit")
+                self.scheduler.pause_for_secondary_limit(response)
+
+            elif response.status_code == 200 and body.get("data") is not None:
+                # NOT_FOUND errors only null out the alias of a missing repository
+                for error in errors:
+                    if error.get("type") != "NOT_FOUND":
+                        print(f"❗ GraphQL error: {error.get('message')}")
+                return body["data"]
+
+            else:
+                print(f"❌ GraphQL API error ({response.status_code}): {response.text}")
+                retries += 1
+                if retries < max_retries:
+                    print(f"🔄 Retrying ({retries}/{max_retries}) in 5 seconds...")
+                    self.metrics.retry("graphql", "error")
+                    self.metrics.waited("retry", 5)
+                    time.sleep(5)  # Short delay before retrying
+                else:
+                    print(
+                        f"❌ GraphQL request failed after {max_retries} attempts. Exiting."
+                    )
+                    exit(1)  # Exit with error
+
+        return None
+
+    def page_url(self, url, page):
+        """Returns the URL of one page (100 items) of a paginated endpoint."""
+        separator = "&" if "?" in url else "?"
+        return f"{url}{separator}per_page=100&page={page}"
+
+    def last_page(self, response):
+        """Returns the page number of the response's Link rel="last" (None on the last page)."""
+        match = re.search(r'<([^>]+)>;\s*rel="last"', response.headers.get("Link", ""))
+        if not match:
+            return None
+        return int(parse_qs(urlparse(match.group(1)).query)["page"][0])
+
+    def iter_pages(
+        self, url, headers=None, start_page=1, max_workers=None, prefetch=True
+    ):
+        """Yields (page, items) of a paginated endpoint in page order.
+
+        The Link rel="last" header of the first page gives the number of pages, so
+        the remaining pages are fetched concurrently (at most `max_workers` at a
+        time) and no request is spent on an empty page past the end. Callers that
+        may stop early pass `prefetch=False` to fetch each page only when needed.
+        """
+        response = self.github_api_request(
+            url=self.page_url(url, start_page), headers=headers
+        )
+        if response.status_code != 200:
+            print(f"❌ Error fetching paginated items ({response.status_code}): {url}")
+            return
+        last_page = self.last_page(response) or start_page
+        listing = url[len(self.url) :].split("?")[0]  # e.g. apache/kafka/forks
+        try:
+            self.progress.page_done(listing, start_page, last_page)
+            yield start_page, response.json()
+            if last_page <= start_page:
+                return
+
+            if not prefetch:
+                for page in range(start_page + 1, last_page + 1):
+                    response = self.github_api_request(
+                        url=self.page_url(url, page), headers=headers
+                    )
+                    if response.status_code != 200:
+                        print(
+                            f"❌ Error fetching page {page} of paginated items ({response.status_code}): {url}"
+                        )
+                        return
+                    self.progress.page_done(listing, page, last_page)
+                    yield page, response.json()
+                return
+
+            max_workers = max_workers or self.page_workers
+            pages = iter(range(start_page + 1, last_page + 1))
+            pending = deque()
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+
+            def submit_next():
+                page = next(pages, None)
+                if page is not None:
+                    pending.append(
+                        (
+                            page,
+                            executor.submit(
+                                self.github_api_request,
+                                url=self.page_url(url, page),
+                                headers=headers,
+                            ),
+                        )
+                    )
+
+            try:
+                for _ in range(max_workers):
+                    submit_next()
+                while pending:
+                    page, future = pending.popleft()
+                    response = future.result()
+                    submit_next()
+                    if response.status_code != 200:
+                        print(
+                            f"❌ Error fetching page {page} of paginated items ({response.status_code}): {url}"
+                        )
+                        return
+                    self.progress.page_done(listing, page, last_page)
+                    yield page, response.json()
+            finally:
+                # Stop prefetching when the caller stops early
+                for _, future in pending:
+                    future.cancel()
+                executor.shutdown(wait=True)
+        finally:
+            self.progress.listing_done(listing)
+
+    def iter_paginated_items(self, url, headers=None):
+        """Streams all paginated results from GitHub API, one item at a time."""
+        for _, data in self.iter_pages(url, headers=headers):
+            for item in data:
+                yield item
+
     def get_all_paginated_items(self, url, headers=None):
         """Fetches all paginated results from GitHub API."""
-        items = []
-        page = 1
-        while True:
-            paginated_url = f"{url}?per_page=100&page={page}"
-            response = self.github_api_request(url=paginated_url, headers=headers)
-
-            if response.status_code == 200:
-                data = response.json()
-                if not data:
-                    break
-                items.extend(data)
-                if len(data) < 100:  # No more pages
-                    break
-                page += 1
-            else:
-                print(f"❌ Error fetching paginated items: {response.status_code}")
-                break
-        return items
+        return list(self.iter_paginated_items(url, headers=headers))
 
     def save_output(self, data, csv_path):
-        """Saves data to CSV, appending if file exists."""
-        # Check if the output file already exists
-        file_exists = os.path.exists(csv_path)
-
-        # Convert data to DataFrame and save to CSV
-        df = pd.DataFrame(data)
-        df.to_csv(
-            csv_path,
-            mode="a",
-            header=not file_exists,
-            index=False,
-            quoting=csv.QUOTE_ALL,
-        )
+        """Saves data to the output table, appending if it exists (buffered until the next flush)."""
+        self.sink.write(data, csv_path)
+        self.progress.add_rows(len(data))
         return True
 
+    def save_checkpoint(self, resume_log_path, items, next_page=None):
+        """Writes this job's rows to disk, then records `items` as completed (or resumable at `next_page`)."""
+        task = self.checkpoints.task_of(resume_log_path)
+        items = items if isinstance(items, list) else [items]
+        self.sink.checkpoint(
+            lambda offsets, parts: self.checkpoints.record(
+                task, items, next_page, offsets, parts
+            )
+        )
+        if next_page is None:
+            self.progress.item_done(len(items))
+
+    def resume_point(self, resume_log_path, item, page=None):
+        """Returns the page to start an item at, read from the checkpoint store (None: completed).
+
+        The store is ahead of `page` (the page the item was queued or listed
+        with) when another process worked on it since, e.g. a worker whose job
+        lease ran out or a shard whose repo was taken over.
+        """
+        next_page, completed = self.checkpoints.get(
+            self.checkpoints.task_of(resume_log_path), item
+        )
+        if completed:
+            self.progress.item_done()
+            return None
+        return max(next_page or 1, page or 1)
+
+    def restore_output(self, csv_path):
+        """Cuts off rows that this process saved to a table after its last checkpoint."""
+        path = self.storage.writer_path(csv_path)
+        self.storage.truncate(
+            csv_path, self.checkpoints.offsets().get(path), self.checkpoints.parts(path)
+        )
+
+    def close(self):
+        """Flushes buffered output and writes the final metrics at the end of a collection."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sink.close()
+        finally:
+            self.checkpoints.close()
+            self.progress.close()
+            if self.metrics_exporter:
+                self.metrics_exporter.stop()
+
     def get_repo_data(self, repo_owner, repo_name, repo_csv_path, missing_csv_path):
         """Get repository general information and save to CSV."""
         # Get general repository information
@@ -119,6 +587,7 @@ class API:
         if repo_response.status_code == 404:
             # Save missing repo information
             self.save_output([{"repo_name": repo_name}], missing_csv_path)
+            self.progress.item_done()
             print(f"❌ Repository {repo_owner}/{repo_name} not found. Skipping...")
 
         elif repo_response.status_code == 200:
@@ -140,57 +609,104 @@ class API:
 
             # Save repo information
             self.save_output([repo_info], repo_csv_path)
-            print(
+            self.progress.item_done()
+            self.progress.log(
                 f"✅ Repository {repo_owner}/{repo_name} information saved to {repo_csv_path}"
             )
 
-    def get_fork_data(self, repo_id, repo_owner, repo_name, fork_csv_path):
-        """Get fork information and save to CSV."""
-        page = 1
-        while True:
-            fork_url = (
-                self.url + f"{repo_owner}/{repo_name}/forks?per_page=100&page={page}"
+        else:
+            self.progress.item_done()
+            print(
+                f"❌ Repository {repo_owner}/{repo_name} is not accessible ({repo_response.status_code}). Skipping..."
             )
-            fork_response = self.github_api_request(fork_url)
-
-            if fork_response.status_code == 404:
-                print(
-                    f"❌ Forks of repository {repo_owner}/{repo_name} not found. Skipping..."
-                )
-                break
-
-            elif fork_response.status_code == 200:
-                forks_data = fork_response.json()
 
-                if not forks_data:  # If the page is empty, break the loop
-                    break
-
-                # Extract fork information
-                for fork in forks_data:
-                    fork_info = {
-                        "repo_id": repo_id,
-                        "repo_owner": repo_owner,
-                        "repo_name": repo_name,
-                        "fork_id": fork["id"],
-                        "fork_owner": fork["owner"]["login"],
-                        "fork_owner_id": fork["owner"]["id"],
-                        "fork_name": fork["name"],
-                        "fork_default_branch": fork["default_branch"],
-                        "fork_created_at": fork["created_at"],
-                        "fork_url": fork["html_url"],
-                    }
-
-                    self.save_output([fork_info], fork_csv_path)
-
-                    print(
-                        f"✅ Fork {fork['owner']['login']}/{fork['name']} of Repository {repo_owner}/{repo_name} information saved to {fork_csv_path}"
-                    )
+    def get_repo_data_batch(
+        self, repo_owner, repo_names, repo_csv_path, missing_csv_path
+    ):
+        """Get general information of several repositories with one GraphQL query and save to CSV."""
+        query = repository_batch_query(
+            [(repo_owner, repo_name) for repo_name in repo_names], REPOSITORY_FIELDS
+        )
+        data = self.github_graphql_request(query)
+
+        repos = []
+        missing_repos = []
+        for i, repo_name in enumerate(repo_names):
+            repo_data = data.get(f"r{i}")
+            if repo_data is None:
+                missing_repos.append({"repo_name": repo_name})
+                print(f"❌ Repository {repo_owner}/{repo_name} not found. Skipping...")
+                continue
+
+            repos.append(
+                {
+                    "repo_id": repo_data["databaseId"],
+                    "repo_owner": repo_data["owner"]["login"],
+                    "repo_name": repo_data["name"],
+                    "created_at": repo_data["createdAt"],
+                    "project_size": repo_data["diskUsage"],
+                    "num_forks": repo_data["forkCount"],
+                    "num_stars": repo_data["stargazerCount"],
+                    "default_branch": (repo_data["defaultBranchRef"] or {}).get("name"),
+                    "last_update": repo_data["updatedAt"],
+                    "is_archived": repo_data["isArchived"],
+                    "repo_url": repo_data["url"],
+                }
+            )
 
-                if len(forks_data) < 100:  # No more pages
-                    break
+        # Save missing and found repo information
+        if missing_repos:
+            self.save_output(missing_repos, missing_csv_path)
+        if repos:
+            self.save_output(repos, repo_csv_path)
+        self.progress.item_done(len(repo_names))
+        self.progress.log(
+            f"✅ {len(repos)} of {len(repo_names)} repositories information saved to {repo_csv_path}"
+        )
 
-            page += 1
-            time.sleep(0.1)  # Avoid hitting concurrent request limit
+    def get_fork_data(
+        self,
+        repo_id,
+        repo_owner,
+        repo_name,
+        fork_csv_path,
+        resume_log_path,
+        last_processed_page=None,
+    ):
+        """Get fork information and save to CSV."""
+        fork_url = self.url + f"{repo_owner}/{repo_name}/forks"
+        start_page = self.resume_point(resume_log_path, repo_id, last_processed_page)
+        if start_page is None:  # Completed since it was queued
+            return
+        for page, forks_data in self.iter_pages(fork_url, start_page=start_page):
+            # Extract fork information
+            forks = []
+            for fork in forks_data:
+                fork_info = {
+                    "repo_id": repo_id,
+                    "repo_owner": repo_owner,
+                    "repo_name": repo_name,
+                    "fork_id": fork["id"],
+                    "fork_owner": fork["owner"]["login"],
+                    "fork_owner_id": fork["owner"]["id"],
+                    "fork_name": fork["name"],
+                    "fork_default_branch": fork["default_branch"],
+                    "fork_created_at": fork["created_at"],
+                    "fork_url": fork["html_url"],
+                    "fork_pushed_at": fork["pushed_at"],
+                    "fork_updated_at": fork["updated_at"],
+                    "fork_size": fork["size"],
+                }
+                forks.append(fork_info)
+
+            if forks:
+                self.save_output(forks, fork_csv_path)
+            self.save_checkpoint(resume_log_path, repo_id, next_page=page + 1)
+
+        self.save_checkpoint(resume_log_path, repo_id)
+        self.progress.log(
+            f"🚀 Finished processing forks of Repository {repo_owner}/{repo_name}"
+        )
 
     def get_repo_commit_data(
         self,
@@ -200,80 +716,79 @@ class API:
         repo_commit_csv_path,
         resume_log_path,
         last_processed_page=None,
+        since=None,
+        until=None,
+        incremental=False,
     ):
-        """Get commit information of repository and save to CSV."""
-        page = last_processed_page if last_processed_page else 1
-        while True:
-            commits_url = (
-                self.url + f"{repo_owner}/{repo_name}/commits?per_page=100&page={page}"
-            )
-            commits_response = self.github_api_request(commits_url)
+        """Get commit information of repository and save to CSV.
+
+        `since`/`until` (ISO 8601) restrict the commits to an analysis window. With
+        `incremental`, the newest commit of every run is remembered per repo in
+        the checkpoint store and the next run stops paging when it reaches that
+        commit.
+        """
+        params = [f"{key}={value}" for key, value in [("since", since), ("until", until)] if value]
+        commits_url = self.url + f"{repo_owner}/{repo_name}/commits"
+        if params:
+            commits_url += "?" + "&".join(params)
+        start_page = self.resume_point(resume_log_path, repo_id, last_processed_page)
+        if start_page is None:  # Completed since it was queued
+            return
 
-            if commits_response.status_code == 404:
-                print(
-                    f"❌ Commits of repository {repo_owner}/{repo_name} not found. Skipping..."
-                )
-                break
+        # Newest commit of the last completed run, and of this run once page 1 is seen
+        known_sha = self.checkpoints.commit_sha(repo_id) if incremental else None
 
-            elif commits_response.status_code == 200:
-                commits_data = commits_response.json()
+        for page, commits_data in self.iter_pages(
+            commits_url, start_page=start_page, prefetch=not known_sha
+        ):
+            if page == 1 and commits_data and incremental:
+                self.checkpoints.save_commit_state(
+                    repo_id, pending_sha=commits_data[0]["sha"]
+                )
 
-                if not commits_data:  # If the page is empty, break the loop
-                    with open(resume_log_path, "w") as f:
-                        f.write(f"{repo_id},{page}")
+            # Extract commit information
+            commits = []
+            reached_known = False
+            for commit in commits_data:
+                commit_sha = commit["sha"]
+                if commit_sha == known_sha:
+                    reached_known = True  # Everything older was collected before
                     break
 
-                # Extract fork information
-                commits = []
-                for commit in commits_data:
-                    commit_sha = commit["sha"]
-
-                    # # Check the detail of the commit
-                    # commit_url = (
-                    #     self.url + f"{repo_owner}/{repo_name}/commits/{commit_sha}"
-                    # )
-                    # commit_response = self.github_api_request(commit_url)
-
-                    # if commit_response.status_code == 200:
-                    #     commit_data = commit_response.json()
-
-                    commit_info = {
-                        "repo_id": repo_id,
-                        "repo_owner": repo_owner,
-                        "repo_name": repo_name,
-                        "commit_sha": commit_sha,
-                        "commit_author": (commit.get("author") or {}).get(
-                            "login", "unknown"
-                        ),
-                        "commit_author_id": (commit.get("author") or {}).get(
-                            "id", "unknown"
-                        ),
-                        "commit_size": 0,#commit_data.get("stats", {}).get(
-                        #    "total", 0
-                        #),  # (TODO): Should we keep it or delete it to save requests?
-                        "commit_created_at": commit["commit"]["author"]["date"],
-                        "commit_pushed_at": commit["commit"]["committer"]["date"],
-                    }
-                    commits.append(commit_info)
-
+                commit_info = {
+                    "repo_id": repo_id,
+                    "repo_owner": repo_owner,
+                    "repo_name": repo_name,
+                    "commit_sha": commit_sha,
+                    "commit_author": (commit.get("author") or {}).get(
+                        "login", "unknown"
+                    ),
+                    "commit_author_id": (commit.get("author") or {}).get(
+                        "id", "unknown"
+                    ),
+                    # Filled in from the local git mirror by get_commit_stats (choice 9)
+                    "commit_size": 0,
+                    "commit_created_at": commit["commit"]["author"]["date"],
+                    "commit_pushed_at": commit["commit"]["committer"]["date"],
+                }
+                commits.append(commit_info)
+
+            if commits:
                 self.save_output(commits, repo_commit_csv_path)
-
-                print(
+                self.progress.log(
                     f"✅ Page {page} of {repo_owner}/{repo_name} saved to {repo_commit_csv_path}"
                 )
 
-                if len(commits) < 100:  # No more pages
-                    with open(resume_log_path, "w") as f:
-                        f.write(f"{repo_id},{page + 1}")
-                    break
+            self.save_checkpoint(resume_log_path, repo_id, next_page=page + 1)
 
-            page += 1
-            with open(resume_log_path, "w") as f:
-                f.write(f"{repo_id},{page}")
+            if reached_known:
+                break
 
-            time.sleep(0.1)  # Avoid hitting concurrent request limit
+        self.save_checkpoint(resume_log_path, repo_id)
+        if incremental:
+            self.checkpoints.save_commit_state(repo_id, completed=True)
 
-        print(f"🚀 Finished processing commits of {repo_owner}/{repo_name}")
+        self.progress.log(f"🚀 Finished processing commits of {repo_owner}/{repo_name}")
 
     def get_fork_commit_data(
         self,
@@ -289,6 +804,8 @@ class API:
         resume_log_path,
     ):
         """Get fork commit information that is NOT in the main repository and save to CSV."""
+        if self.resume_point(resume_log_path, fork_id) is None:
+            return  # Completed since it was queued
         compare_url = (
             self.url
             + f"{repo_owner}/{repo_name}/compare/{repo_default_branch}...{fork_owner}:{fork_default_branch}"
@@ -304,12 +821,11 @@ class API:
             print(
                 f"❌ Error fetching compare data for {fork_owner}/{fork_name} (Error Code: {compare_response.status_code}). Skipping..."
             )
+            self.progress.item_done()  # Skipped, not checkpointed
             return
 
-        if not fork_commits:
-            print(
-                f"❗ No unique commits found in fork {fork_owner}/{fork_name}. Skipping..."
-            )
+        if not fork_commits:  # No unique commits in the fork
+            self.save_checkpoint(resume_log_path, fork_id)
             return
 
         # Process fork commits
@@ -337,108 +853,323 @@ class API:
                 "commit_pushed_at": commit["commit"]["committer"]["date"],
             }
             self.save_output([commit_info], fork_commit_csv_path)
+
+        # Save progress
+        self.save_checkpoint(resume_log_path, fork_id)
+
+    def get_fork_commit_data_git(
+        self,
+        repo_id,
+        repo_owner,
+        repo_name,
+        repo_default_branch,
+        fork_id,
+        fork_owner,
+        fork_name,
+        fork_default_branch,
+        fork_commit_csv_path,
+        resume_log_path,
+    ):
+        """Get fork commits that are NOT in the main repository from a local git mirror and save to CSV.
+
+        Unlike the compare API, this needs no API request and is not capped at
+        250 commits. Commit authors are only known for GitHub noreply addresses.
+        """
+        if self.resume_point(resume_log_path, fork_id) is None:
+            return  # Completed since it was queued
+        try:
+            fork_commits = self.git_mirror.fork_commits(
+                repo_owner,
+                repo_name,
+                repo_default_branch,
+                fork_id,
+                fork_owner,
+                fork_name,
+                fork_default_branch,
+            )
+        except GitError as e:
             print(
-                f"✅ Commit {commit_sha} of fork {fork_owner}/{fork_name} saved to {fork_commit_csv_path}"
+                f"❌ Error fetching fork {fork_owner}/{fork_name} into the mirror of {repo_owner}/{repo_name} ({e}). Skipping..."
             )
+            self.progress.item_done()  # Skipped, not checkpointed
+            return
 
-        # Save progress
-        with open(resume_log_path, "w") as f:
-            f.write(str(fork_id))
+        if not fork_commits:  # No unique commits in the fork
+            self.save_checkpoint(resume_log_path, fork_id)
+            return
 
-        print(f"🚀 Finished processing commits of {fork_owner}/{fork_name}")
+        commits = []
+        for commit in fork_commits:
+            commit_author, commit_author_id = author_of(commit["email"])
+            commits.append(
+                {
+                    "repo_id": repo_id,
+                    "fork_id": fork_id,
+                    "fork_owner": fork_owner,
+                    "fork_name": fork_name,
+                    "commit_sha": commit["sha"],
+                    "commit_author": commit_author,
+                    "commit_author_id": commit_author_id,
+                    "commit_created_at": commit["authored_at"],
+                    "commit_pushed_at": commit["committed_at"],
+                }
+            )
+        self.save_output(commits, fork_commit_csv_path)
+        self.save_checkpoint(resume_log_path, fork_id)
 
-    def get_repo_pr_data(
+    def get_commit_stats(
         self,
         repo_id,
         repo_owner,
         repo_name,
-        repo_pr_csv_path,
+        repo_default_branch,
+        forks,
+        commit_stats_csv_path,
         resume_log_path,
-        last_processed_page=None,
     ):
-        """Get PR information of repository and save to CSV."""
-        page = last_processed_page if last_processed_page else 1
-        while True:
-            pr_url = (
-                self.url
-                + f"{repo_owner}/{repo_name}/pulls?state=all&per_page=100&page={page}"
+        """Get the lines added/deleted by every commit of a repository and its forks from a local git mirror and save to CSV.
+
+        `forks` lists the (fork_id, fork_owner, fork_name, fork_default_branch)
+        of the forks with commits of their own; the ones not in the mirror yet
+        are fetched first. One `git log --numstat` pass then covers the repo
+        and all of its forks, without any API request.
+        """
+        if self.resume_point(resume_log_path, repo_id) is None:
+            return  # Completed since it was queued
+        try:
+            git_dir = self.git_mirror.mirror(repo_owner, repo_name, repo_default_branch)
+            fetched = self.git_mirror.fork_refs(git_dir)
+        except GitError as e:
+            print(
+                f"❌ Error fetching {repo_owner}/{repo_name} into its mirror ({e}). Skipping..."
             )
-            pr_response = self.github_api_request(pr_url)
+            self.progress.item_done()
+            return
 
-            if pr_response.status_code == 404:
+        for fork_id, fork_owner, fork_name, fork_default_branch in forks:
+            if str(fork_id) in fetched:
+                continue
+            try:
+                self.git_mirror.fetch(
+                    git_dir,
+                    self.git_mirror.url(fork_owner, fork_name),
+                    fork_default_branch,
+                    f"refs/forks/{fork_id}",
+                )
+            except GitError as e:
                 print(
-                    f"❌ PRs of repository {repo_owner}/{repo_name} not found. Skipping..."
+                    f"❗ Could not fetch fork {fork_owner}/{fork_name} ({e}), its commits get no size"
                 )
-                break
 
-            elif pr_response.status_code == 200:
-                pr_data = pr_response.json()
+        stats = []
+        try:
+            for commit_sha, additions, deletions in commit_stats(git_dir):
+                stats.append(
+                    {
+                        "repo_id": repo_id,
+                        "commit_sha": commit_sha,
+                        "commit_additions": additions,
+                        "commit_deletions": deletions,
+                        "commit_size": additions + deletions,
+                    }
+                )
+        except GitError as e:
+            print(f"❌ Error reading the commits of {repo_owner}/{repo_name} ({e}). Skipping...")
+            self.progress.item_done()
+            return
 
-                if not pr_data:  # If the page is empty, break the loop
-                    with open(resume_log_path, "w") as f:
-                        f.write(f"{repo_id},{page}")
-                    break
+        self.save_output(stats, commit_stats_csv_path)
+        self.save_checkpoint(resume_log_path, repo_id)
 
-                prs = []
-                for pr in pr_data:
-                    pr_number = pr["number"]
+        self.progress.log(
+            f"🚀 Saved the size of {len(stats)} commits of {repo_owner}/{repo_name} and its forks to {commit_stats_csv_path}"
+        )
 
-                    # Get all commits in the PR
-                    commits_url = (
-                        self.url + f"{repo_owner}/{repo_name}/pulls/{pr_number}/commits"
-                    )
-                    commits_data = self.get_all_paginated_items(commits_url, None)
-                    commits = [commit["sha"] for commit in commits_data]
+    def get_repo_pr_data(
+        self,
+        repo_id,
+        repo_owner,
+        repo_name,
+        repo_pr_csv_path,
+        resume_log_path,
+        last_processed_page=None,
+    ):
+        """Get PR information of repository and save to CSV."""
+        pr_url = self.url + f"{repo_owner}/{repo_name}/pulls?state=all"
+        start_page = self.resume_point(resume_log_path, repo_id, last_processed_page)
+        if start_page is None:  # Completed since it was queued
+            return
+        for page, pr_data in self.iter_pages(pr_url, start_page=start_page):
+            prs = []
+            for pr in pr_data:
+                pr_number = pr["number"]
+
+                # Get all commits in the PR
+                commits_url = (
+                    self.url + f"{repo_owner}/{repo_name}/pulls/{pr_number}/commits"
+                )
+                commits_data = self.get_all_paginated_items(commits_url, None)
+                commits = [commit["sha"] for commit in commits_data]
 
-                    # Get all review comments in the PR
-                    comments_url = (
-                        self.url
-                        + f"{repo_owner}/{repo_name}/pulls/{pr_number}/comments"
-                    )
-                    comments_data = self.get_all_paginated_items(comments_url, None)
-                    comments = [comment["body"] for comment in comments_data]
-
-                    # Replace newline characters within each comment
-                    cleaned_comments = [
-                        comment.replace("\n", " ") for comment in comments
-                    ]
-                    # Join the list into a single string with '||' as a delimiter
-                    cleaned_comments_str = "||".join(cleaned_comments)
-
-                    # Extract PR information
-                    pr_info = {
-                        "repo_id": repo_id,
-                        "repo_owner": repo_owner,
-                        "repo_name": repo_name,
-                        "pr_id": pr["id"],
-                        "pr_number": pr_number,
-                        "pr_associated_commits": commits,
-                        "pr_created_at": pr["created_at"],
-                        "pr_state": pr["state"],
-                        "pr_merged_at": pr["merged_at"],
-                        "pr_closed_at": pr["closed_at"],
-                        "pr_review_comments": cleaned_comments_str,
-                    }
+                # Get all review comments in the PR
+                comments_url = (
+                    self.url + f"{repo_owner}/{repo_name}/pulls/{pr_number}/comments"
+                )
+                comments_data = self.get_all_paginated_items(comments_url, None)
+                comments = [comment["body"] for comment in comments_data]
+
+                # Replace newline characters within each comment
+                cleaned_comments = [comment.replace("\n", " ") for comment in comments]
+                # Join the list into a single string with '||' as a delimiter
+                cleaned_comments_str = "||".join(cleaned_comments)
+
+                # Extract PR information
+                pr_info = {
+                    "repo_id": repo_id,
+                    "repo_owner": repo_owner,
+                    "repo_name": repo_name,
+                    "pr_id": pr["id"],
+                    "pr_number": pr_number,
+                    "pr_associated_commits": commits,
+                    "pr_created_at": pr["created_at"],
+                    "pr_state": pr["state"],
+                    "pr_merged_at": pr["merged_at"],
+                    "pr_closed_at": pr["closed_at"],
+                    "pr_review_comments": cleaned_comments_str,
+                }
+
+                prs.append(pr_info)
+
+            if prs:
+                self.save_output(prs, repo_pr_csv_path)
+                self.progress.log(
+                    f"✅ Page {page} of {repo_owner}/{repo_name} saved to {repo_pr_csv_path}"
+                )
+
+            self.save_checkpoint(resume_log_path, repo_id, next_page=page + 1)
+
+        self.save_checkpoint(resume_log_path, repo_id)
 
-                    prs.append(pr_info)
+        self.progress.log(f"🚀 Finished processing PRs of {repo_owner}/{repo_name}")
+
+    def get_repo_pr_data_bulk(
+        self,
+        repo_id,
+        repo_owner,
+        repo_name,
+        repo_pr_csv_path,
+        resume_log_path,
+        last_processed_page=None,
+    ):
+        """Get PR information of repository without per-PR requests and save to CSV.
+
+        Review comments come from the repo-wide comment listing and are grouped by
+        PR locally; commit lists come from batched GraphQL queries. PRs with more
+        than 100 commits fall back to the REST commit listing. The comments are
+        kept in the checkpoint store until the repo is completed, so a resumed
+        repo only lists the comments created or edited since (`since`).
+        """
+        start_page = self.resume_point(resume_log_path, repo_id, last_processed_page)
+        if start_page is None:  # Completed since it was queued
+            return
 
+        # Get all review comments of the repository, grouped by PR number
+        task = self.checkpoints.task_of(resume_log_path)
+        listed_at, comments = self.checkpoints.load_comments(task, repo_id)
+        comments_url = (
+            self.url
+            + f"{repo_owner}/{repo_name}/pulls/comments?sort=created&direction=asc"
+            + (f"&since={listed_at}" if listed_at else "")
+        )
+        # A few minutes early, so edits are not missed through clock skew
+        listing_started = time.strftime(
+            "%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - 300)
+        )
+        new_comments = [
+            (
+                comment["id"],
+                int(comment["pull_request_url"].rsplit("/", 1)[1]),
+                comment["body"],
+            )
+            for comment in self.iter_paginated_items(comments_url)
+        ]
+        self.checkpoints.save_comments(task, repo_id, new_comments, listing_started)
+        comments.update(
+            (comment_id, (pr_number, body))
+            for comment_id, pr_number, body in new_comments
+        )
+        comments_by_pr = {}
+        for comment_id in sorted(comments):  # Ids grow with the creation time
+            pr_number, body = comments[comment_id]
+            comments_by_pr.setdefault(pr_number, []).append(body)
+
+        pr_url = self.url + f"{repo_owner}/{repo_name}/pulls?state=all"
+        for page, pr_data in self.iter_pages(pr_url, start_page=start_page):
+            # Get the commits of all PRs of the page with a few GraphQL queries
+            commits_by_pr = {}
+            pr_numbers = [pr["number"] for pr in pr_data]
+            for batch in chunks(pr_numbers, self.graphql_batch_size):
+                data = self.github_graphql_request(
+                    pull_request_commits_query(repo_owner, repo_name, batch)
+                )
+                repository = (data or {}).get("repository") or {}
+                for i, pr_number in enumerate(batch):
+                    commits_data = (repository.get(f"p{i}") or {}).get("commits")
+                    if commits_data and commits_data["totalCount"] <= 100:
+                        commits_by_pr[pr_number] = [
+                            node["commit"]["oid"] for node in commits_data["nodes"]
+                        ]
+                    else:
+                        commits_url = (
+                            self.url
+                            + f"{repo_owner}/{repo_name}/pulls/{pr_number}/commits"
+                        )
+                        commits_by_pr[pr_number] = [
+                            commit["sha"]
+                            for commit in self.get_all_paginated_items(commits_url)
+                        ]
+
+            prs = []
+            for pr in pr_data:
+                pr_number = pr["number"]
+
+                # Replace newline characters within each comment
+                cleaned_comments = [
+                    comment.replace("\n", " ")
+                    for comment in comments_by_pr.get(pr_number, [])
+                ]
+                # Join the list into a single string with '||' as a delimiter
+                cleaned_comments_str = "||".join(cleaned_comments)
+
+                # Extract PR information
+                pr_info = {
+                    "repo_id": repo_id,
+                    "repo_owner": repo_owner,
+                    "repo_name": repo_name,
+                    "pr_id": pr["id"],
+                    "pr_number": pr_number,
+                    "pr_associated_commits": commits_by_pr[pr_number],
+                    "pr_created_at": pr["created_at"],
+                    "pr_state": pr["state"],
+                    "pr_merged_at": pr["merged_at"],
+                    "pr_closed_at": pr["closed_at"],
+                    "pr_review_comments": cleaned_comments_str,
+                }
+
+                prs.append(pr_info)
+
+            if prs:
                 self.save_output(prs, repo_pr_csv_path)
-                print(
+                self.progress.log(
                     f"✅ Page {page} of {repo_owner}/{repo_name} saved to {repo_pr_csv_path}"
                 )
 
-                if len(prs) < 100:  # No more pages
-                    with open(resume_log_path, "w") as f:
-                        f.write(f"{repo_id},{page + 1}")
-                    break
-
-                page += 1
-                with open(resume_log_path, "w") as f:
-                    f.write(f"{repo_id},{page}")
+            self.save_checkpoint(resume_log_path, repo_id, next_page=page + 1)
 
-                time.sleep(0.1)
+        self.save_checkpoint(resume_log_path, repo_id)
+        self.checkpoints.clear_comments(task, repo_id)
 
-        print(f"🚀 Finished processing PRs of {repo_owner}/{repo_name}")
+        self.progress.log(f"🚀 Finished processing PRs of {repo_owner}/{repo_name}")
 
     def get_fork_pr_data(
         self,
@@ -450,6 +1181,8 @@ class API:
         resume_log_path,
     ):
         """Get PR information of fork and save to CSV."""
+        if self.resume_point(resume_log_path, fork_id) is None:
+            return  # Completed since it was queued
         pr_url = self.url + f"{fork_owner}/{fork_name}/pulls?state=all"
         pr_response = self.github_api_request(pr_url)
 
@@ -460,6 +1193,13 @@ class API:
         elif pr_response.status_code == 404:
             has_more_than_two_pr = False
 
+        else:  # Blocked fork: skip it without a row
+            print(
+                f"❌ PRs of fork {fork_owner}/{fork_name} are not accessible ({pr_response.status_code}). Skipping..."
+            )
+            self.save_checkpoint(resume_log_path, fork_id)
+            return
+
         # Extract PR information
         pr_info = {
             "repo_id": repo_id,
@@ -472,11 +1212,44 @@ class API:
         self.save_output([pr_info], fork_pr_csv_path)
 
         # Save progress
-        with open(resume_log_path, "w") as f:
-            f.write(str(fork_id))
+        self.save_checkpoint(resume_log_path, fork_id)
 
-        print(
-            f"🚀 Finished processing PRs of fork {fork_id} of {fork_owner}/{fork_name}"
+    def get_fork_pr_data_batch(self, forks, fork_pr_csv_path, resume_log_path):
+        """Get PR information of several forks with one GraphQL query and save to CSV.
+
+        `forks` is a list of (repo_id, fork_id, fork_owner, fork_name) tuples. Only the
+        number of PRs of each fork is requested; deleted forks count as having none.
+        """
+        forks = [fork for fork in forks if self.resume_point(resume_log_path, fork[1])]
+        if not forks:  # Completed since they were queued
+            return
+        query = repository_batch_query(
+            [(fork_owner, fork_name) for _, _, fork_owner, fork_name in forks],
+            PULL_REQUEST_COUNT_FIELDS,
+        )
+        data = self.github_graphql_request(query) or {}
+
+        prs = []
+        for i, (repo_id, fork_id, fork_owner, fork_name) in enumerate(forks):
+            fork_data = data.get(f"r{i}")
+            num_prs = fork_data["pullRequests"]["totalCount"] if fork_data else 0
+            prs.append(
+                {
+                    "repo_id": repo_id,
+                    "fork_id": fork_id,
+                    "fork_owner": fork_owner,
+                    "fork_name": fork_name,
+                    "has_more_than_two_pr": num_prs >= 2,
+                }
+            )
+
+        self.save_output(prs, fork_pr_csv_path)
+
+        # Save progress
+        self.save_checkpoint(resume_log_path, [fork_id for _, fork_id, _, _ in forks])
+
+        self.progress.log(
+            f"🚀 Finished processing PRs of {len(forks)} forks (up to fork {forks[-1][1]})"
         )
 
     def get_star_data(
@@ -489,59 +1262,179 @@ class API:
         last_processed_page,
     ):
         """Get stars information of repository and save to CSV."""
-        page = last_processed_page if last_processed_page else 1
-        while True:
-            stargazers_url = (
-                self.url
-                + f"{repo_owner}/{repo_name}/stargazers?per_page=100&page={page}"
-            )
-            headers = {
-                "Authorization": f"token {self.token}",
-                "Accept": "application/vnd.github.star+json",
-            }
-            stargazers_response = self.github_api_request(
-                url=stargazers_url, headers=headers
-            )
+        stargazers_url = self.url + f"{repo_owner}/{repo_name}/stargazers"
+        headers = {"Accept": "application/vnd.github.star+json"}
+        start_page = self.resume_point(resume_log_path, repo_id, last_processed_page)
+        if start_page is None:  # Completed since it was queued
+            return
+        for page, stargazers_data in self.iter_pages(
+            stargazers_url, headers=headers, start_page=start_page
+        ):
+            # Extract star information
+            stars = []
+            for star in stargazers_data:
+                star_info = {
+                    "repo_id": repo_id,
+                    "repo_owner": repo_owner,
+                    "repo_name": repo_name,
+                    "star_id": star["user"]["id"],
+                    "star_login": star["user"]["login"],
+                    "starred_at": star["starred_at"],
+                }
+                stars.append(star_info)
+
+            if stars:
+                self.save_output(stars, star_csv_path)
+                self.progress.log(
+                    f"✅ Page {page} of Repository {repo_owner}/{repo_name} information saved to {star_csv_path}"
+                )
 
-            if stargazers_response.status_code == 200:
-                stargazers_data = stargazers_response.json()
+            self.save_checkpoint(resume_log_path, repo_id, next_page=page + 1)
 
-                if not stargazers_data:  # If the page is empty, break the loop
-                    with open(resume_log_path, "w") as f:
-                        f.write(f"{repo_id},{page}")
-                    break
+        self.save_checkpoint(resume_log_path, repo_id)
 
-                # Extract release information
-                stars = []
-                for star in stargazers_data:
-                    star_info = {
-                        "repo_id": repo_id,
-                        "repo_owner": repo_owner,
-                        "repo_name": repo_name,
-                        "star_id": star["user"]["id"],
-                        "star_login": star["user"]["login"],
-                        "starred_at": star["starred_at"],
-                    }
-                    stars.append(star_info)
-
-                self.save_output(stars, star_csv_path)
+        self.progress.log(
+            f"🚀 Finished processing Stars of Repository {repo_owner}/{repo_name}"
+        )
 
+    def get_star_count_data(
+        self,
+        repo_id,
+        repo_owner,
+        repo_name,
+        years,
+        star_count_csv_path,
+        resume_log_path=None,
+        num_stars=None,
+    ):
+        """Get the number of stars per year of repository and save to CSV.
+
+        Stargazers are listed oldest first, so the position of a date in the
+        listing is found by binary search over the pages. Only the pages that
+        straddle a year boundary are fetched instead of every stargazer.
+        The listing ends at page 400, so for repos with more stars (`num_stars`)
+        the boundaries after its last star are found by counting back from the
+        newest star over GraphQL; counts that cannot be found are left empty.
+        """
+        if resume_log_path and self.resume_point(resume_log_path, repo_id) is None:
+            return  # Completed since it was queued
+        stargazers_url = self.url + f"{repo_owner}/{repo_name}/stargazers"
+        headers = {"Accept": "application/vnd.github.star+json"}
+        pages = {}
+
+        def fetch(page):
+            if page not in pages:
+                response = self.github_api_request(
+                    url=self.page_url(stargazers_url, page), headers=headers
+                )
+                pages[page] = response.json() if response.status_code == 200 else []
+                if page == 1:
+                    pages["last"] = self.last_page(response) or 1
+                    pages["status"] = response.status_code
+            return pages[page]
+
+        fetch(1)
+        if pages["status"] != 200:  # Deleted or blocked repo
+            print(
+                f"❌ Stargazers of {repo_owner}/{repo_name} are not accessible ({pages['status']}). Skipping..."
+            )
+            if resume_log_path:
+                self.save_checkpoint(resume_log_path, repo_id)
+            return
+        capped = pages["last"] >= STARGAZER_PAGE_LIMIT
+        last_page = min(pages["last"], STARGAZER_PAGE_LIMIT)
+        total_stars = (last_page - 1) * 100 + len(fetch(last_page))
+        capped = capped and (num_stars is None or num_stars > total_stars)
+        last_listed = fetch(last_page)[-1]["starred_at"] if fetch(last_page) else ""
+
+        def stars_before(timestamp, first_page):
+            """Number of stars starred before `timestamp`, searching from `first_page`."""
+            lo, hi = first_page, last_page
+            while lo < hi:
+                mid = (lo + hi) // 2
+                data = fetch(mid)
+                if data and data[-1]["starred_at"] >= timestamp:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            data = fetch(lo)
+            if not data or data[-1]["starred_at"] < timestamp:
+                return total_stars, lo
+            earlier = sum(1 for star in data if star["starred_at"] < timestamp)
+            return (lo - 1) * 100 + earlier, lo
+
+        def stars_after(timestamps):
+            """Numbers of stars starred at or after each timestamp, counted newest first over GraphQL.
+
+            Returns the total number of stars with the counts (None if the repo cannot be queried).
+            """
+            counts = dict.fromkeys(timestamps, 0)
+            total, cursor = None, None
+            while True:
+                data = self.github_graphql_request(
+                    stargazers_query(repo_owner, repo_name, cursor)
+                )
+                stargazers = ((data or {}).get("repository") or {}).get("stargazers")
+                if not stargazers:
+                    return None, None
+                if total is None:
+                    total = stargazers["totalCount"]
+                starred = [edge["starredAt"] for edge in stargazers["edges"]]
+                for timestamp in timestamps:
+                    counts[timestamp] += sum(1 for at in starred if at >= timestamp)
+                if (
+                    not starred
+                    or starred[-1] < min(timestamps)
+                    or not stargazers["pageInfo"]["hasNextPage"]
+                ):
+                    return total, counts
+                cursor = stargazers["pageInfo"]["endCursor"]
+
+        # Boundaries are searched in increasing order, each starting where the last ended
+        positions = {}
+        first_page = 1
+        boundaries = sorted(set(years) | {year + 1 for year in years})
+        unlisted = []  # Boundaries after the last star of a capped listing
+        for year in boundaries:
+            timestamp = f"{year}-01-01T00:00:00Z"
+            if capped and timestamp > last_listed:
+                unlisted.append(year)
+                continue
+            positions[year], first_page = stars_before(timestamp, first_page)
+        if unlisted:
+            total, counts = stars_after([f"{year}-01-01T00:00:00Z" for year in unlisted])
+            for year in unlisted:
+                positions[year] = (
+                    total - counts[f"{year}-01-01T00:00:00Z"] if counts else None
+                )
+            if counts is None:
                 print(
-                    f"✅ Page {page} of Repository {repo_owner}/{repo_name} information saved to {star_csv_path}"
+                    f"❗ Stargazers of {repo_owner}/{repo_name} are listed up to page {STARGAZER_PAGE_LIMIT} only. Counts from {unlisted[0] - 1} on are left empty."
                 )
 
-                if len(stargazers_data) < 100:  # No more pages
-                    with open(resume_log_path, "w") as f:
-                        f.write(f"{repo_id},{page + 1}")
-                    break
-
-            page += 1
-            with open(resume_log_path, "w") as f:
-                f.write(f"{repo_id},{page}")
+        star_counts = [
+            {
+                "repo_id": repo_id,
+                "repo_owner": repo_owner,
+                "repo_name": repo_name,
+                "year": year,
+                "num_stars": (
+                    positions[year + 1] - positions[year]
+                    if positions[year + 1] is not None and positions[year] is not None
+                    else None
+                ),
+            }
+            for year in sorted(years)
+        ]
+        self.save_output(star_counts, star_count_csv_path)
 
-            time.sleep(0.1)  # Avoid hitting concurrent request limit
+        # Save progress
+        if resume_log_path:
+            self.save_checkpoint(resume_log_path, repo_id)
 
-        print(f"🚀 Finished processing Stars of Repository {repo_owner}/{repo_name}")
+        self.progress.log(
+            f"✅ Yearly stars of Repository {repo_owner}/{repo_name} saved to {star_count_csv_path} ({len(pages) - 2} pages fetched of {last_page})"
+        )
 
     def get_release_data(
         self,
@@ -551,59 +1444,72 @@ class API:
         release_csv_path,
         resume_log_path,
         last_processed_page,
+        since=None,
+        until=None,
+        first_only=False,
     ):
-        """Get release information of repository and save to CSV."""
-        page = last_processed_page if last_processed_page else 1
-        while True:
-            releases_url = (
-                self.url + f"{repo_owner}/{repo_name}/releases?per_page=100&page={page}"
+        """Get release information of repository and save to CSV.
+
+        With `since`, only releases published in [since, until) are saved. The API
+        lists releases by creation date, newest first, and a release can be
+        published long after it was created, so paging stops at the first page
+        on which every release was both created and published before `since`
+        (one page past the creation cutoff, or more while late-published
+        releases keep turning up). With `first_only`, paging stops at the first
+        release in the window.
+        """
+        releases_url = self.url + f"{repo_owner}/{repo_name}/releases"
+        start_page = self.resume_point(resume_log_path, repo_id, last_processed_page)
+        if start_page is None:  # Completed since it was queued
+            return
+        for page, releases_data in self.iter_pages(
+            releases_url, start_page=start_page, prefetch=not since
+        ):
+            # Extract release information
+            releases = []
+            # Older releases follow a page that was entirely before the window
+            reached_end = bool(since) and all(
+                release["created_at"] < since
+                and (release["published_at"] or "") < since
+                for release in releases_data
             )
-            releases_response = self.github_api_request(releases_url)
-
-            if releases_response.status_code == 404:
-                print(
-                    f"❌ Release of repository {repo_owner}/{repo_name} not found. Skipping..."
-                )
-                break
-
-            elif releases_response.status_code == 200:
-                releases_data = releases_response.json()
-
-                if not releases_data:  # If the page is empty, break the loop
-                    with open(resume_log_path, "w") as f:
-                        f.write(f"{repo_id},{page}")
+            for release in releases_data:
+                published_at = release["published_at"]
+                if since and (
+                    not published_at
+                    or published_at < since
+                    or (until and published_at >= until)
+                ):
+                    continue
+
+                release_info = {
+                    "repo_id": repo_id,
+                    "repo_owner": repo_owner,
+                    "repo_name": repo_name,
+                    "release_id": release["id"],
+                    "release_tag": release["tag_name"],
+                    "release_created_at": release["created_at"],
+                    "release_published_at": published_at,
+                    "release_url": release["html_url"],
+                }
+                releases.append(release_info)
+                if first_only:
+                    reached_end = True  # One release answers the predicate
                     break
 
-                # Extract release information
-                releases = []
-                for release in releases_data:
-                    release_info = {
-                        "repo_id": repo_id,
-                        "repo_owner": repo_owner,
-                        "repo_name": repo_name,
-                        "release_id": release["id"],
-                        "release_tag": release["tag_name"],
-                        "release_created_at": release["created_at"],
-                        "release_published_at": release["published_at"],
-                        "release_url": release["html_url"],
-                    }
-                    releases.append(release_info)
-
+            if releases:
                 self.save_output(releases, release_csv_path)
-
-                print(
+                self.progress.log(
                     f"✅ Page {page} of Repository {repo_owner}/{repo_name} information saved to {release_csv_path}"
                 )
 
-                if len(releases_data) < 100:  # No more pages
-                    with open(resume_log_path, "w") as f:
-                        f.write(f"{repo_id},{page + 1}")
-                    break
+            self.save_checkpoint(resume_log_path, repo_id, next_page=page + 1)
 
-            page += 1
-            with open(resume_log_path, "w") as f:
-                f.write(f"{repo_id},{page}")
+            if reached_end:
+                break
 
-            time.sleep(0.1)  # Avoid hitting concurrent request limit
+        self.save_checkpoint(resume_log_path, repo_id)
 
-        print(f"🚀 Finished processing Releases of Repository {repo_owner}/{repo_name}")
+        self.progress.log(
+            f"🚀 Finished processing Releases of Repository {repo_owner}/{repo_name}"
+        )
@@ -0,0 +1,196 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+# Response headers kept with a cached body (the rest are refreshed by every 304)
+CACHED_HEADERS = ["Content-Type", "ETag", "Last-Modified", "Link"]
+
+# Endpoint of a URL: the first path segment after /repos/{owner}/{repo}/
+ENDPOINT_PATTERN = re.compile(r"/repos/[^/]+/[^/?]+/?([a-z_]*)")
+
+
+def endpoint_of(url):
+    """Returns the endpoint name of a GitHub API URL (e.g. 'forks', 'stargazers', 'repo')."""
+    match = ENDPOINT_PATTERN.search(url)
+    if not match:
+        return "other"
+    return match.group(1) or "repo"
+
+
+class ResponseCache:
+    """Persistent on-disk cache of GitHub API responses, keyed by URL and Accept header.
+
+    A response younger than the TTL of its endpoint is served without any request.
+    An older one is revalidated with its ETag/Last-Modified, and GitHub answers
+    304 Not Modified without counting it against the rate limit. When the cache
+    grows beyond `max_bytes`, the least recently used responses are evicted.
+    """
+
+    def __init__(self, db_path, ttls=None, max_bytes=None, replay=False):
+        self.ttls = ttls or {}
+        self.max_bytes = max_bytes
+        self.replay = replay  # Serve any cached response regardless of its age
+        self.lock = threading.Lock()
+        # Worker processes (--workers) share the cache, so wait for their write locks
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                url TEXT NOT NULL,
+                accept TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (url, accept)
+            )"""
+        )
+        # Caches created before TTL/LRU support lack the access time and size columns
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(responses)")]
+        if "last_access" not in columns:
+            self.conn.execute("ALTER TABLE responses ADD COLUMN last_access REAL")
+            self.conn.execute("UPDATE responses SET last_access = stored_at")
+        if "size" not in columns:
+            self.conn.execute("ALTER TABLE responses ADD COLUMN size INTEGER")
+            self.conn.execute("UPDATE responses SET size = length(body)")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)"
+        )
+        self.conn.commit()
+        self.total_bytes = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        self.fresh_hits = 0  # Requests served from the cache without contacting GitHub
+        self.hits = 0  # Requests answered with 304 Not Modified
+        self.misses = 0  # Requests answered with a full body
+        self.evictions = 0
+
+    def get(self, url, accept=""):
+        """Returns the cached entry of a URL, or None if it was never stored."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, headers, body, stored_at FROM responses WHERE url = ? AND accept = ?",
+                (url, accept),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE responses SET last_access = ? WHERE url = ? AND accept = ?",
+                (time.time(), url, accept),
+            )
+            self.conn.commit()
+        return {
+            "url": url,
+            "etag": row[0],
+            "last_modified": row[1],
+            "headers": json.loads(row[2]),
+            "body": zlib.decompress(row[3]),
+            "stored_at": row[4],
+        }
+
+    def is_fresh(self, entry):
+        """Checks whether an entry can be served without revalidating it."""
+        if self.replay:
+            return True
+        ttl = self.ttls.get(endpoint_of(entry["url"]), self.ttls.get("default", 0))
+        return time.time() - entry["stored_at"] < ttl
+
+    def conditional_headers(self, entry):
+        """Returns the validator headers that turn a request into a conditional one."""
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, accept, response):
+        """Stores a 200 response and evicts the least recently used ones if over the size cap."""
+        self.misses += 1
+        headers = {
+            name: response.headers[name]
+            for name in CACHED_HEADERS
+            if name in response.headers
+        }
+        body = zlib.compress(response.content)
+        now = time.time()
+        with self.lock:
+            old_size = self.conn.execute(
+                "SELECT size FROM responses WHERE url = ? AND accept = ?",
+                (url, accept),
+            ).fetchone()
+            self.conn.execute(
+                """INSERT OR REPLACE INTO responses
+                (url, accept, etag, last_modified, headers, body, stored_at, last_access, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    url,
+                    accept,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    json.dumps(headers),
+                    body,
+                    now,
+                    now,
+                    len(body),
+                ),
+            )
+            self.total_bytes += len(body) - (old_size[0] if old_size else 0)
+            if self.max_bytes and self.total_bytes > self.max_bytes:
+                self.evict(int(self.max_bytes * 0.9))
+            self.conn.commit()
+
+    def evict(self, target_bytes):
+        """Deletes least recently used responses until the cache fits in target_bytes."""
+        rows = self.conn.execute(
+            "SELECT url, accept, size FROM responses ORDER BY last_access"
+        )
+        evicted = []
+        for url, accept, size in rows:
+            if self.total_bytes <= target_bytes:
+                break
+            evicted.append((url, accept))
+            self.total_bytes -= size
+        self.conn.executemany(
+            "DELETE FROM responses WHERE url = ? AND accept = ?", evicted
+        )
+        self.evictions += len(evicted)
+
+    def touch(self, entry, accept=""):
+        """Restarts the TTL of an entry that GitHub confirmed as unchanged."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE responses SET stored_at = ? WHERE url = ? AND accept = ?",
+                (time.time(), entry["url"], accept),
+            )
+            self.conn.commit()
+
+    def build_response(self, entry, not_modified_response=None):
+        """Builds a 200 response from a cached entry (and the 304 that confirmed it, if any)."""
+        if not_modified_response is None:
+            self.fresh_hits += 1
+        else:
+            self.hits += 1
+        response = Response()
+        response.status_code = 200
+        response.url = entry["url"]
+        response.encoding = "utf-8"
+        response._content = entry["body"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        if not_modified_response is not None:
+            # Keep the fresh rate-limit headers of the 304
+            for name, value in not_modified_response.headers.items():
+                if name.lower().startswith("x-ratelimit") or name.lower() == "date":
+                    response.headers[name] = value
+        return response
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
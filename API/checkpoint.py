@@ -0,0 +1,353 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class CheckpointStore:
+    """Per-item resume state of the collection tasks, kept in SQLite (WAL mode).
+
+    Every repo or fork of a task (e.g. "repo_commit") has its own row: the next
+    page to fetch, or completed. Sharded runs also keep the shard of every repo
+    and which shard claimed it (see API/partition.py). A checkpoint is recorded right after the rows
+    of its page are flushed and fsynced, in one transaction together with the
+    size of every output file (or the files written, for Parquet) at that
+    moment. On start-up, rows appended after the last recorded size (a crash
+    between flush and checkpoint) are cut off, so a page is never saved twice
+    or lost.
+    """
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        # Several shard processes may share the store, so wait for their write locks
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS checkpoints (
+                task TEXT NOT NULL,
+                item TEXT NOT NULL,
+                next_page INTEGER,
+                completed INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (task, item)
+            )"""
+        )
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS output_offsets (
+                path TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL
+            )"""
+        )
+        # Files of the backends that write a file per append (see ParquetStorage)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS output_parts (
+                path TEXT NOT NULL,
+                part TEXT NOT NULL,
+                PRIMARY KEY (path, part)
+            )"""
+        )
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS assignments (
+                task TEXT NOT NULL,
+                item TEXT NOT NULL,
+                num_shards INTEGER NOT NULL,
+                shard INTEGER NOT NULL,
+                cost REAL NOT NULL,
+                claimed_by INTEGER,
+                claim_expires REAL,
+                PRIMARY KEY (task, item)
+            )"""
+        )
+        # Newest commit of every repo collected with --incremental, and of the run in progress
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS commit_state (
+                item TEXT PRIMARY KEY,
+                commit_sha TEXT,
+                pending_sha TEXT
+            )"""
+        )
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(assignments)")]
+        if "claim_expires" not in columns:
+            # Stores created before claims could expire
+            self.conn.execute("ALTER TABLE assignments ADD COLUMN claim_expires REAL")
+        # Review comments of the repos whose PRs are being collected, so a
+        # resumed repo only lists the comments changed since (see save_comments)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS review_comments (
+                task TEXT NOT NULL,
+                item TEXT NOT NULL,
+                comment_id INTEGER NOT NULL,
+                pr_number INTEGER NOT NULL,
+                body TEXT NOT NULL,
+                PRIMARY KEY (task, item, comment_id)
+            )"""
+        )
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS review_comment_listings (
+                task TEXT NOT NULL,
+                item TEXT NOT NULL,
+                listed_at TEXT NOT NULL,
+                PRIMARY KEY (task, item)
+            )"""
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def task_of(resume_log_path):
+        """Returns the task of a legacy resume log (data/resume_log_star.txt -> star)."""
+        name = os.path.splitext(os.path.basename(resume_log_path))[0]
+        return name[len("resume_log_") :] if name.startswith("resume_log_") else name
+
+    def load(self, task):
+        """Returns {item: (next_page, completed)} for every item of a task."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT item, next_page, completed FROM checkpoints WHERE task = ?",
+                (task,),
+            ).fetchall()
+        return {item: (next_page, bool(completed)) for item, next_page, completed in rows}
+
+    def get(self, task, item):
+        """Returns (next_page, completed) of one item ((None, False) if it has no checkpoint)."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT next_page, completed FROM checkpoints WHERE task = ? AND item = ?",
+                (task, str(item)),
+            ).fetchone()
+        return (row[0], bool(row[1])) if row else (None, False)
+
+    def record(self, task, items, next_page=None, offsets=None, parts=None):
+        """Marks items as resumable at `next_page` (or completed if None), with the output sizes.
+
+        `parts` maps datasets to the files written to them since the last checkpoint.
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                """INSERT OR REPLACE INTO checkpoints (task, item, next_page, completed, updated_at)
+                VALUES (?, ?, ?, ?, ?)""",
+                [(task, str(item), next_page, next_page is None, now) for item in items],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO output_offsets (path, offset) VALUES (?, ?)",
+                list((offsets or {}).items()),
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO output_parts (path, part) VALUES (?, ?)",
+                [(path, part) for path, names in (parts or {}).items() for part in names],
+            )
+
+    def offsets(self):
+        """Returns the size of every output file at its last checkpoint."""
+        with self.lock:
+            return dict(self.conn.execute("SELECT path, offset FROM output_offsets"))
+
+    def parts(self, path):
+        """Returns the files of a dataset that were written before a checkpoint."""
+        with self.lock:
+            return {
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT part FROM output_parts WHERE path = ?", (path,)
+                )
+            }
+
+    def replace_parts(self, path, removed, added):
+        """Records that the files `removed` of a dataset were merged into the file `added`."""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM output_parts WHERE path = ? AND part = ?",
+                [(path, part) for part in removed],
+            )
+            self.conn.execute(
+                "INSERT OR IGNORE INTO output_parts (path, part) VALUES (?, ?)",
+                (path, added),
+            )
+
+    def clear(self, task):
+        """Forgets the progress of a task, so its next run starts from the first item."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM checkpoints WHERE task = ?", (task,))
+            self.conn.execute("DELETE FROM assignments WHERE task = ?", (task,))
+            self.conn.execute("DELETE FROM review_comments WHERE task = ?", (task,))
+            self.conn.execute(
+                "DELETE FROM review_comment_listings WHERE task = ?", (task,)
+            )
+
+    def load_assignment(self, task):
+        """Returns {item: (num_shards, shard, cost, claimed_by)} of a sharded task.
+
+        `claimed_by` is None for items whose claim expired.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                """SELECT item, num_shards, shard, cost,
+                    CASE WHEN claim_expires < ? THEN NULL ELSE claimed_by END
+                FROM assignments WHERE task = ?""",
+                (time.time(), task),
+            ).fetchall()
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def save_assignment(self, task, num_shards, shards, costs):
+        """Stores the shard of every item; items assigned by another process first keep theirs.
+
+        An assignment made for a different number of shards is replaced.
+        """
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM assignments WHERE task = ? AND num_shards != ?",
+                (task, num_shards),
+            )
+            self.conn.executemany(
+                """INSERT OR IGNORE INTO assignments (task, item, num_shards, shard, cost)
+                VALUES (?, ?, ?, ?, ?)""",
+                [
+                    (task, item, num_shards, shard, costs[item])
+                    for item, shard in shards.items()
+                ],
+            )
+
+    def claim(self, task, item, shard, lease_seconds=None):
+        """Claims an item for a shard; fails if another shard holds a claim on it.
+
+        With `lease_seconds`, the claim expires unless it is renewed (see
+        renew_claim) or made final (see finish_claim), so the item of a shard
+        that stopped can be taken over by another one.
+        """
+        now = time.time()
+        expires = now + lease_seconds if lease_seconds else None
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                """UPDATE assignments SET claimed_by = ?, claim_expires = ?
+                WHERE task = ? AND item = ?
+                AND (claimed_by IS NULL OR claimed_by = ? OR claim_expires < ?)""",
+                (shard, expires, task, item, shard, now),
+            )
+        return cursor.rowcount == 1
+
+    def renew_claim(self, task, item, shard, lease_seconds):
+        """Extends the claim of a shard on an item; fails if it expired and was taken over."""
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                """UPDATE assignments SET claim_expires = ?
+                WHERE task = ? AND item = ? AND claimed_by = ?""",
+                (time.time() + lease_seconds, task, item, shard),
+            )
+        return cursor.rowcount == 1
+
+    def finish_claim(self, task, item, shard):
+        """Keeps the claim of a shard on an item it collected for good."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                """UPDATE assignments SET claim_expires = NULL
+                WHERE task = ? AND item = ? AND claimed_by = ?""",
+                (task, item, shard),
+            )
+
+    def load_comments(self, task, item):
+        """Returns (listed_at, {comment_id: (pr_number, body)}) of the review comments stored for an item.
+
+        `listed_at` is None if its comments were never listed.
+        """
+        with self.lock:
+            listed = self.conn.execute(
+                "SELECT listed_at FROM review_comment_listings WHERE task = ? AND item = ?",
+                (task, str(item)),
+            ).fetchone()
+            rows = self.conn.execute(
+                "SELECT comment_id, pr_number, body FROM review_comments WHERE task = ? AND item = ?",
+                (task, str(item)),
+            ).fetchall()
+        return (listed[0] if listed else None), {
+            comment_id: (pr_number, body) for comment_id, pr_number, body in rows
+        }
+
+    def save_comments(self, task, item, comments, listed_at):
+        """Stores (comment_id, pr_number, body) review comments of an item listed at `listed_at`."""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                """INSERT OR REPLACE INTO review_comments (task, item, comment_id, pr_number, body)
+                VALUES (?, ?, ?, ?, ?)""",
+                [(task, str(item), *comment) for comment in comments],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO review_comment_listings (task, item, listed_at) VALUES (?, ?, ?)",
+                (task, str(item), listed_at),
+            )
+
+    def clear_comments(self, task, item):
+        """Drops the review comments of a completed item."""
+        with self.lock, self.conn:
+            for table in ("review_comments", "review_comment_listings"):
+                self.conn.execute(
+                    f"DELETE FROM {table} WHERE task = ? AND item = ?", (task, str(item))
+                )
+
+    def commit_sha(self, item):
+        """Returns the newest commit of a repo's last completed incremental run (None: no run yet)."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT commit_sha FROM commit_state WHERE item = ?", (str(item),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_commit_state(self, item, pending_sha=None, completed=False):
+        """Records the newest commit of a running collection, or promotes it once completed."""
+        with self.lock, self.conn:
+            if pending_sha:
+                self.conn.execute(
+                    """INSERT INTO commit_state (item, pending_sha) VALUES (?, ?)
+                    ON CONFLICT (item) DO UPDATE SET pending_sha = excluded.pending_sha""",
+                    (str(item), pending_sha),
+                )
+            if completed:
+                self.conn.execute(
+                    """UPDATE commit_state SET commit_sha = pending_sha, pending_sha = NULL
+                    WHERE item = ? AND pending_sha IS NOT NULL""",
+                    (str(item),),
+                )
+
+    def import_commit_state(self, commit_state_path):
+        """Converts a `repo_commit_state.json` file into the commit state; the file is renamed afterwards."""
+        if not os.path.exists(commit_state_path):
+            return
+        with open(commit_state_path, "r") as f:
+            state = json.load(f)
+        with self.lock, self.conn:
+            self.conn.executemany(
+                """INSERT OR IGNORE INTO commit_state (item, commit_sha, pending_sha)
+                VALUES (?, ?, ?)""",
+                [
+                    (item, repo_state.get("commit_sha"), repo_state.get("pending_sha"))
+                    for item, repo_state in state.items()
+                ],
+            )
+        os.replace(commit_state_path, commit_state_path + ".imported")
+        print(f"✅ Imported {commit_state_path} into the checkpoint store")
+
+    def import_legacy(self, task, resume_log_path, item_ids):
+        """Converts a `resume_log_*.txt` file into checkpoints of the items in `item_ids`.
+
+        A log holds the last item (and, for paged tasks, its next page); every
+        item before it in the list is completed. The file is renamed afterwards.
+        """
+        if not os.path.exists(resume_log_path):
+            return
+        with open(resume_log_path, "r") as f:
+            data = f.read().strip().split(",")
+        item_ids = [str(item) for item in item_ids]
+        if data[0] in item_ids:
+            position = item_ids.index(data[0])
+            self.record(task, item_ids[:position])
+            if len(data) == 2 and data[1].isdigit():
+                self.record(task, [data[0]], next_page=int(data[1]))
+            else:
+                self.record(task, [data[0]])
+        os.replace(resume_log_path, resume_log_path + ".imported")
+        print(f"✅ Imported {resume_log_path} into the checkpoint store")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ThreadPoolCollector:
+    """Runs up to `concurrency` API collection methods at the same time in a thread pool.
+
+    The collector stands in for the `API` object that is passed to the `handle_*`
+    functions in CLI.py. Every `get_*` call made by a handler is queued instead of
+    executed, and `run()` then runs the queued calls on `concurrency` threads
+    (the calls block on their requests). Paginated calls also prefetch
+    `page_workers` pages each; the `API` object caps the requests in flight
+    over all calls at max(concurrency, page_workers).
+    """
+
+    def __init__(self, github_api, concurrency=8):
+        self.github_api = github_api
+        self.concurrency = max(1, int(concurrency))
+        self.jobs = []
+
+    def __getattr__(self, name):
+        attr = getattr(self.github_api, name)
+        if name.startswith("get_") and callable(attr):
+
+            def schedule(*args, **kwargs):
+                self.jobs.append((attr, args, kwargs))
+
+            return schedule
+        return attr
+
+    def run(self):
+        """Runs all queued collection calls and waits for them to finish."""
+        jobs_count = len(self.jobs)
+        print(
+            f"🚀 Running {jobs_count} collection jobs {self.concurrency} at a time..."
+        )
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [
+                executor.submit(func, *args, **kwargs) for func, args, kwargs in self.jobs
+            ]
+            for future in futures:
+                future.result()  # Raises the error of a failed job
+        self.jobs = []
+        print(f"🚀 Finished {jobs_count} collection jobs")
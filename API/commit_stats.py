@@ -0,0 +1,48 @@
+import subprocess
+
+from API.gitmirror import GitError
+
+# First line of every commit in the `git log` output: a NUL byte and the sha
+COMMIT_FORMAT = "%x00%H"
+COMMIT_MARKER = "\x00"
+
+
+def commit_stats(git_dir, revisions=("--all",)):
+    """Yields (sha, additions, deletions) of every commit of a git mirror in one `git log` pass.
+
+    The numbers match the `stats` of the GitHub commit API: merge commits are
+    diffed against their first parent and binary files count as 0 lines.
+    """
+    process = subprocess.Popen(
+        [
+            "git",
+            "--git-dir",
+            git_dir,
+            "log",
+            "--numstat",
+            "--diff-merges=first-parent",
+            f"--format={COMMIT_FORMAT}",
+            *revisions,
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    sha, additions, deletions = None, 0, 0
+    for line in process.stdout:
+        if line.startswith(COMMIT_MARKER):
+            if sha:
+                yield sha, additions, deletions
+            sha, additions, deletions = line[1:].strip(), 0, 0
+        elif line.strip():
+            added, deleted = line.split("\t", 2)[:2]
+            additions += int(added) if added.isdigit() else 0
+            deletions += int(deleted) if deleted.isdigit() else 0
+    if sha:
+        yield sha, additions, deletions
+
+    error = process.stderr.read().strip()
+    if process.wait() != 0:
+        raise GitError(error.splitlines()[0] if error else "git log failed")
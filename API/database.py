@@ -0,0 +1,424 @@
+import ast
+import json
+import os
+import re
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Tables of the pipeline: columns with their SQLite type, primary key and indexes.
+# A primary key makes every insert an upsert, so re-fetched pages never duplicate rows.
+TABLES = {
+    "repo_info": {
+        "columns": {
+            "repo_id": "INTEGER",
+            "repo_owner": "TEXT",
+            "repo_name": "TEXT",
+            "created_at": "TEXT",
+            "project_size": "INTEGER",
+            "num_forks": "INTEGER",
+            "num_stars": "INTEGER",
+            "default_branch": "TEXT",
+            "last_update": "TEXT",
+            "is_archived": "BOOLEAN",
+            "repo_url": "TEXT",
+        },
+        "primary_key": ["repo_id"],
+        "indexes": [],
+    },
+    "missing_repos": {
+        "columns": {"repo_name": "TEXT"},
+        "primary_key": ["repo_name"],
+        "indexes": [],
+    },
+    "fork_info": {
+        "columns": {
+            "repo_id": "INTEGER",
+            "repo_owner": "TEXT",
+            "repo_name": "TEXT",
+            "fork_id": "INTEGER",
+            "fork_owner": "TEXT",
+            "fork_owner_id": "INTEGER",
+            "fork_name": "TEXT",
+            "fork_default_branch": "TEXT",
+            "fork_created_at": "TEXT",
+            "fork_url": "TEXT",
+            "fork_pushed_at": "TEXT",
+            "fork_updated_at": "TEXT",
+            "fork_size": "INTEGER",
+        },
+        "primary_key": ["fork_id"],
+        "indexes": [["repo_id", "fork_owner_id"]],
+    },
+    "repo_commit_info": {
+        "columns": {
+            "repo_id": "INTEGER",
+            "repo_owner": "TEXT",
+            "repo_name": "TEXT",
+            "commit_sha": "TEXT",
+            "commit_author": "TEXT",
+            "commit_author_id": "TEXT",  # GitHub user id, or "unknown"
+            "commit_size": "INTEGER",
+            "commit_created_at": "TEXT",
+            "commit_pushed_at": "TEXT",
+        },
+        "primary_key": ["repo_id", "commit_sha"],
+        "indexes": [["repo_id", "commit_author_id"], ["commit_sha"]],
+    },
+    "fork_commit_info": {
+        "columns": {
+            "repo_id": "INTEGER",
+            "fork_id": "INTEGER",
+            "fork_owner": "TEXT",
+            "fork_name": "TEXT",
+            "commit_sha": "TEXT",
+            "commit_author": "TEXT",
+            "commit_author_id": "TEXT",
+            "commit_created_at": "TEXT",
+            "commit_pushed_at": "TEXT",
+        },
+        "primary_key": ["fork_id", "commit_sha"],
+        "indexes": [["repo_id"], ["commit_sha"]],
+    },
+    "commit_stats": {
+        "columns": {
+            "repo_id": "INTEGER",
+            "commit_sha": "TEXT",
+            "commit_additions": "INTEGER",
+            "commit_deletions": "INTEGER",
+            "commit_size": "INTEGER",
+        },
+        "primary_key": ["repo_id", "commit_sha"],
+        "indexes": [["commit_sha"]],
+    },
+    "repo_pr_info": {
+        "columns": {
+            "repo_id": "INTEGER",
+            "repo_owner": "TEXT",
+            "repo_name": "TEXT",
+            "pr_id": "INTEGER",
+            "pr_number": "INTEGER",
+            "pr_associated_commits": "TEXT",  # Python list literal, as in the CSV
+            "pr_created_at": "TEXT",
+            "pr_state": "TEXT",
+            "pr_merged_at": "TEXT",
+            "pr_closed_at": "TEXT",
+            "pr_review_comments": "TEXT",
+        },
+        "primary_key": ["pr_id"],
+        "indexes": [["repo_id"]],
+    },
+    # One row per commit of a PR, kept in sync with repo_pr_info.pr_associated_commits
+    "pr_commits": {
+        "columns": {"pr_id": "INTEGER", "commit_sha": "TEXT"},
+        "primary_key": ["pr_id", "commit_sha"],
+        "indexes": [["commit_sha"]],
+    },
+    "fork_pr_info": {
+        "columns": {
+            "repo_id": "INTEGER",
+            "fork_id": "INTEGER",
+            "fork_owner": "TEXT",
+            "fork_name": "TEXT",
+            "has_more_than_two_pr": "BOOLEAN",
+        },
+        "primary_key": ["fork_id"],
+        "indexes": [["repo_id"]],
+    },
+    "star_info": {
+        "columns": {
+            "repo_id": "INTEGER",
+            "repo_owner": "TEXT",
+            "repo_name": "TEXT",
+            "star_id": "INTEGER",
+            "star_login": "TEXT",
+            "starred_at": "TEXT",
+        },
+        "primary_key": ["repo_id", "star_id"],
+        "indexes": [],
+    },
+    "star_count_info": {
+        "columns": {
+            "repo_id": "INTEGER",
+            "repo_owner": "TEXT",
+            "repo_name": "TEXT",
+            "year": "INTEGER",
+            "num_stars": "INTEGER",
+        },
+        "primary_key": ["repo_id", "year"],
+        "indexes": [],
+    },
+    "release_info": {
+        "columns": {
+            "repo_id": "INTEGER",
+            "repo_owner": "TEXT",
+            "repo_name": "TEXT",
+            "release_id": "INTEGER",
+            "release_tag": "TEXT",
+            "release_created_at": "TEXT",
+            "release_published_at": "TEXT",
+            "release_url": "TEXT",
+        },
+        "primary_key": ["release_id"],
+        "indexes": [["repo_id"]],
+    },
+    # Tables written by datapre (only the columns that need a type are declared)
+    "sustainability_data": {
+        "columns": {"repo_id": "INTEGER", "is_archived": "BOOLEAN"},
+        "primary_key": [],
+        "indexes": [],
+    },
+    "repo_fork_commit_pr_info": {
+        "columns": {
+            "repo_id": "INTEGER",
+            "fork_id": "INTEGER",
+            "commit_is_in_main_repo": "BOOLEAN",
+            "has_more_than_two_pr": "BOOLEAN",
+            "is_merged": "BOOLEAN",
+            "is_not_merged": "BOOLEAN",
+            "not_contributed_back": "BOOLEAN",
+            "contributed_back_fork": "BOOLEAN",
+            "hard_fork": "BOOLEAN",
+            "inactive_fork": "BOOLEAN",
+        },
+        "primary_key": [],
+        "indexes": [["repo_id"]],
+    },
+}
+
+
+def table_name(path):
+    """Returns the table of a CSV path in constants.py (e.g. data/2_fork_info.csv -> fork_info)."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r"^\d+_", "", name)
+
+
+def to_sql_value(value):
+    """Converts a collected value to one SQLite can store."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return str(list(value))
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is pd.NaT or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+class Database:
+    """Embedded SQLite (WAL mode) store of the collected GitHub entities.
+
+    Every CSV path of constants.py maps to a table (`data/2_fork_info.csv` ->
+    `fork_info`) with a primary key, so writing the same repo, fork, commit,
+    PR, star or release again updates its row instead of duplicating it. The
+    class implements the storage backend interface of API/storage.py, and adds
+    indexed SQL versions of the joins of `preprocess_fork_data`.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Every commit reaches the disk before a resume log can point past it
+        self.conn.execute("PRAGMA synchronous=FULL")
+
+    def path(self, path):
+        """Returns where a table of constants.py is stored."""
+        return f"{self.db_path}:{table_name(path)}"
+
+    def exists(self, path):
+        return self.table_columns(table_name(path)) != []
+
+    def table_columns(self, table):
+        with self.lock:
+            return [row[1] for row in self.conn.execute(f'PRAGMA table_info("{table}")')]
+
+    def ensure_table(self, table, columns):
+        """Creates a table (with its primary key and indexes) and adds any new columns."""
+        spec = TABLES.get(table, {"columns": {}, "primary_key": [], "indexes": []})
+        existing = self.table_columns(table)
+        if not existing:
+            declared = {column: spec["columns"].get(column, "") for column in columns}
+            for column, kind in spec["columns"].items():
+                declared.setdefault(column, kind)
+            definitions = [f'"{column}" {kind}'.strip() for column, kind in declared.items()]
+            if spec["primary_key"]:
+                key = ", ".join(f'"{column}"' for column in spec["primary_key"])
+                definitions.append(f"PRIMARY KEY ({key})")
+            self.conn.execute(f'CREATE TABLE "{table}" ({", ".join(definitions)})')
+            for index in spec["indexes"]:
+                self.conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{table}_{"_".join(index)}" '
+                    f'ON "{table}" ({", ".join(index)})'
+                )
+            return
+        for column in columns:
+            if column not in existing:  # e.g. a 'teammate' column added by hand
+                self.conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}"')
+
+    def upsert(self, table, rows):
+        """Inserts rows (dicts) into a table, updating those with the same primary key.
+
+        Only the columns of the rows are updated, so columns they do not carry
+        (e.g. a 'teammate' column added by hand) keep their values.
+        """
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        self.ensure_table(table, columns)
+        placeholders = ", ".join("?" for _ in columns)
+        names = ", ".join(f'"{column}"' for column in columns)
+        statement = f'INSERT INTO "{table}" ({names}) VALUES ({placeholders})'
+        key = TABLES.get(table, {}).get("primary_key", [])
+        if key:
+            updates = ", ".join(
+                f'"{column}" = excluded."{column}"' for column in columns if column not in key
+            )
+            target = ", ".join(f'"{column}"' for column in key)
+            statement += f" ON CONFLICT ({target}) " + (
+                f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+            )
+        self.conn.executemany(
+            statement,
+            [[to_sql_value(row.get(column)) for column in columns] for row in rows],
+        )
+        if table == "repo_pr_info":
+            self.upsert_pr_commits(rows)
+
+    def upsert_pr_commits(self, rows):
+        """Keeps one row per (PR, commit) for the indexed commit-to-PR join."""
+        self.ensure_table("pr_commits", ["pr_id", "commit_sha"])
+        self.conn.executemany(
+            "DELETE FROM pr_commits WHERE pr_id = ?", [[row["pr_id"]] for row in rows]
+        )
+        pairs = []
+        for row in rows:
+            commits = row.get("pr_associated_commits")
+            if isinstance(commits, str):
+                commits = ast.literal_eval(commits)
+            if isinstance(commits, (list, tuple, np.ndarray)):
+                pairs += [[to_sql_value(row["pr_id"]), sha] for sha in commits]
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO pr_commits (pr_id, commit_sha) VALUES (?, ?)", pairs
+        )
+
+    def append(self, path, rows, fsync=False):
+        """Upserts rows (dicts or a DataFrame) into the table of a path in one transaction."""
+        if isinstance(rows, pd.DataFrame):
+            rows = rows.to_dict("records")
+        if not rows:
+            return
+        with self.lock, self.conn:
+            self.upsert(table_name(path), rows)
+
+    def missing_columns(self, path, columns):
+        """New columns are added to a table when rows first carry them (see ensure_table)."""
+        return []
+
+    def writer_path(self, path):
+        """Every process upserts into the same tables."""
+        return path
+
+    def offset(self, path):
+        """Rows are upserted, so writing a page again after a crash cannot duplicate it."""
+        return None
+
+    def new_parts(self):
+        return {}
+
+    def compact(self, min_files):
+        return []
+
+    def truncate(self, path, offset, parts=None):
+        pass
+
+    def read_sql(self, sql, params=(), boolean_columns=()):
+        """Runs a query into a DataFrame, restoring the booleans that SQLite stores as 0/1."""
+        with self.lock:
+            df = pd.read_sql_query(sql, self.conn, params=params)
+        for column in boolean_columns:
+            if column in df.columns:
+                if df[column].notna().all():
+                    df[column] = df[column].astype(bool)
+                else:
+                    df[column] = df[column].map({1: True, 0: False})
+        return df
+
+    def boolean_columns(self, table):
+        spec = TABLES.get(table, {"columns": {}})
+        return [column for column, kind in spec["columns"].items() if kind == "BOOLEAN"]
+
+    def repo_filter(self, repo_ids, alias=None):
+        """Returns a WHERE clause (and its parameter) that keeps the rows of some repos."""
+        if repo_ids is None:
+            return "", ()
+        column = f"{alias}.repo_id" if alias else "repo_id"
+        ids = json.dumps([int(repo_id) for repo_id in repo_ids])
+        return f" WHERE {column} IN (SELECT value FROM json_each(?))", (ids,)
+
+    def read(self, path, columns=None, repo_ids=None):
+        """Loads a table, optionally only some columns and the rows of some repos."""
+        table = table_name(path)
+        names = ", ".join(f'"{column}"' for column in columns) if columns else "*"
+        where, params = self.repo_filter(repo_ids)
+        return self.read_sql(
+            f'SELECT {names} FROM "{table}"{where}',
+            params,
+            self.boolean_columns(table),
+        )
+
+    def write_table(self, df, path):
+        """Replaces a table with a DataFrame."""
+        table = table_name(path)
+        with self.lock, self.conn:
+            self.conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            self.ensure_table(table, list(df.columns))
+            if not df.empty:
+                self.upsert(table, df.to_dict("records"))
+
+    def repo_commits_by_forks(self, repo_ids=None):
+        """Joins the repo commits with the fork of their author, using the fork index.
+
+        Returns the matched commits and the number of commits whose author owns
+        no fork of the repo.
+        """
+        where, params = self.repo_filter(repo_ids, alias="c")
+        commits = self.read_sql(
+            """SELECT c.repo_id, f.fork_id, f.fork_owner, f.fork_name, c.commit_sha,
+                c.commit_author, c.commit_author_id, c.commit_size,
+                c.commit_created_at, c.commit_pushed_at
+            FROM repo_commit_info c
+            JOIN fork_info f
+                ON f.repo_id = c.repo_id AND f.fork_owner_id = c.commit_author_id"""
+            + where,
+            params,
+        )
+        unmatched_where = where + (" AND" if where else " WHERE")
+        unmatched = self.read_sql(
+            f"""SELECT COUNT(*) AS n FROM repo_commit_info c{unmatched_where} NOT EXISTS (
+                SELECT 1 FROM fork_info f
+                WHERE f.repo_id = c.repo_id AND f.fork_owner_id = c.commit_author_id
+            )""",
+            params,
+        )["n"][0]
+        return commits, int(unmatched)
+
+    def pr_commits(self, repo_ids=None):
+        """Returns one row per (PR, commit) with the PR details, from the pr_commits table."""
+        where, params = self.repo_filter(repo_ids, alias="p")
+        return self.read_sql(
+            """SELECT p.pr_id, pc.commit_sha AS pr_associated_commits, p.pr_state,
+                p.pr_created_at, p.pr_merged_at, p.pr_closed_at, p.pr_review_comments
+            FROM repo_pr_info p
+            JOIN pr_commits pc ON pc.pr_id = p.pr_id"""
+            + where,
+            params,
+        )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
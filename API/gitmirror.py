@@ -0,0 +1,145 @@
+import os
+import re
+import subprocess
+import threading
+from datetime import datetime, timezone
+
+# Commit fields of `git log`, separated by NUL: sha, author email, author and committer time
+LOG_FORMAT = "%H%x00%ae%x00%at%x00%ct"
+
+# GitHub noreply addresses: <id>+<login>@users.noreply.github.com or <login>@users...
+NOREPLY_PATTERN = re.compile(
+    r"^(?:(?P<id>\d+)\+)?(?P<login>[^@]+)@users\.noreply\.github\.com$", re.IGNORECASE
+)
+
+
+class GitError(Exception):
+    """A git command failed (e.g. a deleted fork or a missing branch)."""
+
+
+def author_of(email):
+    """Returns the (login, id) of a commit author from a GitHub noreply address.
+
+    Other addresses cannot be mapped to a GitHub account without an API call,
+    so they give ("unknown", "unknown") like commits without a linked author.
+    """
+    match = NOREPLY_PATTERN.match(email or "")
+    if not match:
+        return "unknown", "unknown"
+    user_id = int(match.group("id")) if match.group("id") else "unknown"
+    return match.group("login"), user_id
+
+
+def iso_utc(timestamp):
+    """Formats a Unix timestamp like the dates of the GitHub API (2024-01-31T12:00:00Z)."""
+    return datetime.fromtimestamp(int(timestamp), timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+
+
+class GitMirror:
+    """Bare git mirrors of the upstream repositories, shared by all of their forks.
+
+    The mirror of `owner/name` lives in `<mirror_dir>/<owner>/<name>.git`. The
+    upstream default branch is fetched once per run into `refs/upstream/<branch>`
+    and the default branch of every fork into `refs/forks/<fork_id>`, so the
+    objects a fork shares with its upstream are stored only once. Repositories
+    are fetched from `<base_url><owner>/<name>.git`, which may also be a local
+    directory.
+    """
+
+    def __init__(self, mirror_dir, base_url="https://github.com/"):
+        self.mirror_dir = mirror_dir
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.lock = threading.Lock()
+        self.repo_locks = {}  # mirror path -> lock of its upstream fetch
+        self.fetched = set()  # Mirrors whose upstream branch is up to date
+
+    def git(self, git_dir, *args):
+        """Runs a git command on a mirror and returns its output."""
+        result = subprocess.run(
+            ["git", "--git-dir", git_dir, *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            # Fail instead of asking for credentials (e.g. for a deleted fork)
+            env=dict(os.environ, GIT_TERMINAL_PROMPT="0"),
+        )
+        if result.returncode != 0:
+            lines = result.stderr.decode("utf-8", "replace").strip().splitlines()
+            errors = [line for line in lines if line.startswith(("fatal:", "error:"))]
+            raise GitError((errors or lines or [f"git {args[0]} failed"])[0])
+        return result.stdout.decode("utf-8", "replace")
+
+    def url(self, owner, name):
+        return f"{self.base_url}{owner}/{name}.git"
+
+    def fetch(self, git_dir, url, branch, ref):
+        """Fetches one branch of a repository into a ref of the mirror."""
+        self.git(
+            git_dir,
+            "fetch",
+            "--quiet",
+            "--no-tags",
+            "--no-write-fetch-head",
+            url,
+            f"+refs/heads/{branch}:{ref}",
+        )
+
+    def mirror(self, owner, name, branch):
+        """Returns the mirror of an upstream repo, fetching its default branch once per run."""
+        git_dir = os.path.join(self.mirror_dir, owner, f"{name}.git")
+        with self.lock:
+            repo_lock = self.repo_locks.setdefault(git_dir, threading.Lock())
+        with repo_lock:
+            if git_dir not in self.fetched:
+                if not os.path.exists(os.path.join(git_dir, "HEAD")):
+                    os.makedirs(git_dir, exist_ok=True)
+                    self.git(git_dir, "init", "--quiet", "--bare")
+                self.fetch(
+                    git_dir, self.url(owner, name), branch, f"refs/upstream/{branch}"
+                )
+                self.fetched.add(git_dir)
+        return git_dir
+
+    def fork_refs(self, git_dir):
+        """Returns the ids of the forks whose branch was fetched into a mirror."""
+        output = self.git(git_dir, "for-each-ref", "--format=%(refname)", "refs/forks/")
+        return {ref[len("refs/forks/") :] for ref in output.split()}
+
+    def fork_commits(
+        self,
+        repo_owner,
+        repo_name,
+        repo_branch,
+        fork_id,
+        fork_owner,
+        fork_name,
+        fork_branch,
+    ):
+        """Returns the commits of a fork's default branch that are not in the upstream branch.
+
+        Each commit is a dict with its sha, author email and author/committer
+        times, oldest first like the compare API.
+        """
+        git_dir = self.mirror(repo_owner, repo_name, repo_branch)
+        fork_ref = f"refs/forks/{fork_id}"
+        self.fetch(git_dir, self.url(fork_owner, fork_name), fork_branch, fork_ref)
+        output = self.git(
+            git_dir,
+            "log",
+            "--reverse",
+            f"--format={LOG_FORMAT}",
+            f"refs/upstream/{repo_branch}..{fork_ref}",
+        )
+        commits = []
+        for line in output.splitlines():
+            sha, email, authored_at, committed_at = line.split("\x00")
+            commits.append(
+                {
+                    "sha": sha,
+                    "email": email,
+                    "authored_at": iso_utc(authored_at),
+                    "committed_at": iso_utc(committed_at),
+                }
+            )
+        return commits
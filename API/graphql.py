@@ -0,0 +1,71 @@
+import json
+
+# Repository fields matching the columns of 1_repo_info.csv
+REPOSITORY_FIELDS = """
+    databaseId
+    name
+    owner { login }
+    createdAt
+    diskUsage
+    forkCount
+    stargazerCount
+    defaultBranchRef { name }
+    updatedAt
+    isArchived
+    url
+"""
+
+# Pull requests opened against a repository, matching `has_more_than_two_pr`
+PULL_REQUEST_COUNT_FIELDS = """
+    pullRequests { totalCount }
+"""
+
+
+def chunks(items, size):
+    """Splits a list into consecutive batches of at most `size` items."""
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def repository_batch_query(repos, fields):
+    """Builds one query that resolves several repositories through aliased fields.
+
+    `repos` is a list of (owner, name) pairs; the result of the i-th pair is
+    returned under the alias `r{i}` (null if the repository does not exist).
+    """
+    aliases = [
+        f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{{fields}}}"
+        for i, (owner, name) in enumerate(repos)
+    ]
+    return "query {\n" + "\n".join(aliases) + "\n}"
+
+
+def pull_request_commits_query(owner, name, numbers):
+    """Builds one query that lists the commits of several pull requests of a repository.
+
+    The commits of the i-th pull request are returned under the alias `p{i}`;
+    `totalCount` tells whether they fit in the first 100.
+    """
+    aliases = [
+        f"p{i}: pullRequest(number: {number}) {{ commits(first: 100) {{ totalCount nodes {{ commit {{ oid }} }} }} }}"
+        for i, number in enumerate(numbers)
+    ]
+    return (
+        f"query {{\nrepository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{\n"
+        + "\n".join(aliases)
+        + "\n}\n}"
+    )
+
+
+def stargazers_query(owner, name, after=None):
+    """Builds a query for the next 100 stargazers of a repository, newest first.
+
+    Unlike the REST listing, which ends at page 400 (40,000 stars), the
+    connection can be followed through `endCursor` past the newest 40,000.
+    """
+    cursor = f", after: {json.dumps(after)}" if after else ""
+    return (
+        f"query {{\nrepository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{\n"
+        f"stargazers(first: 100{cursor}, orderBy: {{field: STARRED_AT, direction: DESC}}) "
+        "{ totalCount pageInfo { hasNextPage endCursor } edges { starredAt } }"
+        "\n}\n}"
+    )
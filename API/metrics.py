@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def label_string(labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels)
+
+
+class RequestMetrics:
+    """Counters and latency histograms of the API requests of a collection run.
+
+    Requests are recorded per endpoint (see `endpoint_of`), retries per
+    endpoint and reason, and the time spent waiting per reason ("pacing" by the
+    rate-limit scheduler, which includes secondary-limit pauses, "primary_limit"
+    resets and "retry" delays).
+    `render` formats them in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.latency = {}  # endpoint -> [count per bucket (+Inf last), sum of seconds]
+        self.statuses = {}  # (endpoint, status) -> requests
+        self.bytes = {}  # endpoint -> response bytes
+        self.retries = {}  # (endpoint, reason) -> retries
+        self.waits = {}  # reason -> seconds
+
+    def observe(self, endpoint, status, seconds, size):
+        """Records one request sent to the API."""
+        with self.lock:
+            histogram = self.latency.setdefault(
+                endpoint, [[0] * (len(LATENCY_BUCKETS) + 1), 0.0]
+            )
+            bucket = next(
+                (i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound),
+                len(LATENCY_BUCKETS),
+            )
+            histogram[0][bucket] += 1
+            histogram[1] += seconds
+            key = (endpoint, status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + size
+
+    def retry(self, endpoint, reason):
+        """Records a request that has to be sent again (rate limit or error)."""
+        with self.lock:
+            key = (endpoint, reason)
+            self.retries[key] = self.retries.get(key, 0) + 1
+
+    def waited(self, reason, seconds):
+        with self.lock:
+            self.waits[reason] = self.waits.get(reason, 0.0) + seconds
+
+    def quantile(self, endpoint, q):
+        """Returns the upper bound of the bucket holding the q-quantile latency (None: above the last bucket)."""
+        with self.lock:
+            counts = self.latency[endpoint][0]
+        target, seen = q * sum(counts), 0
+        for bound, count in zip(LATENCY_BUCKETS + (None,), counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def summary(self):
+        """Returns (endpoint, requests, errors, mean seconds, bytes, retries) per endpoint."""
+        with self.lock:
+            rows = []
+            for endpoint, (counts, total_seconds) in sorted(self.latency.items()):
+                requests = sum(counts)
+                errors = sum(
+                    n
+                    for (e, status), n in self.statuses.items()
+                    if e == endpoint and status >= 400 and status != 404
+                )
+                retries = sum(n for (e, _), n in self.retries.items() if e == endpoint)
+                rows.append(
+                    (
+                        endpoint,
+                        requests,
+                        errors,
+                        total_seconds / requests,
+                        self.bytes.get(endpoint, 0),
+                        retries,
+                    )
+                )
+            return rows
+
+    def render(self, quotas=()):
+        """Formats the metrics (and the (token suffix, resource, remaining, limit) `quotas`) as Prometheus text."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{{{label_string(labels)}}} {value}" if labels else f"{name} {value}")
+
+        with self.lock:
+            metric(
+                "github_api_request_duration_seconds",
+                "histogram",
+                "Latency of GitHub API requests.",
+                [],
+            )
+            for endpoint, (counts, total_seconds) in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), counts):
+                    cumulative += count
+                    labels = label_string([("endpoint", endpoint), ("le", bound)])
+                    lines.append(
+                        f"github_api_request_duration_seconds_bucket{{{labels}}} {cumulative}"
+                    )
+                labels = label_string([("endpoint", endpoint)])
+                lines.append(
+                    f"github_api_request_duration_seconds_sum{{{labels}}} {total_seconds:.6f}"
+                )
+                lines.append(
+                    f"github_api_request_duration_seconds_count{{{labels}}} {cumulative}"
+                )
+            metric(
+                "github_api_requests_total",
+                "counter",
+                "GitHub API responses by endpoint and status code.",
+                [
+                    ((("endpoint", endpoint), ("status", status)), count)
+                    for (endpoint, status), count in sorted(self.statuses.items())
+                ],
+            )
+            metric(
+                "github_api_response_bytes_total",
+                "counter",
+                "Bytes received from the GitHub API (as sent, before decompression).",
+                [((("endpoint", e),), size) for e, size in sorted(self.bytes.items())],
+            )
+            metric(
+                "github_api_retries_total",
+                "counter",
+                "Requests sent again after a rate limit or an error.",
+                [
+                    ((("endpoint", endpoint), ("reason", reason)), count)
+                    for (endpoint, reason), count in sorted(self.retries.items())
+                ],
+            )
+            metric(
+                "github_api_wait_seconds_total",
+                "counter",
+                "Time spent waiting on rate limits and retry delays.",
+                [((("reason", r),), f"{s:.3f}") for r, s in sorted(self.waits.items())],
+            )
+        metric(
+            "github_api_quota_remaining",
+            "gauge",
+            "Remaining rate-limit budget per token and resource.",
+            [
+                ((("token", f"...{suffix}"), ("resource", resource)), remaining)
+                for suffix, resource, remaining, _ in quotas
+            ],
+        )
+        metric(
+            "github_api_quota_limit",
+            "gauge",
+            "Rate-limit budget per token and resource.",
+            [
+                ((("token", f"...{suffix}"), ("resource", resource)), limit)
+                for suffix, resource, _, limit in quotas
+            ],
+        )
+        metric(
+            "github_api_run_seconds",
+            "gauge",
+            "Time since the collection run started.",
+            [((), f"{time.time() - self.started:.1f}")],
+        )
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, quotas=()):
+        """Writes the metrics to `path`, replacing it at once so readers never see a partial file."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render(quotas))
+        os.replace(tmp_path, path)
+
+
+class MetricsExporter:
+    """Exports the metrics of a run to a text file every `interval` seconds in the background."""
+
+    def __init__(self, metrics, path, interval, quotas):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.quotas = quotas  # Callable returning the token budgets at export time
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.export()
+
+    def export(self):
+        try:
+            self.metrics.export(self.path, self.quotas())
+        except OSError as e:
+            print(f"⚠️ Could not write metrics to {self.path}: {e}")
+
+    def stop(self):
+        """Stops the background exports and writes the final metrics."""
+        self.stopped.set()
+        self.thread.join()
+        self.export()
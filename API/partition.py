@@ -0,0 +1,204 @@
+import math
+import threading
+
+PER_PAGE = 100  # Items per page of the paginated endpoints
+
+# Rows per fork of a repository, used for repos without collected rows yet
+# (fitted on the repos that have some, these are the fallbacks)
+DEFAULT_ROWS_PER_FORK = {3: 2.0, 5: 1.5, 8: 0.05}
+
+
+def pages(count):
+    """Returns the number of pages needed to list `count` items (at least one request)."""
+    return max(1, math.ceil(count / PER_PAGE))
+
+
+def rows_per_repo(df_repos, choice, history):
+    """Estimates the commits/PRs/releases of every repo from the rows collected before.
+
+    Repos without rows in `history` (repo_id -> rows) get the rows per fork of
+    the repos that have some, times their number of forks.
+    """
+    known = df_repos["repo_id"].isin(history.index)
+    forks = df_repos.loc[known, "num_forks"].sum()
+    ratio = (
+        history.sum() / forks
+        if known.any() and forks > 0
+        else DEFAULT_ROWS_PER_FORK[choice]
+    )
+    return {
+        str(repo_id): history[repo_id] if repo_id in history.index else num_forks * ratio
+        for repo_id, num_forks in zip(df_repos["repo_id"], df_repos["num_forks"])
+    }
+
+
+def estimate_costs(df_repos, choice, history=None, graphql=False, batch_size=50):
+    """Estimates the API requests of every repo for a collection choice.
+
+    Returns {repo_id (str): requests}. `history` holds the rows per repo_id of
+    the choice's table from earlier runs (commits, PRs or releases).
+    """
+    if choice in (3, 5, 8):
+        if history is None or history.empty:
+            history = df_repos["repo_id"].iloc[:0].value_counts()
+        rows = rows_per_repo(df_repos, choice, history)
+    costs = {}
+    for repo_id, num_forks, num_stars in zip(
+        df_repos["repo_id"], df_repos["num_forks"], df_repos["num_stars"]
+    ):
+        item = str(repo_id)
+        if choice == 2:
+            cost = pages(num_forks)
+        elif choice == 3:
+            cost = pages(rows[item])
+        elif choice == 4:
+            cost = num_forks  # One compare request per fork
+        elif choice == 5 and graphql:
+            # PR pages, one commits query per batch and the repo-wide comments
+            cost = 2 * pages(rows[item]) + math.ceil(rows[item] / batch_size)
+        elif choice == 5:
+            cost = pages(rows[item]) + 2 * rows[item]  # Commits and comments per PR
+        elif choice == 6:
+            cost = math.ceil(num_forks / batch_size) if graphql else num_forks
+        elif choice == 7:
+            cost = pages(num_stars)
+        elif choice == 9:
+            cost = 1 + num_forks / PER_PAGE  # Local git work that grows with the forks
+        else:
+            cost = pages(rows[item])
+        costs[item] = float(cost)
+    return costs
+
+
+def partition(costs, num_shards, loads=None):
+    """Assigns items to shards so that their summed costs are balanced.
+
+    Items are taken from the most to the least expensive and each goes to the
+    shard with the lowest load so far (longest processing time first).
+    Returns {item: shard}.
+    """
+    loads = list(loads) if loads else [0.0] * num_shards
+    shards = {}
+    for item, cost in sorted(costs.items(), key=lambda kv: (-kv[1], kv[0])):
+        shard = loads.index(min(loads))
+        shards[item] = shard
+        loads[shard] += cost
+    return shards
+
+
+class ClaimKeeper:
+    """Renews the claim of a shard on the item it is collecting in the background."""
+
+    def __init__(self, checkpoints, task, shard, lease_seconds):
+        self.checkpoints = checkpoints
+        self.task = task
+        self.shard = shard
+        self.lease_seconds = lease_seconds
+        self.item = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.lease_seconds / 3):
+            item = self.item
+            if item is not None and not self.checkpoints.renew_claim(
+                self.task, item, self.shard, self.lease_seconds
+            ):
+                print(f"⚠️ Shard {self.shard} lost its claim on repo {item}")
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+def shard_items(
+    checkpoints,
+    task,
+    costs,
+    num_shards,
+    shard,
+    pending=None,
+    steal=True,
+    lease_seconds=None,
+):
+    """Yields the items a shard collects, claiming each one in the checkpoint store.
+
+    The first shard to start stores the assignment, so every shard works on
+    the same split even if their costs were estimated from different data.
+    A shard goes through its own items from the most expensive one; `pending`
+    (if given) leaves out completed items. With `steal`, a shard that is done
+    then takes the unclaimed items of the shard with the most cost left, from
+    the cheap end of its list, until no unclaimed work remains.
+
+    With `lease_seconds`, the claim on the item being collected is renewed in
+    the background and made final once the caller asks for the next item. The
+    item of a shard that stopped half-way is thus unclaimed again after the
+    lease, and another shard can take it over.
+    """
+    assignment = checkpoints.load_assignment(task)
+    stale = any(stored[0] != num_shards for stored in assignment.values())
+    missing = {item: cost for item, cost in costs.items() if item not in assignment}
+    if stale or missing:
+        loads = [0.0] * num_shards
+        if not stale:
+            for _, owner, cost, _ in assignment.values():
+                loads[owner] += cost
+        else:
+            missing = costs
+        checkpoints.save_assignment(
+            task, num_shards, partition(missing, num_shards, loads), costs
+        )
+        assignment = checkpoints.load_assignment(task)
+
+    def is_pending(item):
+        return item in costs and (pending is None or item in pending)
+
+    def by_cost(item):
+        return (-assignment[item][2], item)
+
+    loads = [0.0] * num_shards
+    for _, owner, cost, _ in assignment.values():
+        loads[owner] += cost
+    own = sorted(
+        (item for item in assignment if assignment[item][1] == shard and is_pending(item)),
+        key=by_cost,
+    )
+    print(
+        f"🧮 Shard {shard} of {num_shards}: {len(own)} repos pending, ~{int(loads[shard])} of {int(sum(loads))} estimated requests"
+    )
+    keeper = ClaimKeeper(checkpoints, task, shard, lease_seconds) if lease_seconds else None
+
+    def collect(item):
+        """Yields an item while its claim is kept alive, then makes the claim final."""
+        if keeper:
+            keeper.item = item
+        yield item
+        if keeper:
+            keeper.item = None
+            checkpoints.finish_claim(task, item, shard)
+
+    try:
+        for item in own:
+            if checkpoints.claim(task, item, shard, lease_seconds):
+                yield from collect(item)
+
+        while steal:
+            assignment = checkpoints.load_assignment(task)
+            left = {}  # shard -> its unclaimed items, most expensive first
+            for item in sorted(assignment, key=by_cost):
+                _, owner, _, claimed_by = assignment[item]
+                if owner != shard and claimed_by is None and is_pending(item):
+                    left.setdefault(owner, []).append(item)
+            if not left:
+                return
+            victim = max(
+                left, key=lambda owner: sum(assignment[i][2] for i in left[owner])
+            )
+            item = left[victim][-1]
+            if checkpoints.claim(task, item, shard, lease_seconds):
+                print(f"🤝 Shard {shard} took repo {item} over from shard {victim}")
+                yield from collect(item)
+    finally:
+        if keeper:
+            keeper.stop()
@@ -0,0 +1,154 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+
+def format_duration(seconds):
+    """Formats seconds as e.g. '45s', '3m05s' or '2h07m'."""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+class Progress:
+    """Aggregated progress of a collection run, reported at most every `interval` seconds.
+
+    Counts the completed items (repos or forks) and saved rows of the run and
+    the pages of every paginated listing in flight, whose total comes from
+    its `Link: rel="last"` header. Each report gives the rates, the ETA of the
+    run (when its number of items is known) and of every listing, and the
+    remaining quota of the tokens. With `quiet`, reports are JSON lines and
+    the routine per-page/per-item messages of `log` are dropped.
+    """
+
+    def __init__(self, interval=5.0, quiet=False, quotas=None):
+        self.interval = interval
+        self.quiet = quiet
+        self.quotas = quotas  # Callable returning the token budgets (see TokenPool.summary)
+        self.lock = threading.Lock()
+        self.task = None
+        self.total = None
+        self.start()
+        self.reported_at = time.time()
+
+    def start(self, task=None, total=None):
+        """Starts counting a task with `total` items to collect (None: unknown)."""
+        with self.lock:
+            self.task = task
+            self.total = total
+            self.started = time.time()
+            self.done = 0
+            self.rows = 0
+            self.listings = {}  # listing -> {"done", "resumed_at", "last", "started"}
+
+    def log(self, message):
+        """Prints a routine message (dropped in quiet mode)."""
+        if not self.quiet:
+            print(message)
+
+    def add_rows(self, count):
+        with self.lock:
+            self.rows += count
+        self.report()
+
+    def item_done(self, count=1):
+        with self.lock:
+            self.done += count
+        self.report()
+
+    def page_done(self, listing, page, last_page):
+        """Records a page of a paginated listing (e.g. 'apache/kafka/forks') out of `last_page`."""
+        with self.lock:
+            # The page rate is measured from the first page seen (a listing
+            # resumed at page n already had n - 1 pages done)
+            state = self.listings.setdefault(
+                listing, {"done": page - 1, "first_page": page, "started": time.time()}
+            )
+            state["done"] += 1
+            state["last"] = max(last_page, page)
+        self.report()
+
+    def listing_done(self, listing):
+        with self.lock:
+            self.listings.pop(listing, None)
+
+    def snapshot(self):
+        """Returns the current progress as a dict."""
+        now = time.time()
+        with self.lock:
+            elapsed = max(now - self.started, 1e-6)
+            item_rate = self.done / elapsed
+            eta = None
+            if self.total is not None and item_rate > 0:
+                eta = max(self.total - self.done, 0) / item_rate
+            listings = []
+            for listing, pages in sorted(self.listings.items()):
+                page_rate = (pages["done"] - pages["first_page"]) / max(
+                    now - pages["started"], 1e-6
+                )
+                listing_eta = None
+                if page_rate > 0:
+                    listing_eta = round((pages["last"] - pages["done"]) / page_rate, 1)
+                listings.append(
+                    {
+                        "listing": listing,
+                        "pages_done": pages["done"],
+                        "pages_total": pages["last"],
+                        "eta_seconds": listing_eta,
+                    }
+                )
+            state = {
+                "time": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "task": self.task,
+                "items_done": self.done,
+                "items_total": self.total,
+                "items_per_second": round(item_rate, 2),
+                "rows": self.rows,
+                "rows_per_second": round(self.rows / elapsed, 1),
+                "eta_seconds": round(eta, 1) if eta is not None else None,
+                "elapsed_seconds": round(elapsed, 1),
+                "listings": listings,
+            }
+        quota = {}
+        for _, resource, remaining, _ in self.quotas() if self.quotas else []:
+            quota[resource] = quota.get(resource, 0) + remaining
+        state["quota_remaining"] = quota
+        return state
+
+    def report(self, force=False):
+        """Prints the progress if `interval` seconds passed since the last report."""
+        now = time.time()
+        with self.lock:
+            if not force and now - self.reported_at < self.interval:
+                return
+            self.reported_at = now
+        state = self.snapshot()
+        if self.quiet:
+            print(json.dumps(state), flush=True)
+            return
+
+        items = f"{state['items_done']}" + (
+            f"/{state['items_total']}" if state["items_total"] is not None else ""
+        )
+        line = f"⏳ {state['task'] or 'collection'}: {items} items ({state['items_per_second']}/s), {state['rows']} rows ({state['rows_per_second']}/s)"
+        if state["eta_seconds"] is not None:
+            line += f", ETA {format_duration(state['eta_seconds'])}"
+        if state["quota_remaining"]:
+            line += ", quota " + ", ".join(
+                f"{remaining} {resource}"
+                for resource, remaining in sorted(state["quota_remaining"].items())
+            )
+        for listing in state["listings"][:3]:
+            line += f" | {listing['listing']} {listing['pages_done']}/{listing['pages_total']} pages"
+            if listing["eta_seconds"] is not None:
+                line += f" (ETA {format_duration(listing['eta_seconds'])})"
+        print(line, flush=True)
+
+    def close(self):
+        """Prints the final progress of the run if anything was collected."""
+        if self.done or self.rows:
+            self.report(force=True)
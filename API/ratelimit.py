@@ -0,0 +1,105 @@
+import threading
+import time
+
+SECONDARY_LIMIT_BACKOFF = 60  # Seconds to pause when a secondary limit has no Retry-After
+SECONDARY_LIMIT_MAX_BACKOFF = 15 * 60
+
+
+class RateLimitScheduler:
+    """Token-bucket pacing of GitHub API requests based on their rate-limit headers.
+
+    Every (token, resource) budget is a bucket that refills at
+    `X-RateLimit-Remaining / seconds until X-RateLimit-Reset`, so the remaining
+    budget is spread evenly over the reset window instead of being spent in a
+    burst followed by a stall. Secondary (abuse) limits pause every request
+    until their `Retry-After`, independently of the primary budgets.
+    """
+
+    def __init__(self, burst=100):
+        self.burst = burst  # Requests that may be sent back-to-back
+        self.lock = threading.Lock()
+        self.buckets = {}  # (token, resource) -> {"rate", "tokens", "updated"}
+        self.pause_until = 0.0  # Set by secondary limits, applies to every token
+        self.secondary_backoff = SECONDARY_LIMIT_BACKOFF
+        self.sleep_seconds = 0.0  # Total time spent pacing or paused
+
+    def get_bucket(self, key):
+        if key not in self.buckets:
+            # No headers seen yet: let the first requests through
+            self.buckets[key] = {"rate": None, "tokens": self.burst, "updated": time.time()}
+        return self.buckets[key]
+
+    def wait(self, token, resource="core"):
+        """Blocks until a request may be sent with `token`, then reserves it."""
+        with self.lock:
+            now = time.time()
+            bucket = self.get_bucket((token, resource))
+            if bucket["rate"]:
+                elapsed = now - bucket["updated"]
+                bucket["tokens"] = min(
+                    self.burst, bucket["tokens"] + elapsed * bucket["rate"]
+                )
+            bucket["updated"] = now
+            bucket["tokens"] -= 1
+            delay = 0.0
+            if bucket["tokens"] < 0 and bucket["rate"]:
+                delay = -bucket["tokens"] / bucket["rate"]
+            delay = max(delay, self.pause_until - now)
+            self.sleep_seconds += delay
+        if delay > 0:
+            time.sleep(delay)
+
+    def update(self, token, response):
+        """Recomputes the refill rate of a bucket from a response's rate-limit headers."""
+        headers = response.headers
+        if response.status_code < 400:
+            self.secondary_backoff = SECONDARY_LIMIT_BACKOFF
+        if "X-RateLimit-Remaining" not in headers:
+            return
+        resource = headers.get("X-RateLimit-Resource", "core")
+        remaining = int(headers["X-RateLimit-Remaining"])
+        if "X-RateLimit-Used" in headers and "X-RateLimit-Limit" in headers:
+            remaining = min(
+                remaining,
+                int(headers["X-RateLimit-Limit"]) - int(headers["X-RateLimit-Used"]),
+            )
+        reset_time = float(headers.get("X-RateLimit-Reset", time.time() + 3600))
+        window = max(1.0, reset_time - time.time())
+        with self.lock:
+            bucket = self.get_bucket((token, resource))
+            # Keep a trickle when the budget is gone; the primary limit handler sleeps
+            bucket["rate"] = max(remaining, 1) / window
+            bucket["tokens"] = min(bucket["tokens"], remaining)
+
+    @staticmethod
+    def is_primary_limit(response):
+        """Checks whether a response was rejected because the token's budget is used up."""
+        return (
+            response.status_code in (403, 429)
+            and response.headers.get("X-RateLimit-Remaining") == "0"
+        )
+
+    @staticmethod
+    def is_secondary_limit(response):
+        """Checks whether a response was rejected by a secondary (abuse) rate limit."""
+        if response.status_code not in (403, 429):
+            return False
+        if "Retry-After" in response.headers:
+            return True
+        return "secondary rate limit" in response.text.lower()
+
+    def pause_for_secondary_limit(self, response):
+        """Pauses every request until the secondary limit's Retry-After has passed."""
+        with self.lock:
+            if "Retry-After" in response.headers:
+                wait_time = int(response.headers["Retry-After"])
+            else:
+                # Back off exponentially while the limit keeps being hit
+                wait_time = self.secondary_backoff
+                self.secondary_backoff = min(
+                    self.secondary_backoff * 2, SECONDARY_LIMIT_MAX_BACKOFF
+                )
+            self.pause_until = max(self.pause_until, time.time() + wait_time)
+        print(
+            f"🚨 Secondary rate limit hit! Pausing all requests for {wait_time} seconds..."
+        )
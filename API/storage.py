@@ -0,0 +1,422 @@
+import csv
+import glob
+import os
+import re
+import shutil
+import uuid
+
+import pandas as pd
+
+from API.database import Database
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not locked against other processes
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Only needed by the parquet backend
+    pa = None
+
+# Columns that mix types in the API responses (e.g. an author id or "unknown")
+STRING_COLUMNS = ["commit_author", "commit_author_id"]
+
+# Checkpointed Parquet files of a partition that are merged into one file
+COMPACT_FILES = 32
+
+# Suffix of the part of a table written by one shard or worker (e.g. data/x_shard2.csv)
+WRITER_SUFFIX = re.compile(r"_(shard|worker)\d+")
+
+
+class CSVStorage:
+    """Stores every table as a CSV file (QUOTE_ALL) at its path in constants.py.
+
+    A process with a `writer` name (a shard or worker slot, e.g. "shard2")
+    appends to its own part of each table (data/x_shard2.csv), so it can cut
+    its part back to its last checkpoint without touching the rows of the
+    processes that run alongside it.
+    Reading a table concatenates the file at its path and all of its parts.
+    """
+
+    name = "csv"
+
+    def __init__(self, writer=None):
+        self.writer = writer
+        self.headers = {}  # path -> column order of the file
+
+    def path(self, path):
+        """Returns where a table of constants.py is stored."""
+        return path
+
+    def writer_path(self, path):
+        """Returns the file this process appends a table to."""
+        if not self.writer:
+            return path
+        root, ext = os.path.splitext(path)
+        return f"{root}_{self.writer}{ext}"
+
+    def files(self, path):
+        """Returns the existing files of a table: the one at its path and the parts of writers."""
+        root, ext = os.path.splitext(path)
+        parts = sorted(
+            part
+            for part in glob.glob(glob.escape(root) + "_*" + ext)
+            if WRITER_SUFFIX.fullmatch(part[len(root) : len(part) - len(ext)])
+        )
+        return [file for file in [path] + parts if os.path.exists(file)]
+
+    def exists(self, path):
+        return bool(self.files(path))
+
+    def get_header(self, path, rows):
+        """Returns the column order of a file: its existing header, or the keys of its rows."""
+        if path not in self.headers:
+            header = None
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                with open(path, "r", newline="") as f:
+                    header = next(csv.reader(f), None)
+            if not header:
+                header = list(dict.fromkeys(key for row in rows for key in row))
+            self.headers[path] = header
+        return self.headers[path]
+
+    def missing_columns(self, path, columns):
+        """Returns the `columns` that the header of a table's files (or parts) lacks."""
+        missing = []
+        for file in self.files(path):
+            if os.path.getsize(file) == 0:
+                continue
+            with open(file, "r", newline="") as f:
+                header = set(next(csv.reader(f), None) or ())
+            missing += [c for c in columns if c not in header and c not in missing]
+        return missing
+
+    def append(self, path, rows, fsync=False):
+        """Appends rows (dicts) to a table, writing the header if the file is new.
+
+        Raises ValueError if the rows have columns that the file's header lacks
+        (e.g. a table started by an older version), instead of dropping them.
+        """
+        path = self.writer_path(path)
+        header = self.get_header(path, rows)
+        known = set(header)
+        unknown = [
+            key for key in dict.fromkeys(k for row in rows for k in row) if key not in known
+        ]
+        if unknown:
+            raise ValueError(
+                f"{path} has no column {', '.join(unknown)}. Move it away to collect into a new file, or add the column to its header."
+            )
+        with open(path, "a", newline="") as f:
+            if fcntl is not None:
+                # Worker processes (--workers) append to the same files
+                fcntl.flock(f, fcntl.LOCK_EX)
+            write_header = os.fstat(f.fileno()).st_size == 0
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator="\n")
+            if write_header:
+                writer.writerow(header)
+            writer.writerows([row.get(column) for column in header] for row in rows)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def offset(self, path):
+        """Returns the size of this process's file of a table, used to cut off rows written after a checkpoint."""
+        path = self.writer_path(path)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def new_parts(self):
+        """Files are appended to in place, so there are no new files to record at a checkpoint."""
+        return {}
+
+    def compact(self, min_files):
+        return []
+
+    def truncate(self, path, offset, parts=None):
+        """Drops everything appended to this process's file of a table after `offset` bytes.
+
+        A part of a writer without a recorded offset only holds rows written
+        after the last checkpoint, so all of them are dropped.
+        """
+        path = self.writer_path(path)
+        if offset is None:
+            if not self.writer:
+                return
+            offset = 0
+        if os.path.exists(path) and os.path.getsize(path) > offset:
+            dropped = os.path.getsize(path) - offset
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+            print(f"✂️ Dropped {dropped} bytes written to {path} after the last checkpoint")
+
+    def read(self, path, columns=None, repo_ids=None):
+        """Loads a table, optionally only some columns and the rows of some repos."""
+        usecols = columns
+        if columns is not None and repo_ids is not None and "repo_id" not in columns:
+            usecols = list(columns) + ["repo_id"]
+        files = [file for file in self.files(path) if os.path.getsize(file) > 0]
+        if len(files) > 1:
+            df = pd.concat(
+                [pd.read_csv(file, usecols=usecols) for file in files], ignore_index=True
+            )
+        else:
+            df = pd.read_csv(files[0] if files else path, usecols=usecols)
+        if repo_ids is not None:
+            df = df[df["repo_id"].isin(list(repo_ids))]
+        return df[columns] if columns is not None else df
+
+    def write_table(self, df, path):
+        """Replaces a table (and the parts of its writers) with a DataFrame."""
+        for part in self.files(path)[1 if os.path.exists(path) else 0 :]:
+            os.remove(part)
+        df.to_csv(path, index=False)
+
+    def close(self):
+        """Nothing to release: every append opens and closes its file."""
+
+
+class ParquetStorage:
+    """Stores every table as a compressed Parquet dataset partitioned by `repo_id`.
+
+    A table at `data/x.csv` in constants.py becomes the directory `data/x.parquet`
+    with one `repo_id=<id>/` subdirectory per repository, so a step that needs a
+    few repos or columns reads only those files and column chunks. Column types
+    are inferred from the first rows written and kept for every later append;
+    ISO timestamps (`*_at`) are stored as UTC timestamps.
+
+    Appended files are named after the process's `writer` (part-<writer>-<uuid>,
+    "main" without one) and reported by `new_parts`, so a checkpoint records
+    them and a restart deletes the files of its writer written after its last
+    checkpoint.
+    """
+
+    name = "parquet"
+
+    def __init__(self, compression="zstd", writer=None):
+        if pa is None:
+            raise ImportError(
+                "The parquet storage backend requires pyarrow (pip install pyarrow)"
+            )
+        self.compression = compression
+        self.writer = writer
+        self.written = {}  # dataset -> files appended since the last `new_parts`
+        self.committed = {}  # (dataset, partition) -> files returned by `new_parts`
+        self.partitioning = ds.partitioning(
+            pa.schema([("repo_id", pa.int64())]), flavor="hive"
+        )
+        self.schemas = {}  # path -> schema of the stored columns
+
+    def path(self, path):
+        """Returns where a table of constants.py is stored."""
+        root, ext = os.path.splitext(path)
+        return root + ".parquet" if ext == ".csv" else path
+
+    def exists(self, path):
+        return os.path.isdir(self.path(path))
+
+    def writer_path(self, path):
+        """Returns the dataset this process appends a table to."""
+        return self.path(path)
+
+    def to_frame(self, data):
+        """Builds a DataFrame whose columns Arrow can type (timestamps, no mixed objects)."""
+        df = pd.DataFrame(data)
+        for column in df.columns:
+            values = df[column]
+            if column.endswith("_at") and not pd.api.types.is_datetime64_any_dtype(values):
+                df[column] = pd.to_datetime(values, utc=True, errors="coerce")
+            elif values.dtype == object:
+                kinds = {type(v) for v in values if not _is_null(v)}
+                if column in STRING_COLUMNS or len(kinds) > 1:
+                    df[column] = values.map(lambda v: None if _is_null(v) else str(v))
+        return df
+
+    def get_schema(self, path, df):
+        """Returns the schema of a table: the stored one, or one inferred from `df`."""
+        if path not in self.schemas:
+            fields = []
+            if os.path.isdir(path):
+                schema = ds.dataset(
+                    path, format="parquet", partitioning=self.partitioning
+                ).schema
+                fields = [field for field in schema if field.name != "repo_id"]
+            if not fields:
+                schema = pa.Schema.from_pandas(df, preserve_index=False)
+                # Columns without values yet are stored as strings
+                fields = [
+                    pa.field(field.name, pa.string())
+                    if pa.types.is_null(field.type)
+                    else field
+                    for field in schema
+                    if field.name != "repo_id"
+                ]
+            self.schemas[path] = pa.schema(fields)
+        return self.schemas[path]
+
+    def part_prefix(self):
+        """Returns the name prefix of the files this process appends."""
+        return f"part-{self.writer or 'main'}-"
+
+    def write_file(self, df, schema, directory, fsync=False, prefix="part-"):
+        """Writes a DataFrame as one Parquet file of a directory; returns its name."""
+        table = pa.Table.from_pandas(
+            df.reindex(columns=schema.names), schema=schema, preserve_index=False
+        )
+        return self.write_arrow(table, directory, fsync, prefix)
+
+    def write_arrow(self, table, directory, fsync=False, prefix="part-"):
+        """Writes one Parquet file atomically (hidden temporary file, then rename)."""
+        os.makedirs(directory, exist_ok=True)
+        name = f"{prefix}{uuid.uuid4().hex}.parquet"
+        tmp_path = os.path.join(directory, "." + name)
+        pq.write_table(table, tmp_path, compression=self.compression)
+        if fsync:
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(directory, name))
+        return name
+
+    def write_partitions(self, path, df, fsync=False, prefix="part-"):
+        """Writes a DataFrame to a dataset, one file per repo partition.
+
+        Returns the written files, relative to the dataset.
+        """
+        schema = self.get_schema(path, df)
+        if "repo_id" not in df.columns:
+            return [self.write_file(df, schema, path, fsync, prefix)]
+        names = []
+        for repo_id, group in df.groupby("repo_id", sort=False):
+            partition = f"repo_id={int(repo_id)}"
+            name = self.write_file(
+                group, schema, os.path.join(path, partition), fsync, prefix
+            )
+            names.append(f"{partition}/{name}")
+        return names
+
+    def missing_columns(self, path, columns):
+        """Returns the `columns` that the stored schema of a dataset lacks."""
+        path = self.path(path)
+        if not os.path.isdir(path):
+            return []
+        schema = ds.dataset(path, format="parquet", partitioning=self.partitioning).schema
+        return [column for column in columns if column not in schema.names]
+
+    def append(self, path, rows, fsync=False):
+        """Appends rows (dicts or a DataFrame) to a table, one file per repo partition."""
+        path = self.path(path)
+        names = self.write_partitions(path, self.to_frame(rows), fsync, self.part_prefix())
+        self.written.setdefault(path, []).extend(names)
+
+    def offset(self, path):
+        """Files are written whole and renamed into place, so there is no partial data to cut off."""
+        return None
+
+    def new_parts(self):
+        """Returns {dataset: files} appended since the last call, for the checkpoint to record."""
+        written, self.written = self.written, {}
+        for dataset, names in written.items():
+            for name in names:
+                partition = os.path.dirname(name)
+                self.committed.setdefault((dataset, partition), []).append(name)
+        return written
+
+    def compact(self, min_files):
+        """Merges the checkpointed files of each partition that has at least `min_files` of them.
+
+        Yields (dataset, merged files, new file) once the new file is written;
+        the caller records the change, then deletes the merged files with
+        `remove_parts`. A crash in between leaves either the unrecorded new
+        file or the no longer recorded merged files, which `truncate` deletes.
+        """
+        for (dataset, partition), names in list(self.committed.items()):
+            if len(names) < min_files:
+                continue
+            table = pa.concat_tables(
+                [pq.ParquetFile(os.path.join(dataset, name)).read() for name in names]
+            )
+            name = self.write_arrow(
+                table, os.path.join(dataset, partition), True, self.part_prefix()
+            )
+            merged = f"{partition}/{name}" if partition else name
+            self.committed[(dataset, partition)] = [merged]
+            yield dataset, names, merged
+
+    def remove_parts(self, dataset, names):
+        for name in names:
+            try:
+                os.remove(os.path.join(dataset, name))
+            except FileNotFoundError:
+                pass
+
+    def truncate(self, path, offset, parts=None):
+        """Deletes the files of this process's writer that no checkpoint recorded (`parts`).
+
+        Files written before parts were recorded (part-<uuid>) and by other
+        writers are kept.
+        """
+        path = self.path(path)
+        self.written.pop(path, None)
+        if not os.path.isdir(path):
+            return
+        recorded = set(parts or ())
+        prefix = self.part_prefix()
+        dropped = 0
+        for directory, _, names in os.walk(path):
+            for name in names:
+                if not name.lstrip(".").startswith(prefix):
+                    continue
+                relative = os.path.relpath(os.path.join(directory, name), path)
+                if name.startswith(".") or relative.replace(os.sep, "/") not in recorded:
+                    os.remove(os.path.join(directory, name))
+                    dropped += 1
+        if dropped:
+            print(f"✂️ Dropped {dropped} files written to {path} after the last checkpoint")
+
+    def read(self, path, columns=None, repo_ids=None):
+        """Loads a table, reading only some columns and the partitions of some repos."""
+        dataset = ds.dataset(
+            self.path(path), format="parquet", partitioning=self.partitioning
+        )
+        row_filter = None
+        if repo_ids is not None:
+            row_filter = ds.field("repo_id").isin([int(r) for r in repo_ids])
+        return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+
+    def write_table(self, df, path):
+        """Replaces a table with a DataFrame."""
+        path = self.path(path)
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        self.schemas.pop(tmp_path, None)
+        self.write_partitions(tmp_path, self.to_frame(df))
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        self.schemas.pop(path, None)
+        self.schemas.pop(tmp_path, None)
+
+    def close(self):
+        """Nothing to release: every append writes and closes its own files."""
+
+
+def _is_null(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+STORAGE_BACKENDS = {"csv": CSVStorage, "parquet": ParquetStorage, "sqlite": Database}
+
+
+def get_storage(name="csv", database_path=None, writer=None):
+    """Creates the storage backend selected in constants.py or with `--storage`.
+
+    `writer` names the part of each table that this process appends to (see
+    CSVStorage and ParquetStorage); readers leave it out.
+    """
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {name}")
+    if name == "sqlite":
+        return Database(database_path)
+    return STORAGE_BACKENDS[name](writer=writer)
@@ -0,0 +1,105 @@
+import os
+import re
+import threading
+import time
+
+DEFAULT_LIMITS = {"core": 5000, "graphql": 5000}
+
+
+class TokenPool:
+    """Pool of GitHub tokens with per-token rate-limit accounting.
+
+    The pool tracks `X-RateLimit-Remaining`/`X-RateLimit-Reset` of every token for
+    each rate-limit resource ("core" for REST, "graphql" for GraphQL) and hands out
+    the token with the most remaining budget.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = list(dict.fromkeys(tokens))  # Deduplicate, keep order
+        self.lock = threading.Lock()
+        self.state = {}  # (token, resource) -> {"limit", "remaining", "reset"}
+
+    @classmethod
+    def from_env(cls, token=None, token_file=None):
+        """Collects tokens from the arguments, GITHUB_TOKEN(S), GITHUB_TOKEN_<n> and a token file."""
+        tokens = [token, os.getenv("GITHUB_TOKEN")]
+        tokens += os.getenv("GITHUB_TOKENS", "").split(",")
+        numbered = [key for key in os.environ if re.fullmatch(r"GITHUB_TOKEN_\d+", key)]
+        tokens += [os.environ[key] for key in sorted(numbered, key=lambda k: int(k[13:]))]
+        if token_file:
+            with open(token_file, "r") as f:
+                tokens += [line for line in f if not line.strip().startswith("#")]
+        return cls([t.strip() for t in tokens if t and t.strip()])
+
+    def get_state(self, token, resource):
+        key = (token, resource)
+        if key not in self.state:
+            limit = DEFAULT_LIMITS.get(resource, 5000)
+            self.state[key] = {"limit": limit, "remaining": limit, "reset": 0.0}
+        state = self.state[key]
+        if state["reset"] and state["reset"] <= time.time():  # Window has reset
+            state["remaining"] = state["limit"]
+            state["reset"] = 0.0
+        return state
+
+    def acquire(self, resource="core"):
+        """Returns the token with the most remaining budget, or None if the pool is empty."""
+        if not self.tokens:
+            return None
+        with self.lock:
+            token = max(
+                self.tokens, key=lambda t: self.get_state(t, resource)["remaining"]
+            )
+            self.get_state(token, resource)["remaining"] -= 1  # Reserve one request
+            return token
+
+    def update(self, token, headers):
+        """Records the rate-limit headers of a response sent with `token`."""
+        if token is None or "X-RateLimit-Remaining" not in headers:
+            return
+        resource = headers.get("X-RateLimit-Resource", "core")
+        with self.lock:
+            state = self.get_state(token, resource)
+            state["remaining"] = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Limit" in headers:
+                state["limit"] = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Reset" in headers:
+                state["reset"] = float(headers["X-RateLimit-Reset"])
+
+    def mark_exhausted(self, token, resource="core", reset=None):
+        """Marks a token as having no budget left until `reset` (in an hour when unknown).
+
+        Only for primary-limit responses: a token marked without a reset would
+        otherwise never be used again.
+        """
+        if token is None:
+            return
+        with self.lock:
+            state = self.get_state(token, resource)
+            state["remaining"] = 0
+            state["reset"] = float(reset) if reset else time.time() + 3600
+
+    def has_budget(self, resource="core"):
+        """Checks whether any token has budget left for `resource`."""
+        with self.lock:
+            return any(
+                self.get_state(t, resource)["remaining"] > 0 for t in self.tokens
+            )
+
+    def next_reset(self, resource="core"):
+        """Returns the earliest time at which an exhausted token gets new budget."""
+        with self.lock:
+            resets = [
+                self.get_state(t, resource)["reset"]
+                for t in self.tokens
+                if self.get_state(t, resource)["reset"]
+            ]
+        return min(resets) if resets else time.time()
+
+    def summary(self):
+        """Returns (token suffix, resource, remaining, limit) for every tracked budget."""
+        with self.lock:
+            return [
+                (token[-4:], resource, state["remaining"], state["limit"])
+                for (token, resource), state in sorted(self.state.items())
+            ]
@@ -0,0 +1,346 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from API.api import API
+from API.storage import get_storage
+from API.tokens import TokenPool
+
+
+def _to_json(value):
+    """Serializes numpy scalars (e.g. the ids read with pandas) as plain numbers."""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Cannot queue a {type(value).__name__}")
+
+
+class WorkQueue:
+    """Queue of collection jobs (one `API.get_*` call each) in a SQLite file (WAL mode).
+
+    Workers claim a job with a lease that they renew while it runs. A job whose
+    lease expired (its worker crashed or lost the file) can be claimed again,
+    so it is retried by another worker. Every worker also leases a slot, whose
+    number names the part of the output tables it appends to (see
+    `run_worker`). Several dataget runs on one host can share the queue, but
+    SQLite locks are not reliable on network filesystems, so the file must
+    stay on a local disk.
+    """
+
+    def __init__(self, db_path, max_attempts=3):
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            db_path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL UNIQUE,
+                choice INTEGER,
+                method TEXT NOT NULL,
+                args TEXT NOT NULL,
+                kwargs TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS slots (
+                slot INTEGER PRIMARY KEY,
+                worker TEXT NOT NULL,
+                lease_expires REAL NOT NULL
+            )"""
+        )
+        # Tables whose rows are checkpointed by the queued jobs
+        self.conn.execute("CREATE TABLE IF NOT EXISTS outputs (path TEXT PRIMARY KEY)")
+
+    def put(self, choice, method, args, kwargs):
+        """Queues a call; a finished or failed job with the same call is queued again."""
+        args = json.dumps(list(args), default=_to_json)
+        kwargs = json.dumps(kwargs, default=_to_json, sort_keys=True)
+        with self.lock:
+            self.conn.execute(
+                """INSERT INTO jobs (key, choice, method, args, kwargs) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET status = 'queued', attempts = 0, error = NULL
+                WHERE status IN ('done', 'failed')""",
+                (f"{method}:{args}:{kwargs}", choice, method, args, kwargs),
+            )
+
+    def claim(self, worker, lease_seconds):
+        """Leases the next queued (or expired) job to a worker; returns None if there is none."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    """SELECT id, method, args, kwargs FROM jobs
+                    WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?)
+                    ORDER BY id LIMIT 1""",
+                    (now,),
+                ).fetchone()
+                if row:
+                    self.conn.execute(
+                        """UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?,
+                        attempts = attempts + 1 WHERE id = ?""",
+                        (worker, now + lease_seconds, row[0]),
+                    )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2]), json.loads(row[3])
+
+    def renew(self, job_id, worker, lease_seconds):
+        """Extends the lease of a running job; returns False if the worker lost it."""
+        with self.lock:
+            cursor = self.conn.execute(
+                """UPDATE jobs SET lease_expires = ?
+                WHERE id = ? AND worker = ? AND status = 'leased'""",
+                (time.time() + lease_seconds, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'done', lease_expires = NULL WHERE id = ? AND worker = ?",
+                (job_id, worker),
+            )
+
+    def fail(self, job_id, worker, error):
+        """Queues a failed job again, or marks it failed after `max_attempts` attempts."""
+        with self.lock:
+            self.conn.execute(
+                """UPDATE jobs SET error = ?, lease_expires = NULL,
+                status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END
+                WHERE id = ? AND worker = ?""",
+                (error, self.max_attempts, job_id, worker),
+            )
+
+    def claim_slot(self, worker, lease_seconds, slot=None):
+        """Leases the lowest free slot (or `slot`, if its lease expired) to a worker.
+
+        Returns the slot number, or None if `slot` is still held.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                held = {
+                    row[0]
+                    for row in self.conn.execute(
+                        "SELECT slot FROM slots WHERE lease_expires >= ?", (now,)
+                    )
+                }
+                if slot is None:
+                    slot = next(i for i in range(len(held) + 1) if i not in held)
+                elif slot in held:
+                    slot = None
+                if slot is not None:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO slots (slot, worker, lease_expires) VALUES (?, ?, ?)",
+                        (slot, worker, now + lease_seconds),
+                    )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return slot
+
+    def renew_slot(self, slot, worker, lease_seconds):
+        """Extends the lease of a worker's slot; returns False if the worker lost it."""
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE slots SET lease_expires = ? WHERE slot = ? AND worker = ?",
+                (time.time() + lease_seconds, slot, worker),
+            )
+        return cursor.rowcount == 1
+
+    def release_slot(self, slot, worker):
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM slots WHERE slot = ? AND worker = ?", (slot, worker)
+            )
+
+    def expired_slots(self):
+        """Returns the slots of workers that stopped without releasing them."""
+        with self.lock:
+            return [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT slot FROM slots WHERE lease_expires < ? ORDER BY slot",
+                    (time.time(),),
+                )
+            ]
+
+    def add_output(self, path):
+        with self.lock:
+            self.conn.execute("INSERT OR IGNORE INTO outputs (path) VALUES (?)", (path,))
+
+    def outputs(self):
+        """Returns the tables whose rows the queued jobs checkpoint."""
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT path FROM outputs")]
+
+    def counts(self):
+        """Returns the number of jobs per status."""
+        with self.lock:
+            return dict(
+                self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class QueueProducer:
+    """Stands in for the `API` object of a `handle_*` function and queues its `get_*` calls.
+
+    Like `ThreadPoolCollector`, every other attribute (storage, checkpoints, args)
+    is read from the wrapped `API` object.
+    """
+
+    def __init__(self, github_api, queue, choice):
+        self.github_api = github_api
+        self.queue = queue
+        self.choice = choice
+        self.queued = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self.github_api, name)
+        if name.startswith("get_") and callable(attr):
+
+            def enqueue(*args, **kwargs):
+                self.queue.put(self.choice, name, args, kwargs)
+                self.queued += 1
+
+            return enqueue
+        return attr
+
+    def restore_output(self, csv_path):
+        """Restores a table and lets the workers restore their parts of it (see `run_worker`)."""
+        self.queue.add_output(csv_path)
+        self.github_api.restore_output(csv_path)
+
+
+class LeaseKeeper:
+    """Renews the leases of a worker's slot and current job in the background."""
+
+    def __init__(self, queue, worker, lease_seconds, slot):
+        self.queue = queue
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.slot = slot
+        self.job_id = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.lease_seconds / 3):
+            if not self.queue.renew_slot(self.slot, self.worker, self.lease_seconds):
+                print(f"⚠️ {self.worker} lost the lease of slot {self.slot}")
+            job_id = self.job_id
+            if job_id is not None and not self.queue.renew(
+                job_id, self.worker, self.lease_seconds
+            ):
+                print(f"⚠️ {self.worker} lost the lease of job {job_id}")
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+def restore_slot(github_api, queue, slot):
+    """Cuts a worker slot's part of the queued tables back to its last checkpoint."""
+    args = github_api.args
+    storage = get_storage(
+        getattr(args, "storage", None) or "csv",
+        getattr(args, "database_path", None),
+        f"worker{slot}",
+    )
+    offsets = github_api.checkpoints.offsets()
+    try:
+        for path in queue.outputs():
+            path_of_slot = storage.writer_path(path)
+            storage.truncate(
+                path,
+                offsets.get(path_of_slot),
+                github_api.checkpoints.parts(path_of_slot),
+            )
+    finally:
+        storage.close()
+
+
+def run_worker(args, token, lease_seconds=300, idle_seconds=5):
+    """Claims and runs queued jobs with one token until no job is queued or leased.
+
+    Started once per `--workers` process; jobs leased by other workers are
+    waited for, as they come back to the queue if their worker dies. A worker
+    appends to its slot's part of every table (e.g. data/x_worker0.csv), so
+    rows it wrote after its last checkpoint can be cut off without touching
+    the rows of the other workers: when it starts, when a job fails, and by
+    any worker that finds the slot of a dead worker expired.
+    """
+    if getattr(args, "metrics_path", None):
+        # One metrics file per worker process
+        root, ext = os.path.splitext(args.metrics_path)
+        args.metrics_path = f"{root}.{os.getpid()}{ext}"
+    queue = WorkQueue(args.queue_path)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    slot = queue.claim_slot(worker, lease_seconds)
+    args.output_writer = f"worker{slot}"
+    github_api = API(args, token)
+    github_api.tokens = TokenPool([token])  # One token per worker
+    keeper = LeaseKeeper(queue, worker, lease_seconds, slot)
+    finished = 0
+    try:
+        for path in queue.outputs():
+            github_api.restore_output(path)
+        while True:
+            for dead in queue.expired_slots():
+                if queue.claim_slot(worker, lease_seconds, dead) is not None:
+                    restore_slot(github_api, queue, dead)
+                    queue.release_slot(dead, worker)
+            job = queue.claim(worker, lease_seconds)
+            if job is None:
+                counts = queue.counts()
+                if not counts.get("queued") and not counts.get("leased"):
+                    break
+                time.sleep(idle_seconds)
+                continue
+
+            job_id, method, job_args, job_kwargs = job
+            keeper.job_id = job_id
+            try:
+                getattr(github_api, method)(*job_args, **job_kwargs)
+            except Exception as e:
+                print(f"❌ {worker} failed job {job_id} ({method}): {e!r}")
+                # Its retry starts from its last checkpoint again
+                github_api.sink.flush(fsync=True)
+                for path in queue.outputs():
+                    github_api.restore_output(path)
+                queue.fail(job_id, worker, repr(e))
+            else:
+                queue.complete(job_id, worker)
+                finished += 1
+            finally:
+                keeper.job_id = None
+    finally:
+        keeper.stop()
+        github_api.close()
+        queue.release_slot(slot, worker)
+        queue.close()
+    print(f"🏁 {worker} finished {finished} jobs")
+    github_api.print_metrics_stats()
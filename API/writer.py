@@ -0,0 +1,108 @@
+import threading
+import time
+
+from API.storage import COMPACT_FILES, CSVStorage
+
+
+class OutputSink:
+    """Buffered writer of the collected rows, shared by all collection methods.
+
+    Rows are kept in memory per collection job (thread) and output table, and
+    appended through the storage backend once `flush_rows` rows are buffered or
+    `flush_seconds` have passed since the last flush. Jobs that record
+    checkpoints only write their rows at a checkpoint: the rows are flushed and
+    fsynced, then the checkpoint is recorded with the resulting file sizes, so
+    the saved rows always match the recorded progress.
+
+    Backends that write a file per append (Parquet) get their checkpointed
+    files merged once a partition has `COMPACT_FILES` of them, and at the end;
+    `replace_parts` records each merge before the merged files are deleted.
+    """
+
+    def __init__(
+        self, storage=None, flush_rows=1000, flush_seconds=10.0, replace_parts=None
+    ):
+        self.storage = storage or CSVStorage()
+        self.replace_parts = replace_parts
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.lock = threading.RLock()
+        self.buffers = {}  # thread id -> {path -> buffered rows (dicts)}
+        self.checkpointing = set()  # Threads whose rows wait for their checkpoint
+        self.last_flush = time.time()
+        self.rows_written = 0
+        self.flushes = 0
+
+    def write(self, rows, path):
+        """Buffers rows for a table and flushes if a threshold is reached."""
+        thread_id = threading.get_ident()
+        with self.lock:
+            self.buffers.setdefault(thread_id, {}).setdefault(path, []).extend(rows)
+            if thread_id in self.checkpointing:
+                return
+            free_threads = [tid for tid in self.buffers if tid not in self.checkpointing]
+            buffered_rows = sum(
+                len(rows)
+                for tid in free_threads
+                for rows in self.buffers[tid].values()
+            )
+            if (
+                buffered_rows >= self.flush_rows
+                or time.time() - self.last_flush >= self.flush_seconds
+            ):
+                self.flush(free_threads)
+
+    def flush(self, thread_ids=None, fsync=False):
+        """Appends the buffered rows (of some threads, default all) to their tables.
+
+        Returns the paths that were written.
+        """
+        with self.lock:
+            if thread_ids is None:
+                thread_ids = list(self.buffers)
+            pending = {}
+            for thread_id in thread_ids:
+                for path, rows in self.buffers.pop(thread_id, {}).items():
+                    pending.setdefault(path, []).extend(rows)
+            for path, rows in pending.items():
+                if rows:
+                    self.storage.append(path, rows, fsync)
+                    self.rows_written += len(rows)
+            self.last_flush = time.time()
+            self.flushes += 1
+            return list(pending)
+
+    def checkpoint(self, record):
+        """Writes the calling job's rows to disk, then calls `record(offsets, parts)` under the same lock.
+
+        `offsets` maps the file of every written table (see `writer_path`) to
+        its size after the flush (backends without byte offsets are left out),
+        and `parts` the datasets of file-per-append backends to the files
+        written since the last checkpoint (see `new_parts`).
+        """
+        thread_id = threading.get_ident()
+        with self.lock:
+            self.checkpointing.add(thread_id)
+            paths = self.flush([thread_id], fsync=True)
+            offsets = {}
+            for path in paths:
+                offset = self.storage.offset(path)
+                if offset is not None:
+                    offsets[self.storage.writer_path(path)] = offset
+            record(offsets, self.storage.new_parts())
+            self.compact(COMPACT_FILES)
+
+    def compact(self, min_files):
+        """Merges the checkpointed files of every partition that has at least `min_files`."""
+        if self.replace_parts is None:
+            return
+        with self.lock:
+            for dataset, removed, added in self.storage.compact(min_files):
+                self.replace_parts(dataset, removed, added)
+                self.storage.remove_parts(dataset, removed)
+
+    def close(self):
+        """Flushes the remaining rows at the end of a collection and closes the storage."""
+        self.flush(fsync=True)
+        self.compact(2)
+        self.storage.close()
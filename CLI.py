@@ -1,7 +1,13 @@
 import argparse
 from dotenv import load_dotenv
+import multiprocessing
 import os
-from API.api import API
+from API.api import API, FORK_COLUMNS
+from API.collector import ThreadPoolCollector
+from API.graphql import chunks
+from API.partition import estimate_costs, shard_items
+from API.storage import CSVStorage, get_storage
+from API.workqueue import QueueProducer, WorkQueue, run_worker
 import pandas as pd
 from pprint import pprint
 import constants
@@ -23,6 +29,24 @@ def check_file_exists(filepath, msg):
         exit(1)
 
 
+def check_table_exists(storage, path, msg):
+    """Helper function to check if a table exists in the storage backend."""
+    if not storage.exists(path):
+        print(f"Error: {msg}")
+        exit(1)
+
+
+def check_table_columns(storage, path, columns):
+    """Helper function to check that an existing table has the columns a collection writes."""
+    missing = storage.missing_columns(path, columns)
+    if missing:
+        print(
+            f"Error: {storage.path(path)} was written by an older version and has no column {', '.join(missing)}. "
+            "Move it away to collect into a new table, or add the columns to it."
+        )
+        exit(1)
+
+
 def API_check(args):
     """Handles basic API checks."""
     load_dotenv()
@@ -44,21 +68,106 @@ def API_check(args):
         pprint(response.json())
 
 
-def resume_from_checkpoint(resume_log_path, with_page=False):
-    """Resumes from the last processed checkpoint."""
-    if os.path.exists(resume_log_path):
-        with open(resume_log_path, "r") as f:
-            data = f.read().strip().split(",")
+def pending_items(github_api, resume_log_path, item_ids, output_path, cycle=False):
+    """Returns {item id: page to resume from} of the items that are not completed yet.
+
+    Progress comes from the checkpoint store (a legacy resume log is imported
+    first), and rows saved to `output_path` after the last checkpoint are cut
+    off. With `cycle`, a task whose items are all completed starts over.
+    """
+    checkpoints = github_api.checkpoints
+    task = checkpoints.task_of(resume_log_path)
+    item_ids = [str(item_id) for item_id in item_ids]
+    if github_api.args.restart:
+        checkpoints.clear(task)
+    checkpoints.import_legacy(task, resume_log_path, item_ids)
+    github_api.restore_output(output_path)
+
+    progress = checkpoints.load(task)
+    if cycle and all(progress.get(item_id, (None, False))[1] for item_id in item_ids):
+        checkpoints.clear(task)
+        progress = {}
+
+    start_pages = {}
+    for item_id in item_ids:
+        next_page, completed = progress.get(item_id, (None, False))
+        if not completed:
+            start_pages[item_id] = next_page or 1
+    print(
+        f"⏩ Resuming {task}: {len(item_ids) - len(start_pages)} of {len(item_ids)} items already completed"
+    )
+    github_api.progress.start(task, len(start_pages))
+    return start_pages
+
+
+def team_rows(github_api, df, name):
+    """Returns the rows (repos or forks) of the teammate `name`, or all of them when sharding."""
+    if github_api.args.num_shards:
+        return df
+    return df[df["teammate"] == name]
+
+
+# Tables whose rows per repo tell the cost of collecting the repo again
+SHARD_HISTORY_TABLES = {
+    3: constants.REPO_COMMIT_CSV_PATH,
+    5: constants.REPO_PR_CSV_PATH,
+    8: constants.RELEASE_CSV_PATH,
+}
+
+
+def assigned_rows(github_api, df, columns, choice, df_repos, task=None, pending=None):
+    """Yields the `columns` of the rows of `df` (repos or forks) that this run collects.
+
+    Without --num_shards, these are all rows of `df`. With it, the repos are
+    split over the shards by their estimated API cost, and only the rows of
+    the repos claimed by --shard are yielded. Tasks with checkpoints (`task`
+    and the repo ids in `pending`) also take over unfinished repos of other
+    shards once their own are done; queued (--concurrency, --workers) runs do
+    not, as they claim every repo before collecting.
+    """
+    args = github_api.args
+    if not args.num_shards:
+        yield from zip(*(df[column] for column in columns))
+        return
+    # Stolen repos make the number of items of a shard unknown in advance
+    github_api.progress.start(task or f"choice_{choice}")
+
+    history = None
+    if choice in SHARD_HISTORY_TABLES and github_api.storage.exists(
+        SHARD_HISTORY_TABLES[choice]
+    ):
+        history = github_api.storage.read(
+            SHARD_HISTORY_TABLES[choice], columns=["repo_id"]
+        )["repo_id"].value_counts()
+    costs = estimate_costs(
+        df_repos, choice, history, args.graphql, args.graphql_batch_size
+    )
+    steal = task is not None and not isinstance(
+        github_api, (ThreadPoolCollector, QueueProducer)
+    )
+    for repo_id in shard_items(
+        github_api.checkpoints,
+        task or f"choice_{choice}",
+        costs,
+        args.num_shards,
+        args.shard,
+        pending,
+        steal=steal,
+        lease_seconds=args.lease_seconds if steal else None,
+    ):
+        rows = df[df["repo_id"].astype(str) == repo_id]
+        yield from zip(*(rows[column] for column in columns))
 
-        if with_page and len(data) == 2:  # Handle case with page number
-            last_processed_repo, last_processed_page = data
-            return last_processed_repo, (
-                int(last_processed_page) if last_processed_page.isdigit() else 1
-            )
-        else:
-            return data[0]  # Handle case without page number
 
-    return (None, 1) if with_page else None
+def never_pushed_forks(df_forks):
+    """Flags forks that were never pushed to after they were created.
+
+    GitHub copies the parent's `pushed_at` into a new fork, so a fork whose
+    `pushed_at` is not later than its `created_at` has no commits of its own.
+    """
+    return df_forks["fork_pushed_at"].isna() | (
+        df_forks["fork_pushed_at"] <= df_forks["fork_created_at"]
+    )
 
 
 def handle_repo_data(github_api, name):
@@ -67,6 +176,16 @@ def handle_repo_data(github_api, name):
         constants.PROJECTS_LIST, f"{constants.PROJECTS_LIST} does not exist."
     )
     df_projects = pd.read_csv(constants.PROJECTS_LIST)
+    github_api.progress.start("repo", len(df_projects))
+
+    if getattr(github_api.args, "graphql", False):
+        # Resolve many repositories per GraphQL query
+        repo_names = [project.strip() for project in df_projects["pj_alias"]]
+        for batch in chunks(repo_names, github_api.args.graphql_batch_size):
+            github_api.get_repo_data_batch(
+                "apache", batch, constants.REPO_CSV_PATH, constants.MISSING_CSV_PATH
+            )
+        return
 
     for project in df_projects["pj_alias"]:
         repo_owner = "apache"
@@ -78,42 +197,85 @@ def handle_repo_data(github_api, name):
 
 def handle_fork_data(github_api, name):
     """Handles fork data collection."""
-    check_file_exists(
+    check_table_exists(
+        github_api.storage,
         constants.REPO_CSV_PATH,
         f"{constants.REPO_CSV_PATH} does not exist. Please run choice 1 first.",
     )
-    df_repos = pd.read_csv(constants.REPO_CSV_PATH)
-    filter_repos = df_repos[df_repos["teammate"] == name]
+    check_table_columns(github_api.storage, constants.FORK_CSV_PATH, FORK_COLUMNS)
+    df_repos = github_api.storage.read(constants.REPO_CSV_PATH)
+    filter_repos = team_rows(github_api, df_repos, name)
+
+    # Resume from the checkpoints
+    resume_log_path = constants.RESUME_LOG_PATH_FORK
+    start_pages = pending_items(
+        github_api, resume_log_path, filter_repos["repo_id"], constants.FORK_CSV_PATH
+    )
 
-    for repo_id, repo_owner, repo_name in zip(
-        filter_repos["repo_id"], filter_repos["repo_owner"], filter_repos["repo_name"]
+    for repo_id, repo_owner, repo_name in assigned_rows(
+        github_api,
+        filter_repos,
+        ["repo_id", "repo_owner", "repo_name"],
+        2,
+        df_repos,
+        github_api.checkpoints.task_of(resume_log_path),
+        start_pages,
     ):
+        if str(repo_id) not in start_pages:
+            continue  # Completed in a previous run
+
         github_api.get_fork_data(
-            repo_id, repo_owner, repo_name, constants.FORK_CSV_PATH
+            repo_id,
+            repo_owner,
+            repo_name,
+            constants.FORK_CSV_PATH,
+            resume_log_path,
+            start_pages[str(repo_id)],
         )
 
 
 def handle_repo_commit_data(github_api, name):
     """Handles commit data collection."""
-    check_file_exists(
+    check_table_exists(
+        github_api.storage,
         constants.REPO_CSV_PATH,
         f"{constants.REPO_CSV_PATH} does not exist. Please run choice 1 first.",
     )
-    df_repos = pd.read_csv(constants.REPO_CSV_PATH)
-    filter_repos = df_repos[df_repos["teammate"] == name]
+    df_repos = github_api.storage.read(constants.REPO_CSV_PATH)
+    filter_repos = team_rows(github_api, df_repos, name)
+
+    # Restrict commits to an analysis window and/or to commits newer than the last run
+    args = github_api.args
+    since = args.commit_since or (
+        constants.COMMIT_WINDOW_START if args.analysis_window else None
+    )
+    until = args.commit_until or (
+        constants.COMMIT_WINDOW_END if args.analysis_window else None
+    )
+    if args.incremental:
+        github_api.checkpoints.import_commit_state(constants.REPO_COMMIT_STATE_PATH)
 
-    # Resume from last processed fork
+    # Resume from the checkpoints (a completed incremental pass starts over)
     resume_log_path = constants.RESUME_LOG_PATH_REPO_COMMIT
-    last_processed_repo, last_processed_page = resume_from_checkpoint(
-        resume_log_path, with_page=True
+    start_pages = pending_items(
+        github_api,
+        resume_log_path,
+        filter_repos["repo_id"],
+        constants.REPO_COMMIT_CSV_PATH,
+        cycle=args.incremental,
     )
 
-    for repo_id, repo_owner, repo_name in zip(
-        filter_repos["repo_id"], filter_repos["repo_owner"], filter_repos["repo_name"]
+    for repo_id, repo_owner, repo_name in assigned_rows(
+        github_api,
+        filter_repos,
+        ["repo_id", "repo_owner", "repo_name"],
+        3,
+        df_repos,
+        github_api.checkpoints.task_of(resume_log_path),
+        start_pages,
     ):
-        # Resume processing if interrupted
-        if last_processed_repo and str(repo_id) != last_processed_repo:
-            continue  # Skip to the last processed fork
+        if str(repo_id) not in start_pages:
+            continue  # Completed in a previous run
 
         github_api.get_repo_commit_data(
             repo_id,
@@ -121,41 +283,61 @@ def handle_repo_commit_data(github_api, name):
             repo_name,
             constants.REPO_COMMIT_CSV_PATH,
             resume_log_path,
-            last_processed_page,
+            start_pages[str(repo_id)],
+            since=since,
+            until=until,
+            incremental=args.incremental,
         )
 
-        last_processed_repo = None  # Reset last processed repo
-        last_processed_page = None  # Reset last processed page
-
 
 def handle_fork_commit_data(github_api, name):
     """Handles commit data collection."""
-    check_file_exists(
+    check_table_exists(
+        github_api.storage,
         constants.REPO_CSV_PATH,
         f"{constants.REPO_CSV_PATH} does not exist. Please run choice 1 first.",
     )
-    df_repos = pd.read_csv(constants.REPO_CSV_PATH)
+    df_repos = github_api.storage.read(constants.REPO_CSV_PATH)
 
-    check_file_exists(
+    check_table_exists(
+        github_api.storage,
         constants.FORK_CSV_PATH,
         f"{constants.FORK_CSV_PATH} does not exist. Please run choice 2 first.",
     )
-    df_forks = pd.read_csv(constants.FORK_CSV_PATH)
-    filter_forks = df_forks[df_forks["teammate"] == name]
+    df_forks = github_api.storage.read(constants.FORK_CSV_PATH)
+    filter_forks = team_rows(github_api, df_forks, name)
+
+    # Never-pushed forks are inactive: skip their compare requests
+    if "fork_pushed_at" in filter_forks and not github_api.args.no_prefilter:
+        inactive = never_pushed_forks(filter_forks)
+        print(
+            f"⏩ Skipping {inactive.sum()} of {len(filter_forks)} forks that were never pushed to (inactive)"
+        )
+        filter_forks = filter_forks[~inactive]
 
-    # Resume from last processed fork
+    # Resume from the checkpoints
     resume_log_path = constants.RESUME_LOG_PATH_FORK_COMMIT
-    last_processed_fork = resume_from_checkpoint(resume_log_path, with_page=False)
+    start_pages = pending_items(
+        github_api,
+        resume_log_path,
+        filter_forks["fork_id"],
+        constants.FORK_COMMIT_CSV_PATH,
+    )
 
-    for fork_id, fork_owner, fork_name in zip(
-        filter_forks["fork_id"], filter_forks["fork_owner"], filter_forks["fork_name"]
+    pending_repos = filter_forks.loc[
+        filter_forks["fork_id"].astype(str).isin(start_pages), "repo_id"
+    ].astype(str)
+    for fork_id, fork_owner, fork_name in assigned_rows(
+        github_api,
+        filter_forks,
+        ["fork_id", "fork_owner", "fork_name"],
+        4,
+        df_repos,
+        github_api.checkpoints.task_of(resume_log_path),
+        set(pending_repos),
     ):
-        # Resume processing if interrupted
-        if last_processed_fork and str(fork_id) != last_processed_fork:
-            continue  # Skip to the last processed fork
-        if last_processed_fork and str(fork_id) == last_processed_fork:
-            last_processed_fork = None
-            continue
+        if str(fork_id) not in start_pages:
+            continue  # Completed in a previous run
 
         repo_id = df_forks[df_forks["fork_id"] == fork_id]["repo_id"].values[0]
         repo_owner = df_forks[df_forks["fork_id"] == fork_id]["repo_owner"].values[0]
@@ -167,7 +349,12 @@ def handle_fork_commit_data(github_api, name):
             "fork_default_branch"
         ].values[0]
 
-        github_api.get_fork_commit_data(
+        get_fork_commit_data = (
+            github_api.get_fork_commit_data_git
+            if github_api.args.engine == "git"
+            else github_api.get_fork_commit_data
+        )
+        get_fork_commit_data(
             repo_id,
             repo_owner,
             repo_name,
@@ -183,70 +370,104 @@ def handle_fork_commit_data(github_api, name):
 
 def handle_repo_pr_data(github_api, name):
     """Handles repo PR data collection."""
-    check_file_exists(
+    check_table_exists(
+        github_api.storage,
         constants.REPO_CSV_PATH,
         f"{constants.REPO_CSV_PATH} does not exist. Please run choice 1 first.",
     )
-    df_repos = pd.read_csv(constants.REPO_CSV_PATH)
-    filter_repos = df_repos[df_repos["teammate"] == name]
+    df_repos = github_api.storage.read(constants.REPO_CSV_PATH)
+    filter_repos = team_rows(github_api, df_repos, name)
 
-    # Resume from last processed fork
+    # Resume from the checkpoints
     resume_log_path = constants.RESUME_LOG_PATH_REPO_PR
-    last_processed_repo, last_processed_page = resume_from_checkpoint(
-        resume_log_path, with_page=True
+    start_pages = pending_items(
+        github_api, resume_log_path, filter_repos["repo_id"], constants.REPO_PR_CSV_PATH
     )
 
-    for repo_id, repo_owner, repo_name in zip(
-        filter_repos["repo_id"], filter_repos["repo_owner"], filter_repos["repo_name"]
+    for repo_id, repo_owner, repo_name in assigned_rows(
+        github_api,
+        filter_repos,
+        ["repo_id", "repo_owner", "repo_name"],
+        5,
+        df_repos,
+        github_api.checkpoints.task_of(resume_log_path),
+        start_pages,
     ):
-        # Resume processing if interrupted
-        if last_processed_repo and str(repo_id) != last_processed_repo:
-            continue  # Skip to the last processed repo
+        if str(repo_id) not in start_pages:
+            continue  # Completed in a previous run
 
-        github_api.get_repo_pr_data(
+        get_repo_pr_data = (
+            github_api.get_repo_pr_data_bulk
+            if github_api.args.graphql
+            else github_api.get_repo_pr_data
+        )
+        get_repo_pr_data(
             repo_id,
             repo_owner,
             repo_name,
             constants.REPO_PR_CSV_PATH,
             resume_log_path,
-            last_processed_page,
+            start_pages[str(repo_id)],
         )
 
-        last_processed_repo = None  # Reset last processed repo
-        last_processed_page = None  # Reset last processed page
-
 
 def handle_fork_pr_data(github_api, name):
     """Handles fork PR data collection."""
-    check_file_exists(
+    check_table_exists(
+        github_api.storage,
         constants.FORK_CSV_PATH,
         f"{constants.FORK_CSV_PATH} does not exist. Please run choice 2 first.",
     )
-    df_forks = pd.read_csv(constants.FORK_CSV_PATH)
-    filter_forks = df_forks[df_forks["teammate"] == name]
+    df_forks = github_api.storage.read(constants.FORK_CSV_PATH)
+    filter_forks = team_rows(github_api, df_forks, name)
+    df_repos = github_api.storage.read(constants.REPO_CSV_PATH)
 
-    # Resume from last processed fork
+    # Resume from the checkpoints
     resume_log_path = constants.RESUME_LOG_PATH_FORK_PR
-    last_processed_fork = resume_from_checkpoint(resume_log_path, with_page=False)
-
-    for fork_parent_id, fork_id, fork_owner, fork_name in zip(
-        filter_forks["repo_id"],
-        filter_forks["fork_id"],
-        filter_forks["fork_owner"],
-        filter_forks["fork_name"],
+    start_pages = pending_items(
+        github_api, resume_log_path, filter_forks["fork_id"], constants.FORK_PR_CSV_PATH
+    )
+    pending_repos = filter_forks.loc[
+        filter_forks["fork_id"].astype(str).isin(start_pages), "repo_id"
+    ].astype(str)
+
+    pending_forks = []
+    for fork_parent_id, fork_id, fork_owner, fork_name in assigned_rows(
+        github_api,
+        filter_forks,
+        ["repo_id", "fork_id", "fork_owner", "fork_name"],
+        6,
+        df_repos,
+        github_api.checkpoints.task_of(resume_log_path),
+        set(pending_repos),
     ):
-        # Resume processing if interrupted
-        if last_processed_fork and str(fork_id) != last_processed_fork:
-            continue  # Skip to the last processed fork
-        if last_processed_fork and str(fork_id) == last_processed_fork:
-            last_processed_fork = None  # Reset last processed fork
+        if str(fork_id) not in start_pages:
+            continue  # Completed in a previous run
+
+        if not github_api.args.graphql:
+            github_api.get_fork_pr_data(
+                fork_parent_id,
+                fork_id,
+                fork_owner,
+                fork_name,
+                constants.FORK_PR_CSV_PATH,
+                constants.RESUME_LOG_PATH_FORK_PR,
+            )
             continue
 
-        github_api.get_fork_pr_data(
-            fork_parent_id,
-            fork_id,
-            fork_owner,
-            fork_name,
+        # Count the PRs of many forks per GraphQL query
+        pending_forks.append((fork_parent_id, fork_id, fork_owner, fork_name))
+        if len(pending_forks) == github_api.args.graphql_batch_size:
+            github_api.get_fork_pr_data_batch(
+                pending_forks,
+                constants.FORK_PR_CSV_PATH,
+                constants.RESUME_LOG_PATH_FORK_PR,
+            )
+            pending_forks = []
+
+    if pending_forks:
+        github_api.get_fork_pr_data_batch(
+            pending_forks,
             constants.FORK_PR_CSV_PATH,
             constants.RESUME_LOG_PATH_FORK_PR,
         )
@@ -254,25 +475,64 @@ def handle_fork_pr_data(github_api, name):
 
 def handle_star_data(github_api, name):
     """Handles fork data collection."""
-    check_file_exists(
+    check_table_exists(
+        github_api.storage,
         constants.REPO_CSV_PATH,
         f"{constants.REPO_CSV_PATH} does not exist. Please run choice 1 first.",
     )
-    df_repos = pd.read_csv(constants.REPO_CSV_PATH)
-    filter_repos = df_repos[df_repos["teammate"] == name]
+    df_repos = github_api.storage.read(constants.REPO_CSV_PATH)
+    filter_repos = team_rows(github_api, df_repos, name)
+
+    if getattr(github_api.args, "star_mode", "full") == "window":
+        # Only count the stars of the years used by preprocess_sustainability_data
+        resume_log_path = constants.RESUME_LOG_PATH_STAR_COUNT
+        start_pages = pending_items(
+            github_api,
+            resume_log_path,
+            filter_repos["repo_id"],
+            constants.STAR_COUNT_CSV_PATH,
+        )
 
-    # Resume from last processed fork
+        for repo_id, repo_owner, repo_name, num_stars in assigned_rows(
+            github_api,
+            filter_repos,
+            ["repo_id", "repo_owner", "repo_name", "num_stars"],
+            7,
+            df_repos,
+            github_api.checkpoints.task_of(resume_log_path),
+            start_pages,
+        ):
+            if str(repo_id) not in start_pages:
+                continue  # Completed in a previous run
+
+            github_api.get_star_count_data(
+                repo_id,
+                repo_owner,
+                repo_name,
+                constants.STAR_YEARS,
+                constants.STAR_COUNT_CSV_PATH,
+                resume_log_path,
+                num_stars=None if pd.isna(num_stars) else int(num_stars),
+            )
+        return
+
+    # Resume from the checkpoints
     resume_log_path = constants.RESUME_LOG_PATH_STAR
-    last_processed_repo, last_processed_page = resume_from_checkpoint(
-        resume_log_path, with_page=True
+    start_pages = pending_items(
+        github_api, resume_log_path, filter_repos["repo_id"], constants.STAR_CSV_PATH
     )
 
-    for repo_id, repo_owner, repo_name in zip(
-        filter_repos["repo_id"], filter_repos["repo_owner"], filter_repos["repo_name"]
+    for repo_id, repo_owner, repo_name in assigned_rows(
+        github_api,
+        filter_repos,
+        ["repo_id", "repo_owner", "repo_name"],
+        7,
+        df_repos,
+        github_api.checkpoints.task_of(resume_log_path),
+        start_pages,
     ):
-        # Resume processing if interrupted
-        if last_processed_repo and str(repo_id) != last_processed_repo:
-            continue  # Skip to the last processed repo
+        if str(repo_id) not in start_pages:
+            continue  # Completed in a previous run
 
         github_api.get_star_data(
             repo_id,
@@ -280,34 +540,42 @@ def handle_star_data(github_api, name):
             repo_name,
             constants.STAR_CSV_PATH,
             resume_log_path,
-            last_processed_page,
+            start_pages[str(repo_id)],
         )
 
-        last_processed_repo = None  # Reset last processed repo
-        last_processed_page = None  # Reset last processed page
-
 
 def handle_release_data(github_api, name):
     """Handles fork data collection."""
-    check_file_exists(
+    check_table_exists(
+        github_api.storage,
         constants.REPO_CSV_PATH,
         f"{constants.REPO_CSV_PATH} does not exist. Please run choice 1 first.",
     )
-    df_repos = pd.read_csv(constants.REPO_CSV_PATH)
-    filter_repos = df_repos[df_repos["teammate"] == name]
+    df_repos = github_api.storage.read(constants.REPO_CSV_PATH)
+    filter_repos = team_rows(github_api, df_repos, name)
+
+    # Only the releases of a window are needed unless the full history is requested
+    release_mode = getattr(github_api.args, "release_mode", "full")
+    since = github_api.args.release_since if release_mode != "full" else None
+    until = github_api.args.release_until if release_mode != "full" else None
 
-    # Resume from last processed fork
+    # Resume from the checkpoints
     resume_log_path = constants.RESUME_LOG_PATH_RELEASE
-    last_processed_repo, last_processed_page = resume_from_checkpoint(
-        resume_log_path, with_page=True
+    start_pages = pending_items(
+        github_api, resume_log_path, filter_repos["repo_id"], constants.RELEASE_CSV_PATH
     )
 
-    for repo_id, repo_owner, repo_name in zip(
-        filter_repos["repo_id"], filter_repos["repo_owner"], filter_repos["repo_name"]
+    for repo_id, repo_owner, repo_name in assigned_rows(
+        github_api,
+        filter_repos,
+        ["repo_id", "repo_owner", "repo_name"],
+        8,
+        df_repos,
+        github_api.checkpoints.task_of(resume_log_path),
+        start_pages,
     ):
-        # Resume processing if interrupted
-        if last_processed_repo and str(repo_id) != last_processed_repo:
-            continue  # Skip to the last processed repo
+        if str(repo_id) not in start_pages:
+            continue  # Completed in a previous run
 
         github_api.get_release_data(
             repo_id,
@@ -315,23 +583,96 @@ def handle_release_data(github_api, name):
             repo_name,
             constants.RELEASE_CSV_PATH,
             resume_log_path,
-            last_processed_page,
+            start_pages[str(repo_id)],
+            since=since,
+            until=until,
+            first_only=release_mode == "predicate",
         )
 
-        last_processed_repo = None  # Reset last processed repo
-        last_processed_page = None  # Reset last processed page
 
+def handle_commit_stats(github_api, name):
+    """Handles commit size collection from local git mirrors."""
+    check_table_exists(
+        github_api.storage,
+        constants.REPO_CSV_PATH,
+        f"{constants.REPO_CSV_PATH} does not exist. Please run choice 1 first.",
+    )
+    df_repos = github_api.storage.read(constants.REPO_CSV_PATH)
+    filter_repos = team_rows(github_api, df_repos, name)
 
-def preprocess_sustainability_data(teammate):
-    # Load datasets
-    repo_info = pd.read_csv(constants.REPO_CSV_PATH)
+    # Forks with commits of their own are fetched into the mirror of their repo
+    forks_with_commits = pd.DataFrame(columns=["repo_id", "fork_id"])
+    if github_api.storage.exists(constants.FORK_COMMIT_CSV_PATH):
+        forks_with_commits = github_api.storage.read(
+            constants.FORK_COMMIT_CSV_PATH,
+            columns=["repo_id", "fork_id"],
+            repo_ids=filter_repos["repo_id"],
+        ).drop_duplicates()
+    if not forks_with_commits.empty:
+        df_forks = github_api.storage.read(
+            constants.FORK_CSV_PATH,
+            columns=["fork_id", "fork_owner", "fork_name", "fork_default_branch"],
+        )
+        forks_with_commits = forks_with_commits.merge(df_forks, on="fork_id")
+
+    # Resume from the checkpoints
+    resume_log_path = constants.RESUME_LOG_PATH_COMMIT_STATS
+    start_pages = pending_items(
+        github_api,
+        resume_log_path,
+        filter_repos["repo_id"],
+        constants.COMMIT_STATS_CSV_PATH,
+    )
+
+    for repo_id, repo_owner, repo_name, repo_default_branch in assigned_rows(
+        github_api,
+        filter_repos,
+        ["repo_id", "repo_owner", "repo_name", "default_branch"],
+        9,
+        df_repos,
+        github_api.checkpoints.task_of(resume_log_path),
+        start_pages,
+    ):
+        if str(repo_id) not in start_pages:
+            continue  # Completed in a previous run
+
+        repo_forks = forks_with_commits[forks_with_commits["repo_id"] == repo_id]
+        github_api.get_commit_stats(
+            repo_id,
+            repo_owner,
+            repo_name,
+            repo_default_branch,
+            list(
+                zip(
+                    repo_forks["fork_id"],
+                    repo_forks["fork_owner"],
+                    repo_forks["fork_name"],
+                    repo_forks["fork_default_branch"],
+                )
+            ),
+            constants.COMMIT_STATS_CSV_PATH,
+            resume_log_path,
+        )
+
+
+def preprocess_sustainability_data(teammate, storage):
+    # Load datasets (only the columns and repos that are used)
+    repo_columns = ["repo_id", "repo_owner", "repo_name", "is_archived", "num_stars"]
+    if teammate is not None:
+        repo_columns.append("teammate")
+    repo_info = storage.read(constants.REPO_CSV_PATH, columns=repo_columns)
     project_list = pd.read_csv(constants.PROJECTS_LIST)
-    star_info = pd.read_csv(constants.STAR_CSV_PATH)
-    release_info = pd.read_csv(constants.RELEASE_CSV_PATH)
 
     # Merge 'status' from project_list into repo_info
+    repo_ids = None
     if teammate is not None:
         repo_info = repo_info[repo_info["teammate"] == teammate]
+        repo_ids = repo_info["repo_id"].unique()
+    release_info = storage.read(
+        constants.RELEASE_CSV_PATH,
+        columns=["repo_id", "release_published_at"],
+        repo_ids=repo_ids,
+    )
     repo_info = repo_info.merge(
         project_list[["pj_alias", "status"]],
         left_on="repo_name",
@@ -339,35 +680,75 @@ def preprocess_sustainability_data(teammate):
         how="left",
     )
 
-    # Convert 'starred_at' and 'release_published_at' to datetime
-    star_info["starred_at"] = pd.to_datetime(star_info["starred_at"])
+    # Convert 'release_published_at' to datetime and extract the year
     release_info["release_published_at"] = pd.to_datetime(
         release_info["release_published_at"]
     )
-
-    # Extract year from 'starred_at' and 'release_published_at'
-    star_info["year"] = star_info["starred_at"].dt.year
     release_info["year"] = release_info["release_published_at"].dt.year
 
     # Define the years of interest
-    years_of_interest = [2022, 2023, 2024]
+    years_of_interest = constants.STAR_YEARS
     last_year = 2024
 
-    # Filter star_info for the years of interest
-    filtered_stars = star_info[star_info["year"].isin(years_of_interest)]
-    stars_per_year = (
-        filtered_stars.groupby(["repo_id", "year"]).size().unstack(fill_value=0)
-    )
-    for year in years_of_interest:
-        if year not in stars_per_year.columns:
-            stars_per_year[year] = 0
-    stars_per_year = stars_per_year[years_of_interest]
+    def stargazer_counts():
+        """Counts the stars of every year from the full stargazer list.
+
+        Years after the last listed star of a repo are left empty (NaN), as
+        the listing may have ended before them (it stops at 40,000 stars).
+        """
+        star_info = storage.read(
+            constants.STAR_CSV_PATH, columns=["repo_id", "starred_at"], repo_ids=repo_ids
+        )
+        star_info["starred_at"] = pd.to_datetime(star_info["starred_at"])
+        star_info["year"] = star_info["starred_at"].dt.year
+
+        # Filter star_info for the years of interest
+        filtered_stars = star_info[star_info["year"].isin(years_of_interest)]
+        counts = filtered_stars.groupby(["repo_id", "year"]).size().unstack(fill_value=0)
+        counts = counts.reindex(
+            index=star_info["repo_id"].unique(), columns=years_of_interest, fill_value=0
+        )
+        last_year_listed = star_info.groupby("repo_id")["year"].max()
+        listed = pd.DataFrame(
+            {
+                year: last_year_listed.reindex(counts.index) > year
+                for year in years_of_interest
+            }
+        )
+        return counts.where(listed)
+
+    if storage.exists(constants.STAR_COUNT_CSV_PATH):
+        # Use the yearly star counts collected with '--star_mode window'
+        star_counts = storage.read(
+            constants.STAR_COUNT_CSV_PATH,
+            columns=["repo_id", "year", "num_stars"],
+            repo_ids=repo_ids,
+        )
+        filtered_counts = star_counts[star_counts["year"].isin(years_of_interest)]
+        # Counts the collection could not find stay unknown (NaN), not 0
+        stars_per_year = (
+            filtered_counts.groupby(["repo_id", "year"])["num_stars"].max().unstack()
+        )
+        stars_per_year = stars_per_year.reindex(columns=years_of_interest)
+        if stars_per_year.isna().any().any() and storage.exists(constants.STAR_CSV_PATH):
+            # Fill them in from the stargazer list where it covers the year
+            stars_per_year = stars_per_year.fillna(stargazer_counts())
+    else:
+        stars_per_year = stargazer_counts()
+    stars_per_year = stars_per_year.reindex(columns=years_of_interest)
 
     # Check if the number of stars in each of the last 3 years is greater than 0
-    stars_per_year["stars_last_3_years"] = stars_per_year.values.tolist()
+    # (unknown if a count is missing and none of the known ones is 0)
+    known = stars_per_year[years_of_interest].notna().all(axis=1)
+    any_zero = stars_per_year[years_of_interest].eq(0).any(axis=1)
+    stars_per_year["stars_last_3_years"] = [
+        [None if pd.isna(count) else int(count) for count in counts]
+        for counts in stars_per_year[years_of_interest].values.tolist()
+    ]
     stars_per_year["all_years_gt_zero"] = (
-        stars_per_year[years_of_interest].gt(0).all(axis=1)
+        stars_per_year[years_of_interest].gt(0).all(axis=1).astype(object)
     )
+    stars_per_year.loc[~known & ~any_zero, "all_years_gt_zero"] = None
 
     # Merge the aggregated star information into 'repo_info'
     stars_aggregated = stars_per_year[
@@ -377,8 +758,11 @@ def preprocess_sustainability_data(teammate):
     repo_info["stars_last_3_years"] = repo_info["stars_last_3_years"].apply(
         lambda x: x if isinstance(x, list) else [0, 0, 0]
     )  # Fill NaN values with appropriate defaults
-    repo_info["all_years_gt_zero"] = repo_info["all_years_gt_zero"].fillna(
-        False
+    stars_unknown = repo_info["repo_id"].isin(
+        stars_per_year.index[stars_per_year["all_years_gt_zero"].isna()]
+    )
+    repo_info["all_years_gt_zero"] = (
+        repo_info["all_years_gt_zero"].fillna(False).astype(bool)
     )  # Fill NaN values with appropriate defaults
 
     # Filter release_info for the last year
@@ -402,6 +786,19 @@ def preprocess_sustainability_data(teammate):
         & (repo_info["all_years_gt_zero"] | (repo_info["releases_last_year"] > 0))
     ).astype(int)
 
+    # Repos with unknown star counts can only be labelled through their releases
+    undecided = (
+        stars_unknown
+        & (repo_info["status"] != 2)
+        & (~repo_info["is_archived"])
+        & (repo_info["releases_last_year"] == 0)
+    )
+    if undecided.any():
+        print(
+            f"❗ Star counts of {undecided.sum()} repos are unknown, so they are left out: {', '.join(repo_info.loc[undecided, 'repo_name'])}"
+        )
+        repo_info = repo_info[~undecided]
+
     # Reorder columns if necessary
     new_order = [
         "repo_id",
@@ -416,39 +813,78 @@ def preprocess_sustainability_data(teammate):
     ]
     repo_info = repo_info[new_order]
 
-    # Save the updated DataFrame to a CSV file
-    repo_info.to_csv(constants.SUSTAINABILITY_CSV_PATH, index=False)
+    # Save the updated DataFrame
+    storage.write_table(repo_info, constants.SUSTAINABILITY_CSV_PATH)
 
     # Display the updated DataFrame
     print(repo_info.head())
 
 
-def preprocess_fork_data(teammate):
-    # Load datasets
-    fork_info = pd.read_csv(constants.FORK_CSV_PATH)
-    repo_commit_info = pd.read_csv(constants.REPO_COMMIT_CSV_PATH)
-    fork_commit_info = pd.read_csv(constants.FORK_COMMIT_CSV_PATH)
-    repo_pr_info = pd.read_csv(constants.REPO_PR_CSV_PATH)
-    fork_pr_info = pd.read_csv(constants.FORK_PR_CSV_PATH)
-
-    # Mark the repo commits with fork information
-    repo_commit_info["commit_author_id"] = repo_commit_info["commit_author_id"].astype(
-        str
+def preprocess_fork_data(teammate, storage):
+    # Load datasets (only the columns and repos that are used)
+    fork_columns = [
+        "repo_id",
+        "repo_owner",
+        "repo_name",
+        "fork_id",
+        "fork_owner",
+        "fork_name",
+        "fork_owner_id",
+        "fork_created_at",
+    ]
+    if teammate is not None:
+        fork_columns.append("teammate")
+    fork_info = storage.read(constants.FORK_CSV_PATH, columns=fork_columns)
+    repo_ids = None
+    if teammate is not None:
+        repo_ids = fork_info.loc[fork_info["teammate"] == teammate, "repo_id"].unique()
+    fork_commit_info = storage.read(constants.FORK_COMMIT_CSV_PATH, repo_ids=repo_ids)
+    fork_pr_info = storage.read(
+        constants.FORK_PR_CSV_PATH,
+        columns=["fork_id", "has_more_than_two_pr"],
+        repo_ids=repo_ids,
     )
-    fork_info["fork_owner_id"] = fork_info["fork_owner_id"].astype(str)
 
-    repo_commit_with_fork_df = pd.merge(
-        repo_commit_info,
-        fork_info[["repo_id", "fork_id", "fork_owner", "fork_name", "fork_owner_id"]],
-        left_on=["commit_author_id", "repo_id"],
-        right_on=["fork_owner_id", "repo_id"],
-        how="left",
-    ).assign(is_in_main_repo=True)
+    if storage.name == "sqlite":
+        # Join the repo commits with the forks of their authors on the indexed tables
+        repo_commit_with_fork_df, nan_count = storage.repo_commits_by_forks(repo_ids)
+        repo_commit_with_fork_df["is_in_main_repo"] = True
+    else:
+        repo_commit_info = storage.read(
+            constants.REPO_COMMIT_CSV_PATH,
+            columns=[
+                "repo_id",
+                "commit_sha",
+                "commit_author",
+                "commit_author_id",
+                "commit_size",
+                "commit_created_at",
+                "commit_pushed_at",
+            ],
+            repo_ids=repo_ids,
+        )
+
+        # Mark the repo commits with fork information
+        repo_commit_info["commit_author_id"] = repo_commit_info[
+            "commit_author_id"
+        ].astype(str)
+        fork_info["fork_owner_id"] = fork_info["fork_owner_id"].astype(str)
+
+        repo_commit_with_fork_df = pd.merge(
+            repo_commit_info,
+            fork_info[
+                ["repo_id", "fork_id", "fork_owner", "fork_name", "fork_owner_id"]
+            ],
+            left_on=["commit_author_id", "repo_id"],
+            right_on=["fork_owner_id", "repo_id"],
+            how="left",
+        ).assign(is_in_main_repo=True)
+
+        # Count the number of fork_id is NA and drop thoes rows
+        nan_count = repo_commit_with_fork_df["fork_id"].isna().sum()
+        repo_commit_with_fork_df = repo_commit_with_fork_df.dropna(subset=["fork_id"])
 
-    # Count the number of fork_id is NA and drop thoes rows
-    nan_count = repo_commit_with_fork_df["fork_id"].isna().sum()
     print(f"❗ Number of rows in repo_commit with NaN fork_id: {nan_count}!")
-    repo_commit_with_fork_df = repo_commit_with_fork_df.dropna(subset=["fork_id"])
 
     # Select and reorder the columns
     repo_commit_with_fork_df = repo_commit_with_fork_df[
@@ -474,23 +910,60 @@ def preprocess_fork_data(teammate):
         subset="commit_sha", keep="first"
     )
 
+    # Backfill the commit sizes computed from the git mirrors (choice 9)
+    if storage.exists(constants.COMMIT_STATS_CSV_PATH):
+        commit_sizes = (
+            storage.read(
+                constants.COMMIT_STATS_CSV_PATH,
+                columns=["commit_sha", "commit_size"],
+                repo_ids=repo_ids,
+            )
+            .drop_duplicates(subset="commit_sha")
+            .set_index("commit_sha")["commit_size"]
+        )
+        commit_df["commit_size"] = (
+            commit_df["commit_sha"]
+            .map(commit_sizes)
+            .fillna(commit_df["commit_size"])
+            .fillna(0)
+            .astype(int)
+        )
+
     # Merge commits with PR information
-    # Convert string representations of lists to actual lists, if necessary
-    def safe_literal_eval(val):
-        try:
-            if pd.isna(val):
-                return np.nan  # or return an empty list: []
-            return ast.literal_eval(val)
-        except (ValueError, SyntaxError):
-            return val
+    if storage.name == "sqlite":
+        # One row per (PR, commit) from the indexed pr_commits table
+        repo_pr_info_exploded = storage.pr_commits(repo_ids)
+    else:
+        repo_pr_info = storage.read(
+            constants.REPO_PR_CSV_PATH,
+            columns=[
+                "pr_id",
+                "pr_associated_commits",
+                "pr_state",
+                "pr_created_at",
+                "pr_merged_at",
+                "pr_closed_at",
+                "pr_review_comments",
+            ],
+            repo_ids=repo_ids,
+        )
 
-    if isinstance(repo_pr_info["pr_associated_commits"].iloc[0], str):
-        repo_pr_info["pr_associated_commits"] = repo_pr_info[
-            "pr_associated_commits"
-        ].apply(safe_literal_eval)
+        # Convert string representations of lists to actual lists, if necessary
+        def safe_literal_eval(val):
+            try:
+                if pd.isna(val):
+                    return np.nan  # or return an empty list: []
+                return ast.literal_eval(val)
+            except (ValueError, SyntaxError):
+                return val
 
-    # Explode the 'pr_associated_commits' column
-    repo_pr_info_exploded = repo_pr_info.explode("pr_associated_commits")
+        if isinstance(repo_pr_info["pr_associated_commits"].iloc[0], str):
+            repo_pr_info["pr_associated_commits"] = repo_pr_info[
+                "pr_associated_commits"
+            ].apply(safe_literal_eval)
+
+        # Explode the 'pr_associated_commits' column
+        repo_pr_info_exploded = repo_pr_info.explode("pr_associated_commits")
 
     commit_with_pr_df = pd.merge(
         commit_df,
@@ -666,22 +1139,31 @@ def preprocess_fork_data(teammate):
         how="left",
     )
 
-    # Save the final DataFrame to a CSV file
-    final_df.to_csv(constants.REPO_FORK_COMMIT_PR_CSV_PATH, index=False)
+    # Save the final DataFrame
+    storage.write_table(final_df, constants.REPO_FORK_COMMIT_PR_CSV_PATH)
 
     # Display the final DataFrame
     print(final_df.head())
 
 
-def preprocess_final_data(teammate):
-    # Load the CSV files into DataFrames
-    repo_data = pd.read_csv(constants.REPO_CSV_PATH)
-    fork_data = pd.read_csv(constants.REPO_FORK_COMMIT_PR_CSV_PATH)
-    sustainability_data = pd.read_csv(constants.SUSTAINABILITY_CSV_PATH)
+def preprocess_final_data(teammate, storage):
+    # Load the tables into DataFrames (only the columns and repos that are used)
+    repo_columns = ["repo_id", "repo_owner", "repo_name", "created_at", "project_size"]
+    if teammate is not None:
+        repo_columns.append("teammate")
+    repo_data = storage.read(constants.REPO_CSV_PATH, columns=repo_columns)
 
     # Filter repo_data for the specific teammate
+    repo_ids = None
     if teammate is not None:
         repo_data = repo_data[repo_data["teammate"] == teammate]
+        repo_ids = repo_data["repo_id"].unique()
+    fork_data = storage.read(constants.REPO_FORK_COMMIT_PR_CSV_PATH, repo_ids=repo_ids)
+    sustainability_data = storage.read(
+        constants.SUSTAINABILITY_CSV_PATH,
+        columns=["repo_id", "is_sustaining"],
+        repo_ids=repo_ids,
+    )
 
     # Convert 'created_at' to datetime and calculate 'project_age'
     repo_data["created_at"] = pd.to_datetime(repo_data["created_at"], utc=True)
@@ -776,6 +1258,11 @@ def preprocess_final_data(teammate):
     # Filter out commits that don't fall into any interval
     fork_data = fork_data.dropna(subset=["interval_index"])
 
+    # Lines changed by the merged commits (sizes come from choice 9)
+    fork_data["merged_commit_size"] = fork_data["commit_size"].where(
+        fork_data["is_merged"], 0
+    )
+
     # Aggregate commit information at the repo level
     repo_grouped = (
         fork_data.groupby("repo_id")
@@ -784,10 +1271,7 @@ def preprocess_final_data(teammate):
             hard_forks_count=("hard_fork", "sum"),
             inactive_forks_count=("inactive_fork", "sum"),
             merged_commits_count=("is_merged", "sum"),
-            #merged_commits_size=(
-            #    "commit_size",
-            #    lambda x: x[fork_data["is_merged"]].sum(),
-            #),
+            merged_commits_size=("merged_commit_size", "sum"),
             not_merged_commits_count=("is_not_merged", "sum"),
             not_contributed_back_commits_count=("not_contributed_back", "sum"),
         )
@@ -955,6 +1439,8 @@ def preprocess_final_data(teammate):
         on="repo_id",
         how="left",
     )
+    # Repos left out of the sustainability step have no label
+    final_df = final_df.dropna(subset=["is_sustaining"])
 
     # Save the final DataFrame to a CSV file
     final_df.to_csv(constants.FINAL_CSV_PATH, index=False)
@@ -967,10 +1453,11 @@ def dataget(args):
     """Handles data collection based on the specified case."""
     load_dotenv()
     token = os.getenv("GITHUB_TOKEN")
-    if not token:
+    github_api = API(args, token)
+    if not github_api.tokens.tokens:
         print("Error: No GitHub token provided.")
         exit(1)
-    github_api = API(args, token)
+    print(f"🔑 Collecting with {len(github_api.tokens.tokens)} GitHub token(s)")
 
     choice_handlers = {
         1: handle_repo_data,
@@ -981,19 +1468,87 @@ def dataget(args):
         6: handle_fork_pr_data,
         7: handle_star_data,
         8: handle_release_data,
+        9: handle_commit_stats,
     }
 
     handler = choice_handlers.get(args.choice)
-    if handler:
-        handler(github_api, args.name)
-    else:
-        print("Error: Invalid choice.")
-        exit(1)
+    # Buffered rows and the final metrics are written however the run ends
+    # (errors, exit(1) or Ctrl-C included)
+    try:
+        if args.workers and (handler or args.join):
+            run_workers(args, github_api, handler)
+            return
+        if handler and args.concurrency > 1:
+            # Queue the handler's API calls and run them concurrently
+            collector = ThreadPoolCollector(github_api, args.concurrency)
+            handler(collector, args.name)
+            collector.run()
+        elif handler:
+            handler(github_api, args.name)
+        else:
+            print("Error: Invalid choice.")
+            exit(1)
+    finally:
+        github_api.close()
+
+    github_api.print_connection_stats()
+    github_api.print_cache_stats()
+    github_api.print_token_stats()
+    github_api.print_metrics_stats()
+
+
+def run_workers(args, github_api, handler):
+    """Queues the API calls of a handler, then runs them in `--workers` processes.
+
+    Each worker process claims jobs from the queue file and collects them with
+    one token of the pool. With `--join`, nothing is queued: the workers help
+    with the jobs another dataget run on this host queued in the same file.
+    """
+    queue = WorkQueue(args.queue_path)
+    if not args.join:
+        producer = QueueProducer(github_api, queue, args.choice)
+        handler(producer, args.name)
+        print(f"📥 Queued {producer.queued} jobs in {args.queue_path}")
+    github_api.close()  # The workers write the output from here on
+
+    tokens = github_api.tokens.tokens
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(
+            target=run_worker,
+            args=(args, tokens[i % len(tokens)], args.lease_seconds),
+        )
+        for i in range(args.workers)
+    ]
+    print(
+        f"🚀 Starting {len(workers)} worker processes with {min(len(workers), len(tokens))} token(s)"
+    )
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    counts = queue.counts()
+    queue.close()
+    print(
+        f"🏁 Queue: {counts.get('done', 0)} jobs done, {counts.get('failed', 0)} failed, {counts.get('queued', 0) + counts.get('leased', 0)} left"
+    )
+
+
+def convert_tables(teammate, storage):
+    """Converts the CSV tables of the pipeline to the selected storage backend."""
+    csv_storage = CSVStorage()
+    for csv_path in constants.STORAGE_TABLES:
+        if storage.path(csv_path) == csv_path or not csv_storage.exists(csv_path):
+            continue
+        storage.write_table(csv_storage.read(csv_path), csv_path)
+        print(f"✅ {csv_path} converted to {storage.path(csv_path)}")
 
 
 def datapre(args):
     """Handles dataset preprocessing (to be implemented)."""
     step_handlers = {
+        0: convert_tables,
         1: preprocess_sustainability_data,
         2: preprocess_fork_data,
         3: preprocess_final_data,
@@ -1001,7 +1556,7 @@ def datapre(args):
 
     handler = step_handlers.get(args.step)
     if handler:
-        handler(args.name)
+        handler(args.name, get_storage(args.storage, args.database_path))
     else:
         print("Error: Invalid step.")
         exit(1)
@@ -1089,28 +1644,266 @@ def main():
     data_get.add_argument(
         "--choice",
         type=int,
-        choices=[1, 2, 3, 4, 5, 6, 7, 8],
-        help="Specify the data to be collected (1: repo, 2: fork, 3: repo commit, 4: fork commit, 5: repo PR, 6: fork PR; 7: star; 8: release)",
+        choices=[1, 2, 3, 4, 5, 6, 7, 8, 9],
+        help="Specify the data to be collected (1: repo, 2: fork, 3: repo commit, 4: fork commit, 5: repo PR, 6: fork PR; 7: star; 8: release; 9: commit size from git)",
     )
     data_get.add_argument(
         "--name",
         type=str,
         help="Specify the teammate name responsible for the data collection",
     )
+    data_get.add_argument(
+        "--num_shards",
+        type=int,
+        help="Split the repos over this many shards by estimated API cost instead of the teammate column (choices 2-9)",
+    )
+    data_get.add_argument(
+        "--shard",
+        type=int,
+        default=0,
+        help="Specify the shard collected by this run (0 to num_shards - 1)",
+    )
+    data_get.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Specify the number of repos/forks collected at the same time, which also caps the API requests in flight (1: sequential collection)",
+    )
+    data_get.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Queue the collection jobs and run them in this many processes, one token each",
+    )
+    data_get.add_argument(
+        "--queue_path",
+        type=str,
+        default=constants.QUEUE_PATH,
+        help="Specify the SQLite job queue of the worker processes (on a local disk, shared by the dataget runs of this host)",
+    )
+    data_get.add_argument(
+        "--join",
+        action="store_true",
+        help="Only start workers for the jobs already in the queue",
+    )
+    data_get.add_argument(
+        "--lease_seconds",
+        type=int,
+        default=constants.LEASE_SECONDS,
+        help="Specify how long a job (or a sharded repo) stays claimed by a worker (or shard) that stops renewing it",
+    )
+    data_get.add_argument(
+        "--api_url",
+        type=str,
+        default=constants.API_URL,
+        help="Specify the base URL of the GitHub API (e.g. a local benchmark/mock_server.py)",
+    )
+    data_get.add_argument(
+        "--metrics_path",
+        type=str,
+        default=constants.METRICS_PATH,
+        help="Specify the file the request metrics are exported to in the Prometheus text format (empty: no export)",
+    )
+    data_get.add_argument(
+        "--metrics_seconds",
+        type=float,
+        default=constants.METRICS_SECONDS,
+        help="Specify how often the metrics file is rewritten",
+    )
+    data_get.add_argument(
+        "--progress_seconds",
+        type=float,
+        default=constants.PROGRESS_SECONDS,
+        help="Specify how often the progress (items/s, pages, quota, ETA) is printed",
+    )
+    data_get.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Print the progress as JSON lines instead of a message per page or item",
+    )
+    data_get.add_argument(
+        "--token_file",
+        type=str,
+        help="Specify a file with one GitHub token per line to add to the token pool",
+    )
+    data_get.add_argument(
+        "--page_workers",
+        type=int,
+        default=4,
+        help="Specify how many pages of one paginated endpoint are fetched at the same time",
+    )
+    data_get.add_argument(
+        "--burst",
+        type=int,
+        default=100,
+        help="Specify how many requests per token may be sent back-to-back before pacing starts",
+    )
+    data_get.add_argument(
+        "--star_mode",
+        type=str,
+        choices=["full", "window"],
+        default="full",
+        help="Specify how stars are collected (full: every stargazer; window: only the number of stars per year in STAR_YEARS) (choice 7)",
+    )
+    data_get.add_argument(
+        "--release_mode",
+        type=str,
+        choices=["full", "window", "predicate"],
+        default="full",
+        help="Specify how releases are collected (full: whole history; window: releases published in [release_since, release_until); predicate: only the first release in that window) (choice 8)",
+    )
+    data_get.add_argument(
+        "--release_since",
+        type=str,
+        default=constants.RELEASE_WINDOW_START,
+        help="Specify the start of the release window (ISO 8601, inclusive)",
+    )
+    data_get.add_argument(
+        "--release_until",
+        type=str,
+        default=constants.RELEASE_WINDOW_END,
+        help="Specify the end of the release window (ISO 8601, exclusive)",
+    )
+    data_get.add_argument(
+        "--commit_since",
+        type=str,
+        help="Only collect repo commits after this date (ISO 8601) (choice 3)",
+    )
+    data_get.add_argument(
+        "--commit_until",
+        type=str,
+        help="Only collect repo commits before this date (ISO 8601) (choice 3)",
+    )
+    data_get.add_argument(
+        "--analysis_window",
+        action="store_true",
+        help="Only collect repo commits in the ten yearly intervals used by datapre --step 3 (choice 3)",
+    )
+    data_get.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only collect repo commits newer than the newest commit of the last run (choice 3)",
+    )
+    data_get.add_argument(
+        "--checkpoint_path",
+        type=str,
+        default=constants.CHECKPOINT_PATH,
+        help="Specify the SQLite database that records the progress of every choice",
+    )
+    data_get.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the recorded progress of the choice and collect every item again",
+    )
+    data_get.add_argument(
+        "--engine",
+        type=str,
+        choices=["api", "git"],
+        default="api",
+        help="Find fork-only commits with the compare API or in local git mirrors (choice 4)",
+    )
+    data_get.add_argument(
+        "--mirror_dir",
+        type=str,
+        default=constants.MIRROR_DIR,
+        help="Specify the directory of the bare git mirrors (choice 4 with --engine git, choice 9)",
+    )
+    data_get.add_argument(
+        "--git_base_url",
+        type=str,
+        default=constants.GIT_BASE_URL,
+        help="Specify the URL (or local directory) the repos are fetched from as <owner>/<name>.git",
+    )
+    data_get.add_argument(
+        "--no_prefilter",
+        action="store_true",
+        help="Also compare forks that were never pushed to (choice 4)",
+    )
+    data_get.add_argument(
+        "--graphql",
+        action="store_true",
+        help="Use batched GraphQL queries instead of one REST call per item (choices 1, 5, 6)",
+    )
+    data_get.add_argument(
+        "--storage",
+        type=str,
+        choices=["csv", "parquet", "sqlite"],
+        default=constants.STORAGE_BACKEND,
+        help="Specify the storage backend of the collected tables",
+    )
+    data_get.add_argument(
+        "--database_path",
+        type=str,
+        default=constants.DATABASE_PATH,
+        help="Specify the SQLite database of the sqlite storage backend",
+    )
+    data_get.add_argument(
+        "--flush_rows",
+        type=int,
+        default=constants.CSV_FLUSH_ROWS,
+        help="Specify how many output rows are buffered before they are written to CSV",
+    )
+    data_get.add_argument(
+        "--flush_seconds",
+        type=float,
+        default=constants.CSV_FLUSH_SECONDS,
+        help="Specify the maximum number of seconds output rows stay buffered",
+    )
+    data_get.add_argument(
+        "--graphql_batch_size",
+        type=int,
+        default=constants.GRAPHQL_BATCH_SIZE,
+        help="Specify how many items are resolved per GraphQL query",
+    )
+    data_get.add_argument(
+        "--cache_path",
+        type=str,
+        default=constants.HTTP_CACHE_PATH,
+        help="Specify the file of the response cache",
+    )
+    data_get.add_argument(
+        "--no_cache",
+        action="store_true",
+        help="Disable the response cache",
+    )
+    data_get.add_argument(
+        "--cache_max_mb",
+        type=int,
+        default=constants.HTTP_CACHE_MAX_MB,
+        help="Specify the size cap of the response cache in MB (least recently used responses are evicted)",
+    )
+    data_get.add_argument(
+        "--replay",
+        action="store_true",
+        help="Serve every cached response regardless of its age (e.g. to rebuild a CSV after a schema change)",
+    )
 
     # sub parser for data preprocessing
     data_pre = subparsers.add_parser("datapre", help="Preprocessing of dataset")
     data_pre.add_argument(
         "--step",
         type=int,
-        choices=[1, 2, 3],
-        help="Specify the step of data preprocessing (1: sustainability, 2: fork, 3: final)",
+        choices=[0, 1, 2, 3],
+        help="Specify the step of data preprocessing (0: convert CSV tables to --storage, 1: sustainability, 2: fork, 3: final)",
     )
     data_pre.add_argument(
         "--name",
         type=str,
         help="Specify the teammate name for sustainability data preprocessing",
     )
+    data_pre.add_argument(
+        "--storage",
+        type=str,
+        choices=["csv", "parquet", "sqlite"],
+        default=constants.STORAGE_BACKEND,
+        help="Specify the storage backend of the collected and preprocessed tables",
+    )
+    data_pre.add_argument(
+        "--database_path",
+        type=str,
+        default=constants.DATABASE_PATH,
+        help="Specify the SQLite database of the sqlite storage backend",
+    )
 
     # sub parser for dataset analysis
     data_vis = subparsers.add_parser("datavis", help="Visualization of dataset")
@@ -1143,6 +1936,7 @@ def main():
     )
 
     args = parser.parse_args()
+    args.cache_ttls = constants.HTTP_CACHE_TTLS
     if args.subparser_name == "datavis":
         datavis(args)
     elif args.subparser_name == "datapre":
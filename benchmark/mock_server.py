@@ -0,0 +1,534 @@
+"""Offline stand-in for the GitHub API used by the collectors (for benchmarks and tests).
+
+Serves deterministic synthetic data for any `apache/<name>` repository: its
+forks (owned by `user<k>`), commits, compare results, PRs with commits and
+review comments, stargazers and releases, plus the GraphQL queries of
+API/graphql.py. Lists are paginated like GitHub (`per_page`, `page`, `Link`
+headers) and every response carries `X-RateLimit-*` headers of a per-token
+budget. Throttling is simulated with a small `--rate_limit` (403 once a
+token's budget is used up) and `--secondary_every` (403 with `Retry-After`).
+Like GitHub's, the REST stargazer listing ends after 40,000 stars.
+
+Usage:
+    python benchmark/mock_server.py --port 8765 --latency 20
+    python CLI.py dataget --choice 1 --api_url http://127.0.0.1:8765/ --no_cache
+
+GET /_stats returns the served requests per status and endpoint; POST /_reset
+clears them together with the rate-limit budgets.
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlencode, urlparse
+
+DATA_START = 1420070400  # 2015-01-01: first commit, star and release of every repo
+DATA_END = 1735689600  # 2025-01-01
+OWNER = "apache"  # Owner of the upstream repos; forks are owned by user<k>
+MAX_PER_PAGE = 100
+# Average number of items per upstream repo
+DEFAULT_SIZES = {"forks": 20, "commits": 250, "prs": 30, "stars": 300, "releases": 15}
+
+REPOSITORY_ALIAS = re.compile(r'(r\d+): repository\(owner: ("[^"]*"), name: ("[^"]*")\)')
+PULL_REQUEST_ALIAS = re.compile(r"(p\d+): pullRequest\(number: (\d+)\)")
+REPOSITORY_ARGS = re.compile(r'repository\(owner: ("[^"]*"), name: ("[^"]*")\)')
+STARGAZERS_ARGS = re.compile(r'stargazers\(first: (\d+)(?:, after: ("[^"]*"))?')
+# Stargazers listed over REST, like GitHub's 400-page limit
+MAX_LISTED_STARS = 40000
+
+
+def iso(timestamp):
+    return datetime.fromtimestamp(int(timestamp), timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+
+
+def parse_iso(value):
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(
+        tzinfo=timezone.utc
+    ).timestamp()
+
+
+def spread(i, n):
+    """Timestamp of the i-th of n events spread evenly over the data period."""
+    return DATA_START + (DATA_END - DATA_START) * (i + 1) // (n + 1)
+
+
+class SyntheticGitHub:
+    """Deterministic repos, forks and their histories.
+
+    Every repo gets the configured number of items times a factor between 0.5
+    and 1.5 derived from its name, so repos differ in cost but a run always
+    sees the same data. Repos whose name starts with "missing" do not exist,
+    and every tenth fork (user9, user19, ...) was deleted.
+    """
+
+    def __init__(self, **sizes):
+        self.sizes = dict(DEFAULT_SIZES, **sizes)
+
+    @staticmethod
+    def repo_id(name):
+        return zlib.crc32(name.encode()) & 0x7FFFFFF
+
+    def count(self, name, kind):
+        factor = 0.5 + (zlib.crc32(f"{kind}:{name}".encode()) % 101) / 100
+        return int(self.sizes[kind] * factor)
+
+    def exists(self, owner, name):
+        if owner == OWNER:
+            return not name.startswith("missing")
+        match = re.fullmatch(r"user(\d+)", owner)
+        return bool(match) and int(match.group(1)) % 10 != 9
+
+    def sha(self, *parts):
+        return "%08x" % zlib.crc32(":".join(map(str, parts)).encode()) * 5
+
+    def user(self, k):
+        return {"login": f"user{k}", "id": 100000 + k}
+
+    def repo(self, owner, name):
+        repo_id = self.repo_id(name)
+        if owner != OWNER:
+            repo_id = self.fork(name, int(owner[len("user") :]))["id"]
+        return {
+            "id": repo_id,
+            "name": name,
+            "owner": {"login": owner},
+            "created_at": iso(DATA_START),
+            "updated_at": iso(DATA_END),
+            "size": self.count(name, "commits") * 10,
+            "forks_count": self.count(name, "forks") if owner == OWNER else 0,
+            "stargazers_count": self.count(name, "stars") if owner == OWNER else 0,
+            "default_branch": "main",
+            "archived": False,
+            "html_url": f"https://github.com/{owner}/{name}",
+        }
+
+    def graphql_repo(self, owner, name):
+        repo = self.repo(owner, name)
+        return {
+            "databaseId": repo["id"],
+            "name": name,
+            "owner": {"login": owner},
+            "createdAt": repo["created_at"],
+            "diskUsage": repo["size"],
+            "forkCount": repo["forks_count"],
+            "stargazerCount": repo["stargazers_count"],
+            "defaultBranchRef": {"name": "main"},
+            "updatedAt": repo["updated_at"],
+            "isArchived": False,
+            "url": repo["html_url"],
+            "pullRequests": {"totalCount": self.fork_prs(owner)},
+        }
+
+    def fork(self, name, k):
+        created_at = spread(k, self.count(name, "forks"))
+        # A third of the forks were never pushed to (pushed_at == created_at)
+        pushed_at = created_at + (k % 3) * 86400
+        return {
+            "id": self.repo_id(name) * 1000 + k,
+            "name": name,
+            "owner": self.user(k),
+            "default_branch": "main",
+            "created_at": iso(created_at),
+            "pushed_at": iso(pushed_at),
+            "updated_at": iso(pushed_at),
+            "html_url": f"https://github.com/user{k}/{name}",
+            "size": 100 + k,
+        }
+
+    def commit(self, owner, name, i, date):
+        author = None if i % 7 == 0 else self.user(i % 50)
+        return {
+            "sha": self.sha(owner, name, i),
+            "author": author,
+            "commit": {"author": {"date": iso(date)}, "committer": {"date": iso(date)}},
+        }
+
+    def commits(self, name, since=None, until=None):
+        """Commits of the upstream default branch, newest first."""
+        n = self.count(name, "commits")
+        dated = ((i, spread(i, n)) for i in range(n - 1, -1, -1))
+        return [
+            (i, date)
+            for i, date in dated
+            if (since is None or date >= since) and (until is None or date <= until)
+        ]
+
+    def fork_commits(self, name, k):
+        """Commits of fork k that are not in the upstream branch (0 to 4)."""
+        return [] if k % 3 == 0 else list(range(k % 5))
+
+    def pr(self, name, number):
+        created_at = spread(number, self.count(name, "prs"))
+        state = "open" if number % 4 == 0 else "closed"
+        merged = state == "closed" and number % 2 == 1
+        closed_at = iso(created_at + 86400) if state == "closed" else None
+        return {
+            "id": self.repo_id(name) * 10000 + number,
+            "number": number,
+            "created_at": iso(created_at),
+            "state": state,
+            "merged_at": closed_at if merged else None,
+            "closed_at": closed_at,
+        }
+
+    def pr_commits(self, name, number):
+        return [self.sha(name, "pr", number, i) for i in range(1 + number % 3)]
+
+    def pr_comments(self, name, number):
+        return [f"Comment {i} on #{number}" for i in range(number % 4)]
+
+    def fork_prs(self, owner):
+        match = re.fullmatch(r"user(\d+)", owner)
+        return int(match.group(1)) % 4 if match else 0
+
+    def star(self, name, i, star_json):
+        user = self.user(i)
+        if not star_json:
+            return user
+        return {"starred_at": iso(spread(i, self.count(name, "stars"))), "user": user}
+
+    def release(self, name, i):
+        date = iso(spread(i, self.count(name, "releases")))
+        return {
+            "id": self.repo_id(name) * 1000 + i,
+            "tag_name": f"v{i}.0.0",
+            "created_at": date,
+            "published_at": date,
+            "html_url": f"https://github.com/{OWNER}/{name}/releases/tag/v{i}.0.0",
+        }
+
+
+class RateLimits:
+    """Per-token request budgets of the `core` and `graphql` resources."""
+
+    def __init__(self, limit=5000, reset_seconds=3600, secondary_every=0, retry_after=1):
+        self.limit = limit
+        self.reset_seconds = reset_seconds
+        self.secondary_every = secondary_every
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.windows = {}  # (token, resource) -> [used, reset time]
+            self.requests = 0
+
+    def take(self, token, resource):
+        """Counts a request of a token.
+
+        Returns (rate-limit headers, rejection), where rejection is None or a
+        (status, message, extra headers) tuple of a primary or secondary limit.
+        """
+        now = time.time()
+        with self.lock:
+            self.requests += 1
+            window = self.windows.get((token, resource))
+            if window is None or window[1] <= now:
+                window = self.windows[(token, resource)] = [0, now + self.reset_seconds]
+            secondary = self.secondary_every and self.requests % self.secondary_every == 0
+            exhausted = window[0] >= self.limit
+            if not secondary and not exhausted:
+                window[0] += 1
+            used, reset_time = window
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.limit - used),
+            "X-RateLimit-Used": str(used),
+            "X-RateLimit-Reset": str(int(reset_time)),
+            "X-RateLimit-Resource": resource,
+        }
+        if secondary:
+            message = "You have exceeded a secondary rate limit. Please wait a few minutes before you try again."
+            return headers, (403, message, {"Retry-After": str(self.retry_after)})
+        if exhausted:
+            return headers, (403, "API rate limit exceeded", {})
+        return headers, None
+
+
+class Stats:
+    """Requests served per status code and endpoint."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.statuses = {}
+            self.endpoints = {}
+
+    def record(self, endpoint, status):
+        with self.lock:
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            self.endpoints[endpoint] = self.endpoints.get(endpoint, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": sum(self.statuses.values()),
+                "statuses": dict(self.statuses),
+                "endpoints": dict(self.endpoints),
+            }
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Routes the REST and GraphQL requests of API/api.py to the synthetic data."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, like api.github.com
+    # Headers and body are separate writes: without TCP_NODELAY every keep-alive
+    # response waits for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass  # Thousands of requests per benchmark run
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/_stats":
+            return self.send_json(200, self.server.stats.snapshot())
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        if len(parts) < 3 or parts[0] != "repos":
+            return self.reply("other", "core", 404, {"message": "Not Found"})
+        owner, name, route = parts[1], parts[2], parts[3:]
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        endpoint, status, body, total = self.route(owner, name, route, query)
+        if total is None:
+            return self.reply(endpoint, "core", status, body)
+
+        # Paginated list: `body` builds the items of a range of indexes
+        per_page = min(int(query.get("per_page", 30)), MAX_PER_PAGE)
+        page = max(int(query.get("page", 1)), 1)
+        last_page = max(1, -(-total // per_page))
+        start = (page - 1) * per_page
+        items = body(start, min(start + per_page, total)) if start < total else []
+        links = []
+        for rel, number in [("next", page + 1), ("last", last_page)]:
+            if page < last_page:
+                params = dict(query, per_page=per_page, page=number)
+                host = self.headers.get("Host")
+                links.append(f'<http://{host}{url.path}?{urlencode(params)}>; rel="{rel}"')
+        headers = {"Link": ", ".join(links)} if links else {}
+        self.reply(endpoint, "core", 200, items, headers)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = self.rfile.read(length)
+        if self.path == "/_reset":
+            self.server.stats.reset()
+            self.server.limits.reset()
+            return self.send_json(200, {})
+        if self.path != "/graphql":
+            return self.reply("other", "core", 404, {"message": "Not Found"})
+        self.reply("graphql", "graphql", 200, self.graphql(json.loads(payload)["query"]))
+
+    def route(self, owner, name, route, query):
+        """Returns (endpoint, status, body, total) of a REST request.
+
+        For paginated lists, `total` is the number of items and `body` a
+        function returning the items of an index range.
+        """
+        github = self.server.github
+        if not github.exists(owner, name):
+            return "missing", 404, {"message": "Not Found"}, None
+        if not route:
+            return "repo", 200, github.repo(owner, name), None
+        if route == ["forks"]:
+            n = github.count(name, "forks") if owner == OWNER else 0
+            return "forks", 200, lambda a, b: [github.fork(name, k) for k in range(a, b)], n
+        if route == ["commits"]:
+            since = parse_iso(query["since"]) if "since" in query else None
+            until = parse_iso(query["until"]) if "until" in query else None
+            commits = github.commits(name, since, until)
+            return (
+                "commits",
+                200,
+                lambda a, b: [github.commit(owner, name, i, d) for i, d in commits[a:b]],
+                len(commits),
+            )
+        if route[0] == "compare" and len(route) == 2:
+            fork_owner = route[1].split("...", 1)[-1].split(":", 1)[0]
+            match = re.fullmatch(r"user(\d+)", fork_owner)
+            if not match or not github.exists(fork_owner, name):
+                return "compare", 404, {"message": "Not Found"}, None
+            k = int(match.group(1))
+            created_at = parse_iso(github.fork(name, k)["created_at"])
+            commits = [
+                github.commit(fork_owner, name, i, created_at + 3600 * (i + 1))
+                for i in github.fork_commits(name, k)
+            ]
+            return "compare", 200, {"ahead_by": len(commits), "commits": commits}, None
+        if route == ["pulls"]:
+            n = github.count(name, "prs") if owner == OWNER else github.fork_prs(owner)
+            # Newest first, numbered from 1
+            return "pulls", 200, lambda a, b: [github.pr(name, n - i) for i in range(a, b)], n
+        if route == ["pulls", "comments"]:
+            n = github.count(name, "prs")
+            # Comments are created (and last edited) with their PR
+            since = parse_iso(query["since"]) if "since" in query else None
+            comments = [
+                {
+                    "id": github.repo_id(name) * 100000 + number * 10 + i,
+                    "body": body,
+                    "pull_request_url": f"https://api.github.com/repos/{owner}/{name}/pulls/{number}",
+                }
+                for number in range(1, n + 1)
+                if since is None or spread(number, n) >= since
+                for i, body in enumerate(github.pr_comments(name, number))
+            ]
+            return "pr_comments", 200, lambda a, b: comments[a:b], len(comments)
+        if len(route) == 3 and route[0] == "pulls" and route[2] in ("commits", "comments"):
+            number = int(route[1])
+            if route[2] == "commits":
+                shas = github.pr_commits(name, number)
+                return "pr_commits", 200, lambda a, b: [{"sha": sha} for sha in shas[a:b]], len(shas)
+            bodies = github.pr_comments(name, number)
+            return "pr_comments", 200, lambda a, b: [{"body": body} for body in bodies[a:b]], len(bodies)
+        if route == ["stargazers"]:
+            star_json = "star+json" in self.headers.get("Accept", "")
+            return (
+                "stargazers",
+                200,
+                lambda a, b: [github.star(name, i, star_json) for i in range(a, b)],
+                min(github.count(name, "stars"), MAX_LISTED_STARS),
+            )
+        if route == ["releases"]:
+            n = github.count(name, "releases")
+            # Newest first
+            return "releases", 200, lambda a, b: [github.release(name, n - 1 - i) for i in range(a, b)], n
+        return "other", 404, {"message": "Not Found"}, None
+
+    def graphql(self, query):
+        """Answers the batched queries of API/graphql.py."""
+        github = self.server.github
+        if "pullRequest(number:" in query:
+            owner, name = map(json.loads, REPOSITORY_ARGS.search(query).groups())
+            repository = {}
+            for alias, number in PULL_REQUEST_ALIAS.findall(query):
+                shas = github.pr_commits(name, int(number))
+                repository[alias] = {
+                    "commits": {
+                        "totalCount": len(shas),
+                        "nodes": [{"commit": {"oid": sha}} for sha in shas],
+                    }
+                }
+            return {"data": {"repository": repository}}
+        if "stargazers(first:" in query:
+            # Newest first; the cursor is the index of the next star
+            owner, name = map(json.loads, REPOSITORY_ARGS.search(query).groups())
+            first, after = STARGAZERS_ARGS.search(query).groups()
+            n = github.count(name, "stars")
+            start = int(json.loads(after)) if after else 0
+            end = min(start + int(first), n)
+            edges = [
+                {"starredAt": github.star(name, n - 1 - i, True)["starred_at"]}
+                for i in range(start, end)
+            ]
+            stargazers = {
+                "totalCount": n,
+                "pageInfo": {"hasNextPage": end < n, "endCursor": str(end)},
+                "edges": edges,
+            }
+            return {"data": {"repository": {"stargazers": stargazers}}}
+
+        data, errors = {}, []
+        for alias, owner, name in REPOSITORY_ALIAS.findall(query):
+            owner, name = json.loads(owner), json.loads(name)
+            if github.exists(owner, name):
+                data[alias] = github.graphql_repo(owner, name)
+            else:
+                data[alias] = None
+                errors.append(
+                    {
+                        "type": "NOT_FOUND",
+                        "path": [alias],
+                        "message": f"Could not resolve to a Repository with the name '{owner}/{name}'.",
+                    }
+                )
+        return {"data": data, "errors": errors} if errors else {"data": data}
+
+    def reply(self, endpoint, resource, status, body, headers=None):
+        """Sends a response after the configured latency, unless the token is rate limited."""
+        time.sleep(self.server.latency)
+        token = self.headers.get("Authorization", "anonymous")
+        rate_headers, rejection = self.server.limits.take(token, resource)
+        if rejection:
+            status, message, extra = rejection
+            body, headers = {"message": message}, extra
+        self.server.stats.record(endpoint, status)
+        self.send_json(status, body, dict(rate_headers, **(headers or {})))
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start(
+    port=0,
+    latency_ms=0,
+    rate_limit=5000,
+    reset_seconds=3600,
+    secondary_every=0,
+    retry_after=1,
+    **sizes,
+):
+    """Starts the server in a background thread and returns it (its port is `server.server_port`)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    server.github = SyntheticGitHub(**sizes)
+    server.limits = RateLimits(rate_limit, reset_seconds, secondary_every, retry_after)
+    server.stats = Stats()
+    server.latency = latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for the GitHub API")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (127.0.0.1)")
+    parser.add_argument("--latency", type=int, default=0, help="Delay of every response in ms")
+    parser.add_argument("--rate_limit", type=int, default=5000, help="Requests per token and reset window")
+    parser.add_argument("--reset_seconds", type=int, default=3600, help="Length of the rate-limit window")
+    parser.add_argument(
+        "--secondary_every",
+        type=int,
+        default=0,
+        help="Reject every n-th request with a secondary rate limit (0: never)",
+    )
+    parser.add_argument("--retry_after", type=int, default=1, help="Retry-After of secondary limits in seconds")
+    for kind, default in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{kind}", type=int, default=default, help=f"Average {kind} per repo")
+    args = parser.parse_args()
+
+    server = start(
+        args.port,
+        args.latency,
+        args.rate_limit,
+        args.reset_seconds,
+        args.secondary_every,
+        args.retry_after,
+        **{kind: getattr(args, kind) for kind in DEFAULT_SIZES},
+    )
+    print(f"🧪 Mock GitHub API listening on http://127.0.0.1:{server.server_port}/")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Throughput benchmark of the collectors against the offline mock server.
+
+Runs `CLI.py dataget --choice N` for every API choice (1-8; choice 9 works on
+local git mirrors) in a temporary data directory whose repos are served by
+benchmark/mock_server.py, and reports per choice the wall time, requests per
+second, requests (quota) per saved row and rate-limit rejections. With
+`--throttle`, every choice is run again against a server with a small
+per-token budget and periodic secondary limits.
+
+Usage:
+    python benchmark/run_benchmark.py --repos 10 --latency 20 --throttle
+    python benchmark/run_benchmark.py --choices 5 6 -- --graphql --concurrency 8
+
+Arguments after `--` are passed to every dataget run.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import requests
+
+import mock_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import constants  # noqa: E402
+from API.storage import get_storage  # noqa: E402
+
+# Tables written by every choice
+OUTPUT_TABLES = {
+    1: [constants.REPO_CSV_PATH],
+    2: [constants.FORK_CSV_PATH],
+    3: [constants.REPO_COMMIT_CSV_PATH],
+    4: [constants.FORK_COMMIT_CSV_PATH],
+    5: [constants.REPO_PR_CSV_PATH],
+    6: [constants.FORK_PR_CSV_PATH],
+    7: [constants.STAR_CSV_PATH, constants.STAR_COUNT_CSV_PATH],
+    8: [constants.RELEASE_CSV_PATH],
+}
+# Choices whose input tables come from other choices
+PREREQUISITES = {2: [1], 3: [1], 4: [1, 2], 5: [1], 6: [1, 2], 7: [1], 8: [1]}
+
+
+def option(dataget_args, name, default):
+    """Returns the value of a dataget option passed after `--`."""
+    for i, arg in enumerate(dataget_args):
+        if arg == name and i + 1 < len(dataget_args):
+            return dataget_args[i + 1]
+        if arg.startswith(name + "="):
+            return arg.split("=", 1)[1]
+    return default
+
+
+def count_rows(storage, choice):
+    return sum(
+        len(storage.read(path)) for path in OUTPUT_TABLES[choice] if storage.exists(path)
+    )
+
+
+def run_choice(choice, server_url, dataget_args, storage, log_path):
+    """Runs one dataget choice and returns its measurements."""
+    requests.post(server_url + "_reset")
+    rows_before = count_rows(storage, choice)
+    command = [
+        sys.executable,
+        os.path.join(ROOT, "CLI.py"),
+        "dataget",
+        "--choice",
+        str(choice),
+        "--api_url",
+        server_url,
+        "--no_cache",
+        # One shard holds every repo, so the teammate column is not needed
+        "--num_shards",
+        "1",
+        *dataget_args,
+    ]
+    env = dict(os.environ, GITHUB_TOKEN="benchmark-token")
+    start = time.time()
+    with open(log_path, "w") as log:
+        result = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, env=env)
+    wall_time = time.time() - start
+    stats = requests.get(server_url + "_stats").json()
+    rows = count_rows(storage, choice) - rows_before
+    rejected = stats["statuses"].get("403", 0)
+    return {
+        "choice": choice,
+        "exit_code": result.returncode,
+        "wall_seconds": round(wall_time, 2),
+        "requests": stats["requests"],
+        "requests_per_second": round(stats["requests"] / wall_time, 1),
+        "rows": rows,
+        "requests_per_row": round(stats["requests"] / rows, 3) if rows else None,
+        "rate_limited": rejected,
+        "endpoints": stats["endpoints"],
+    }
+
+
+def run_scenario(name, args, dataget_args, server_options):
+    """Runs the choices in a fresh data directory against a new mock server."""
+    server = mock_server.start(
+        latency_ms=args.latency,
+        **server_options,
+        **{kind: getattr(args, kind) for kind in mock_server.DEFAULT_SIZES},
+    )
+    server_url = f"http://127.0.0.1:{server.server_port}/"
+    work_dir = tempfile.mkdtemp(prefix=f"benchmark_{name}_")
+    cwd = os.getcwd()
+    os.chdir(work_dir)  # The data/ paths of constants.py are relative
+    try:
+        os.makedirs(constants.data_dir)
+        repo_names = [f"bench-{i}" for i in range(args.repos)] + ["missing-repo"]
+        pd.DataFrame({"pj_alias": repo_names}).to_csv(constants.PROJECTS_LIST, index=False)
+        storage = get_storage(
+            option(dataget_args, "--storage", constants.STORAGE_BACKEND),
+            option(dataget_args, "--database_path", constants.DATABASE_PATH),
+        )
+
+        choices = []
+        for choice in args.choices:
+            for needed in PREREQUISITES.get(choice, []) + [choice]:
+                if needed not in choices:
+                    choices.append(needed)
+        results = []
+        for choice in choices:
+            log_path = os.path.join(work_dir, f"choice_{choice}.log")
+            result = run_choice(choice, server_url, dataget_args, storage, log_path)
+            if result["exit_code"] != 0:
+                with open(log_path) as log:
+                    print(log.read()[-2000:])
+                print(f"❌ [{name}] Choice {choice} failed (exit code {result['exit_code']})")
+            if choice in args.choices:
+                results.append(dict(result, scenario=name))
+                print(
+                    f"⏱️ [{name}] Choice {choice}: {result['wall_seconds']}s, {result['requests']} requests ({result['requests_per_second']}/s), {result['rows']} rows, {result['requests_per_row']} requests/row, {result['rate_limited']} rate limited"
+                )
+        return results
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        server.server_close()
+        if args.keep:
+            print(f"📁 [{name}] Data and logs kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    argv = sys.argv[1:]
+    dataget_args = argv[argv.index("--") + 1 :] if "--" in argv else []
+    argv = argv[: argv.index("--")] if "--" in argv else argv
+
+    parser = argparse.ArgumentParser(description="Benchmark the collectors offline")
+    parser.add_argument(
+        "--choices",
+        type=int,
+        nargs="+",
+        choices=sorted(OUTPUT_TABLES),
+        default=sorted(OUTPUT_TABLES),
+        help="Specify the dataget choices to benchmark (their input choices run first)",
+    )
+    parser.add_argument("--repos", type=int, default=5, help="Specify the number of synthetic repos")
+    parser.add_argument("--latency", type=int, default=20, help="Specify the delay of every response in ms")
+    for kind, default in mock_server.DEFAULT_SIZES.items():
+        parser.add_argument(f"--{kind}", type=int, default=default, help=f"Average {kind} per repo")
+    parser.add_argument(
+        "--rate_limit",
+        type=int,
+        default=1000000,
+        help="Specify the requests per token and hour of the normal run (GitHub: 5000, paced by the collectors)",
+    )
+    parser.add_argument(
+        "--throttle",
+        action="store_true",
+        help="Run every choice again with a small rate limit and secondary limits",
+    )
+    parser.add_argument(
+        "--throttle_limit",
+        type=int,
+        default=200,
+        help="Specify the requests per token and window of the throttled run",
+    )
+    parser.add_argument(
+        "--throttle_reset",
+        type=int,
+        default=10,
+        help="Specify the rate-limit window of the throttled run in seconds",
+    )
+    parser.add_argument(
+        "--secondary_every",
+        type=int,
+        default=100,
+        help="Reject every n-th request of the throttled run with a secondary limit",
+    )
+    parser.add_argument("--output", type=str, help="Write the results to this JSON file")
+    parser.add_argument("--keep", action="store_true", help="Keep the data directories and logs")
+    args = parser.parse_args(argv)
+
+    results = run_scenario("normal", args, dataget_args, {"rate_limit": args.rate_limit})
+    if args.throttle:
+        results += run_scenario(
+            "throttled",
+            args,
+            dataget_args,
+            {
+                "rate_limit": args.throttle_limit,
+                "reset_seconds": args.throttle_reset,
+                "secondary_every": args.secondary_every,
+                "retry_after": 1,
+            },
+        )
+
+    print()
+    print(
+        f"{'scenario':<10} {'choice':>6} {'wall s':>8} {'requests':>9} {'req/s':>7} {'rows':>7} {'req/row':>8} {'403s':>5}"
+    )
+    for result in results:
+        print(
+            f"{result['scenario']:<10} {result['choice']:>6} {result['wall_seconds']:>8} {result['requests']:>9} {result['requests_per_second']:>7} {result['rows']:>7} {str(result['requests_per_row']):>8} {result['rate_limited']:>5}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    if any(result["exit_code"] != 0 for result in results):
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,14 +9,89 @@ FORK_COMMIT_CSV_PATH = data_dir + "4_fork_commit_info.csv"
 REPO_PR_CSV_PATH = data_dir + "5_repo_pr_info.csv"
 FORK_PR_CSV_PATH = data_dir + "6_fork_pr_info.csv"
 STAR_CSV_PATH = data_dir + "7_star_info.csv"
+STAR_COUNT_CSV_PATH = data_dir + "7_star_count_info.csv"
 RELEASE_CSV_PATH = data_dir + "8_release_info.csv"
+COMMIT_STATS_CSV_PATH = data_dir + "4_commit_stats.csv"
+RESUME_LOG_PATH_FORK = data_dir + "resume_log_fork.txt"
 RESUME_LOG_PATH_REPO_COMMIT = data_dir + "resume_log_repo_commit.txt"
 RESUME_LOG_PATH_FORK_COMMIT = data_dir + "resume_log_fork_commit.txt"
 RESUME_LOG_PATH_REPO_PR = data_dir + "resume_log_repo_pr.txt"
 RESUME_LOG_PATH_FORK_PR = data_dir + "resume_log_fork_pr.txt"
 RESUME_LOG_PATH_STAR = data_dir + "resume_log_star.txt"
+RESUME_LOG_PATH_STAR_COUNT = data_dir + "resume_log_star_count.txt"
 RESUME_LOG_PATH_RELEASE = data_dir + "resume_log_release.txt"
+RESUME_LOG_PATH_COMMIT_STATS = data_dir + "resume_log_commit_stats.txt"
+REPO_COMMIT_STATE_PATH = data_dir + "repo_commit_state.json"  # Imported into the checkpoint store
+# Per repo/fork progress of every collection task (the resume logs above are imported once)
+CHECKPOINT_PATH = data_dir + "checkpoints.sqlite"
+# Request metrics in the Prometheus text format, rewritten every METRICS_SECONDS
+# (worker processes write <name>.<pid>.prom next to it)
+METRICS_PATH = data_dir + "metrics.prom"
+METRICS_SECONDS = 60
+PROGRESS_SECONDS = 5  # Seconds between two progress reports of a collection run
+# Jobs of the --workers processes; a job whose lease is not renewed goes back to the queue
+QUEUE_PATH = data_dir + "queue.sqlite"
+LEASE_SECONDS = 300
+# Bare mirrors of the upstream repos (with the branches of their forks) for --engine git and choice 9
+MIRROR_DIR = data_dir + "mirrors/"
+GIT_BASE_URL = "https://github.com/"
+# Base URL of the REST (<API_URL>repos/...) and GraphQL (<API_URL>graphql) APIs
+API_URL = "https://api.github.com/"
+
+STAR_YEARS = [2022, 2023, 2024]  # Years whose stars decide sustainability
+RELEASE_WINDOW_START = "2024-01-01T00:00:00Z"  # Releases of the last year decide sustainability
+RELEASE_WINDOW_END = "2025-01-01T00:00:00Z"
+# Ten yearly intervals ending 2025-01-31 used by preprocess_final_data
+COMMIT_WINDOW_START = "2015-02-04T00:00:00Z"
+COMMIT_WINDOW_END = "2025-01-31T23:59:59Z"
+
+GRAPHQL_BATCH_SIZE = 50  # Items (repositories, PRs, forks) resolved per GraphQL query
+
+# Output rows are buffered and written once either threshold is reached
+CSV_FLUSH_ROWS = 1000
+CSV_FLUSH_SECONDS = 10
+
+# Storage backend of the tables below ("csv"; "parquet": one dataset per table,
+# partitioned by repo_id, stored next to the CSV path with a .parquet suffix;
+# "sqlite": one table per CSV path in DATABASE_PATH, upserted by primary key)
+STORAGE_BACKEND = "csv"
+DATABASE_PATH = data_dir + "github.sqlite"
+
+HTTP_CACHE_PATH = data_dir + "http_cache.sqlite"
+HTTP_CACHE_MAX_MB = 4096
+
+# Seconds a cached response is replayed before it is revalidated with GitHub.
+# 0 revalidates every response with its ETag (a 304 costs no quota), so the
+# collected data is never older than the run; raise a TTL (e.g. 24 * 3600 for
+# "forks") only to trade freshness for speed when rebuilding a table
+HTTP_CACHE_TTLS = {
+    "repo": 0,
+    "forks": 0,
+    "commits": 0,
+    "compare": 0,
+    "pulls": 0,
+    "stargazers": 0,
+    "releases": 0,
+    "default": 0,
+}
 
 SUSTAINABILITY_CSV_PATH = data_dir + "9_sustainability_data.csv"
 REPO_FORK_COMMIT_PR_CSV_PATH = data_dir + "10_repo_fork_commit_pr_info.csv"
 FINAL_CSV_PATH = data_dir + "11_final_data.csv"
+
+# Tables kept in the storage backend (11_final_data.csv stays a CSV as the model input)
+STORAGE_TABLES = [
+    REPO_CSV_PATH,
+    MISSING_CSV_PATH,
+    FORK_CSV_PATH,
+    REPO_COMMIT_CSV_PATH,
+    FORK_COMMIT_CSV_PATH,
+    COMMIT_STATS_CSV_PATH,
+    REPO_PR_CSV_PATH,
+    FORK_PR_CSV_PATH,
+    STAR_CSV_PATH,
+    STAR_COUNT_CSV_PATH,
+    RELEASE_CSV_PATH,
+    SUSTAINABILITY_CSV_PATH,
+    REPO_FORK_COMMIT_PR_CSV_PATH,
+]
@@ -0,0 +1,62 @@
+import os
+import subprocess
+
+import pytest
+
+
+class GitRepo:
+    """A git working tree with a fixed author and commit dates, for building test repos."""
+
+    def __init__(self, work_tree):
+        self.work_tree = str(work_tree)
+        self.git_dir = os.path.join(self.work_tree, ".git")
+
+    def git(self, *args, email="dev@example.com", timestamp=1700000000):
+        """Runs git in the working tree; commits are authored at `timestamp` and committed a minute later."""
+        env = dict(
+            os.environ,
+            GIT_AUTHOR_NAME="Dev",
+            GIT_AUTHOR_EMAIL=email,
+            GIT_AUTHOR_DATE=f"{timestamp} +0200",
+            GIT_COMMITTER_NAME="Dev",
+            GIT_COMMITTER_EMAIL=email,
+            GIT_COMMITTER_DATE=f"{timestamp + 60} +0200",
+            GIT_CONFIG_GLOBAL=os.devnull,
+            GIT_CONFIG_NOSYSTEM="1",
+        )
+        result = subprocess.run(
+            ["git", "-C", self.work_tree, "-c", "commit.gpgsign=false", *args],
+            env=env,
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        return result.stdout.strip()
+
+    def write(self, name, content, mode="w"):
+        with open(os.path.join(self.work_tree, name), mode) as f:
+            f.write(content)
+
+    def commit(self, message, **kwargs):
+        """Commits every change of the working tree and returns the sha."""
+        self.git("add", "--all", **kwargs)
+        self.git("commit", "--quiet", "-m", message, **kwargs)
+        return self.git("rev-parse", "HEAD")
+
+
+@pytest.fixture
+def git_repo():
+    """Returns a function that creates a repo on branch main at a path (or clones `origin` there)."""
+
+    def create(path, origin=None):
+        path = str(path)
+        if origin is None:
+            os.makedirs(path, exist_ok=True)
+            repo = GitRepo(path)
+            repo.git("init", "--quiet", "-b", "main")
+            return repo
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        GitRepo(os.path.dirname(path)).git("clone", "--quiet", origin.work_tree, path)
+        return GitRepo(path)
+
+    return create
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from API.commit_stats import commit_stats
+from API.gitmirror import GitError
+
+
+def test_commit_stats_counts_lines_like_the_api(tmp_path, git_repo):
+    repo = git_repo(tmp_path)
+    repo.write("a.txt", "one\ntwo\nthree\n")
+    added = repo.commit("add a")
+
+    # One changed line, a new file and a binary file (0 lines)
+    repo.write("a.txt", "one\n2\nthree\n")
+    repo.write("b.txt", "x\ny\n")
+    repo.write("image.bin", b"\x00\x01\x02\xff", mode="wb")
+    changed = repo.commit("change a, add b and a binary file")
+
+    repo.git("checkout", "--quiet", "-b", "feature")
+    repo.write("c.txt", "1\n2\n3\n4\n")
+    feature = repo.commit("add c")
+    repo.git("checkout", "--quiet", "main")
+    repo.write("a.txt", "zero\n", mode="a")
+    main = repo.commit("extend a")
+    repo.git("merge", "--quiet", "--no-ff", "-m", "merge feature", "feature")
+    merge = repo.git("rev-parse", "HEAD")
+
+    stats = {
+        sha: (additions, deletions)
+        for sha, additions, deletions in commit_stats(repo.git_dir)
+    }
+
+    assert stats == {
+        added: (3, 0),
+        changed: (3, 1),
+        feature: (4, 0),
+        main: (1, 0),
+        merge: (4, 0),  # Diffed against its first parent
+    }
+
+
+def test_commit_stats_of_an_empty_revision_list(tmp_path, git_repo):
+    repo = git_repo(tmp_path)
+    repo.write("a.txt", "one\n")
+    sha = repo.commit("add a")
+
+    assert list(commit_stats(repo.git_dir, [f"{sha}..{sha}"])) == []
+
+
+def test_commit_stats_of_a_missing_repository_raise(tmp_path):
+    with pytest.raises(GitError):
+        list(commit_stats(os.path.join(tmp_path, "missing.git")))
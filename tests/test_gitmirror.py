@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from API.gitmirror import GitError, GitMirror, author_of, iso_utc
+
+
+def commit(repo, message, **kwargs):
+    repo.write("file.txt", message + "\n", mode="a")
+    return repo.commit(message, **kwargs)
+
+
+@pytest.fixture
+def repos(tmp_path, git_repo):
+    """An upstream repo apache/proj and its fork user1/proj with two commits of its own."""
+    base = tmp_path / "remote"
+    upstream = git_repo(base / "apache" / "proj.git")
+    commit(upstream, "initial", timestamp=1600000000)
+    fork = git_repo(base / "user1" / "proj.git", origin=upstream)
+    first = commit(
+        fork,
+        "fork change",
+        email="12345+user1@users.noreply.github.com",
+        timestamp=1700000000,
+    )
+    second = commit(fork, "another change", email="user1@example.com", timestamp=1700003600)
+    # A later upstream commit is not a commit of the fork
+    commit(upstream, "upstream change", timestamp=1700007200)
+    return str(base) + "/", str(tmp_path / "mirrors"), [first, second]
+
+
+def test_fork_commits_lists_the_commits_missing_upstream(repos):
+    base_url, mirror_dir, shas = repos
+    mirror = GitMirror(mirror_dir, base_url)
+
+    commits = mirror.fork_commits("apache", "proj", "main", 7, "user1", "proj", "main")
+
+    assert [c["sha"] for c in commits] == shas  # Oldest first like the compare API
+    assert commits[0] == {
+        "sha": shas[0],
+        "email": "12345+user1@users.noreply.github.com",
+        "authored_at": "2023-11-14T22:13:20Z",
+        "committed_at": "2023-11-14T22:14:20Z",
+    }
+    assert commits[1]["authored_at"] == "2023-11-14T23:13:20Z"
+    assert os.path.exists(os.path.join(mirror_dir, "apache", "proj.git", "HEAD"))
+    assert mirror.fork_refs(os.path.join(mirror_dir, "apache", "proj.git")) == {"7"}
+
+
+def test_fork_commits_of_a_missing_fork_raise(repos):
+    base_url, mirror_dir, _ = repos
+    mirror = GitMirror(mirror_dir, base_url)
+
+    with pytest.raises(GitError):
+        mirror.fork_commits("apache", "proj", "main", 8, "deleted", "proj", "main")
+
+
+def test_author_of_maps_noreply_addresses():
+    assert author_of("12345+user1@users.noreply.github.com") == ("user1", 12345)
+    assert author_of("user1@users.noreply.github.com") == ("user1", "unknown")
+    assert author_of("user1@example.com") == ("unknown", "unknown")
+    assert author_of(None) == ("unknown", "unknown")
+
+
+def test_iso_utc_formats_like_the_api():
+    assert iso_utc(0) == "1970-01-01T00:00:00Z"
+    assert iso_utc("1700000000") == "2023-11-14T22:13:20Z"